@@ -0,0 +1,183 @@
+"""
+Mede as etapas do cálculo com relatórios sintéticos (benchmarks/gerador.py) e
+compara com a linha de base gravada em benchmarks/linha_base.json.
+
+    python benchmarks/desempenho.py                      # compara com a linha de base
+    python benchmarks/desempenho.py --gravar-linha-base  # regrava a linha de base
+    python benchmarks/desempenho.py --casos mes_15min --repeticoes 3
+
+Cada caso gera dois medidores (antigo e novo), como na página de dois medidores,
+e mede: leitura dos relatórios (com o cache de leitura esvaziado a cada
+repetição), índice de completude, agregação por posto, índice de picos de
+demanda, montagem da tabela de resultados, pacote dos gráficos e os bytes
+enviados ao diálogo. Os tempos são o mínimo entre as repetições, em ms. Sai
+com código 1 se alguma métrica piorar além da tolerância.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import critcom  # noqa: E402
+from critcom.cache import CACHE_LEITURA  # noqa: E402
+from critcom.completude import calcular_completude  # noqa: E402
+from gerador import gerar_medidor  # noqa: E402
+
+ARQUIVO_LINHA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linha_base.json')
+
+# Nome do caso -> (dias, minutos por intervalo)
+CASOS = {
+    'mes_15min': (31, 15),
+    'ano_15min': (365, 15),
+    'ano_5min': (365, 5),
+}
+PARAMETROS = (1.0, 'Grandeza', 'Não')
+# Tempos menores que este piso (ms) não são tratados como regressão
+PISO_MS = 1.0
+TOLERANCIA_BYTES = 0.01
+
+
+def _cronometrar(funcao, repeticoes, preparar=None):
+    """Menor tempo (ms) entre as repetições e o resultado da última chamada."""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000, resultado
+
+
+def medir_caso(dias, intervalo_min, repeticoes):
+    medidores = [
+        gerar_medidor(dias, intervalo_min, '2024-01-01', '123456', '900001', semente=1),
+        gerar_medidor(dias, intervalo_min, '2024-01-01', '123456', '900002', semente=2),
+    ]
+    metricas = {'linhas_por_relatorio': medidores[0]['consumo'].count('\n') - 5}
+
+    def ler(nome):
+        return [critcom.ler_relatorio_intervalos(m[nome]) for m in medidores]
+
+    metricas['leitura_consumo_ms'], dfs_consumo = _cronometrar(lambda: ler('consumo'), repeticoes, CACHE_LEITURA.limpar)
+    metricas['leitura_demanda_ms'], dfs_demanda = _cronometrar(lambda: ler('demanda'), repeticoes, CACHE_LEITURA.limpar)
+    metricas['leitura_faturamento_ms'], _ = _cronometrar(
+        lambda: [critcom.processar_dados_faturamento(m['faturamento']) for m in medidores], repeticoes, CACHE_LEITURA.limpar)
+    # Já incluída na leitura; medida à parte para acompanhar o custo do índice
+    metricas['completude_ms'], _ = _cronometrar(
+        lambda: [calcular_completude(df) for df in dfs_consumo + dfs_demanda], repeticoes)
+
+    def agregar():
+        return [
+            (critcom.recalcular_resultados(con, 'consumo'), critcom.recalcular_resultados(dem, 'demanda'))
+            for con, dem in zip(dfs_consumo, dfs_demanda)
+        ]
+
+    metricas['agregacao_ms'], resultados = _cronometrar(agregar, repeticoes)
+    metricas['indice_demanda_ms'], indice = _cronometrar(lambda: critcom.IndiceDemanda(dfs_demanda[0]), repeticoes)
+    minimo, maximo = indice.limites
+    faixa = (minimo + (maximo - minimo) / 4, maximo - (maximo - minimo) / 4)
+    metricas['consulta_faixa_ms'], _ = _cronometrar(lambda: indice.agregar(*faixa), repeticoes)
+
+    def tabela():
+        linhas = critcom.linhas_dois_medidores(resultados[0], resultados[1], PARAMETROS, PARAMETROS)
+        df = critcom.formatar_tabela(linhas, critcom.COLUNAS_DOIS_MEDIDORES)
+        return critcom.tabela_html_dois_medidores(df, '900001', '900002')
+
+    metricas['tabela_ms'], table_html = _cronometrar(tabela, repeticoes)
+
+    series = {}
+    for sufixo, con, dem in zip(('antigo', 'novo'), dfs_consumo, dfs_demanda):
+        for coluna in ('kWh fornecido', 'kWh recebido'):
+            series[f'{coluna}_{sufixo}'] = (con, coluna)
+        for coluna in ('kW fornecido', 'kW recebido', 'DMCR', 'UFER'):
+            series[f'{coluna}_{sufixo}'] = (dem, coluna)
+    metricas['pacote_graficos_ms'], pacote = _cronometrar(lambda: json.dumps(critcom.pacote_graficos(series)), repeticoes)
+
+    # O restante do HTML do diálogo (estilos e a montagem dos gráficos) tem tamanho fixo
+    metricas['bytes_pacote'] = len(pacote.encode('utf-8'))
+    metricas['bytes_tabela'] = len(table_html.encode('utf-8'))
+    metricas['bytes_dialogo'] = metricas['bytes_pacote'] + metricas['bytes_tabela'] + len(critcom.JS_PACOTE.encode('utf-8'))
+    return metricas
+
+
+def comparar(atual, base, tolerancia):
+    """Lista de (caso, métrica, base, atual) que pioraram além da tolerância."""
+    regressoes = []
+    for caso, metricas in atual.items():
+        for nome, valor in metricas.items():
+            anterior = base.get(caso, {}).get(nome)
+            if anterior is None:
+                continue
+            if nome.endswith('_ms'):
+                piorou = valor > anterior * (1 + tolerancia) and valor - anterior > PISO_MS
+            elif nome.startswith('bytes_'):
+                piorou = valor > anterior * (1 + TOLERANCIA_BYTES)
+            else:
+                piorou = False
+            if piorou:
+                regressoes.append((caso, nome, anterior, valor))
+    return regressoes
+
+
+def _formatar(valor):
+    return f"{valor:,.1f}" if isinstance(valor, float) else f"{valor:,}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--casos', nargs='+', choices=sorted(CASOS), default=list(CASOS))
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="piora relativa aceita nos tempos (padrão: %(default)s)")
+    parser.add_argument('--linha-base', default=ARQUIVO_LINHA_BASE)
+    parser.add_argument('--gravar-linha-base', action='store_true', help="grava as medições atuais como linha de base")
+    args = parser.parse_args()
+
+    atual = {}
+    for caso in args.casos:
+        dias, intervalo_min = CASOS[caso]
+        atual[caso] = medir_caso(dias, intervalo_min, args.repeticoes)
+
+    base = {}
+    if os.path.isfile(args.linha_base):
+        with open(args.linha_base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo).get('casos', {})
+
+    for caso, metricas in atual.items():
+        print(f"\n{caso}")
+        print(f"  {'métrica':<26}{'atual':>14}{'base':>14}")
+        for nome, valor in metricas.items():
+            anterior = base.get(caso, {}).get(nome)
+            print(f"  {nome:<26}{_formatar(valor):>14}{_formatar(anterior) if anterior is not None else '-':>14}")
+
+    if args.gravar_linha_base:
+        dados = {
+            'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'casos': {**base, **atual},
+        }
+        with open(args.linha_base, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+            arquivo.write('\n')
+        print(f"\nLinha de base gravada em {args.linha_base}")
+        return 0
+
+    regressoes = comparar(atual, base, args.tolerancia)
+    if regressoes:
+        print("\nREGRESSÕES:", file=sys.stderr)
+        for caso, nome, anterior, valor in regressoes:
+            print(f"  {caso} {nome}: {_formatar(anterior)} -> {_formatar(valor)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Compara a leitura do relatório de faturamento linha a linha (critcom.faturamento)
+com a versão anterior, por expressões regulares, guardada abaixo.
+
+    python benchmarks/faturamento.py
+    python benchmarks/faturamento.py --periodos 1 12 --repeticoes 200
+
+Os relatórios vêm de benchmarks/gerador.py, um por mês. Com um período, os dois
+parsers devem dar o mesmo resultado (o script confere antes de medir); com
+vários, a versão anterior fica só com o último período, e a atual os combina.
+Os tempos são o mínimo entre as repetições, sem o cache de leitura.
+"""
+import argparse
+import math
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from critcom.cache import CACHE_LEITURA  # noqa: E402
+from critcom.faturamento import POSTOS_FATURAMENTO, _para_numero, processar_dados_faturamento  # noqa: E402
+from gerador import gerar_medidor  # noqa: E402
+
+
+def processar_regex(texto_bruto):
+    """Versão anterior de processar_dados_faturamento (sem o cache), para comparação."""
+    if not texto_bruto:
+        return None, None
+
+    resultados_consumo = {}
+    resultados_demanda = {}
+
+    mapa_grandezas = {
+        'kWh fornecido': 'kWh fornecido',
+        'kWh recebido': 'kWh recebido',
+        'kWh fornecido - Demanda máxima': 'kW fornecido',
+        'kWh recebido - Demanda máxima': 'kW recebido',
+        'UFER': 'UFER',
+        'DMCR': 'DMCR'
+    }
+
+    postos_pattern = r"(Fora Ponta|Ponta|Reservado)\n([\s\S]*?)(?=\n\n|\Z|Dados gerais do faturamento|Fora Ponta|Ponta|Reservado)"
+
+    for posto_match in re.finditer(postos_pattern, texto_bruto):
+        posto = posto_match.group(1)
+        bloco_dados = posto_match.group(2)
+
+        for nome_relatorio, chave_interna in mapa_grandezas.items():
+            valor_match = re.search(rf"^{re.escape(nome_relatorio)}\s+([\d.,-]+)", bloco_dados, re.MULTILINE)
+            if valor_match:
+                valor_num = _para_numero(valor_match.group(1))
+                if chave_interna in ['kWh fornecido', 'kWh recebido', 'UFER']:
+                    if chave_interna not in resultados_consumo:
+                        resultados_consumo[chave_interna] = {'operacao': 'soma', 'valores': {}}
+                    resultados_consumo[chave_interna]['valores'][posto] = valor_num
+                else:
+                    if chave_interna not in resultados_demanda:
+                        op = 'soma' if chave_interna == 'UFER' else 'máximo'
+                        resultados_demanda[chave_interna] = {'operacao': op, 'valores': {}}
+                    resultados_demanda[chave_interna]['valores'][posto] = valor_num
+
+    for res_dict in [resultados_consumo, resultados_demanda]:
+        for grandeza in res_dict:
+            for posto in POSTOS_FATURAMENTO:
+                if posto not in res_dict[grandeza]['valores']:
+                    res_dict[grandeza]['valores'][posto] = 0.0
+
+    return resultados_consumo, resultados_demanda
+
+
+def _iguais(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_iguais(a[chave], b[chave]) for chave in a)
+    if isinstance(a, (tuple, list)):
+        return len(a) == len(b) and all(_iguais(x, y) for x, y in zip(a, b))
+    if isinstance(a, float):
+        return a == b or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+def _relatorio(periodos):
+    """Texto com `periodos` relatórios mensais do mesmo medidor, colados em sequência."""
+    return ''.join(
+        gerar_medidor(30, 15, f'2024-{mes % 12 + 1:02d}-01', semente=mes)['faturamento'] for mes in range(periodos)
+    )
+
+
+def _cronometrar(funcao, texto, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--periodos', type=int, nargs='+', default=[1, 3, 12])
+    parser.add_argument('--repeticoes', type=int, default=100)
+    args = parser.parse_args()
+
+    # Sem o cache de leitura: mede o parser, não a consulta ao cache (a leitura
+    # dos períodos também é memoizada, então o cache é esvaziado a cada chamada)
+    def linha_a_linha(texto):
+        CACHE_LEITURA.limpar()
+        return processar_dados_faturamento(texto)
+
+    print(f"{'períodos':>9}{'linhas':>8}{'regex (µs)':>14}{'linha a linha (µs)':>20}{'ganho':>8}")
+    for periodos in args.periodos:
+        texto = _relatorio(periodos)
+        if periodos == 1 and not _iguais(processar_regex(texto), linha_a_linha(texto)):
+            print("Os dois parsers deram resultados diferentes para um período.", file=sys.stderr)
+            return 1
+        tempo_regex = _cronometrar(processar_regex, texto, args.repeticoes)
+        tempo_linhas = _cronometrar(linha_a_linha, texto, args.repeticoes)
+        print(f"{periodos:>9}{texto.count(chr(10)):>8}{tempo_regex:>14.1f}{tempo_linhas:>20.1f}{tempo_regex / tempo_linhas:>7.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
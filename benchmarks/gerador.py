@@ -0,0 +1,183 @@
+"""
+Gerador de relatórios sintéticos no formato colado nas páginas.
+
+Produz o texto dos relatórios de consumo, demanda e faturamento de um medidor
+(cabeçalho "Data  Dia  Postos horários ...", números no formato brasileiro,
+postos Ponta, Fora Ponta e Reservado) com perfil de carga diário, ruído e
+alguns valores ausentes ("-"). O resultado é determinístico pela semente.
+
+    python benchmarks/gerador.py --dias 365 --intervalo 5 --saida /tmp/relatorios
+"""
+import argparse
+import os
+
+import numpy as np
+
+DIAS_SEMANA = np.array(['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'])
+POSTOS = np.array(['Fora Ponta', 'Ponta', 'Reservado'])
+
+# Janelas padrão (horário de início do intervalo): Ponta 18h-21h em dias úteis,
+# Reservado 0h-6h em todos os dias
+PONTA = (18 * 60, 21 * 60)
+RESERVADO = (0, 6 * 60)
+
+
+_TROCA_BR = str.maketrans(',.', '.,')
+
+
+def formatar_br(valores, casas=3):
+    """Formata os valores como "1.234,567"; NaN vira "-"."""
+    return [f"{v:,.{casas}f}".translate(_TROCA_BR) if v == v else '-' for v in valores.tolist()]
+
+
+def instantes(dias, intervalo_min, inicio):
+    """Fim de cada intervalo de integração (o primeiro é inicio + intervalo)."""
+    num = dias * 24 * 60 // intervalo_min
+    base = np.datetime64(inicio, 'm')
+    return base + np.arange(1, num + 1) * np.timedelta64(intervalo_min, 'm')
+
+
+def classificar_postos(fins):
+    """Código do posto (índice em POSTOS) pelo início de cada intervalo."""
+    inicio_intervalo = fins - np.timedelta64(1, 'm')
+    minuto_dia = (inicio_intervalo - inicio_intervalo.astype('datetime64[D]')).astype(np.int64)
+    dia_semana = (inicio_intervalo.astype('datetime64[D]').astype(np.int64) + 3) % 7  # 1970-01-01 foi quinta
+    codigos = np.zeros(len(fins), dtype=np.int8)
+    codigos[(minuto_dia >= RESERVADO[0]) & (minuto_dia < RESERVADO[1])] = 2
+    codigos[(minuto_dia >= PONTA[0]) & (minuto_dia < PONTA[1]) & (dia_semana < 5)] = 1
+    return codigos, dia_semana
+
+
+def perfil_carga(fins, gerador, carga_media_kw=500.0):
+    """Demanda ativa (kW) com ciclo diário, fim de semana mais leve e ruído."""
+    minuto_dia = (fins - fins.astype('datetime64[D]')).astype(np.int64)
+    dia_semana = (fins.astype('datetime64[D]').astype(np.int64) + 3) % 7
+    ciclo = 0.65 + 0.35 * np.sin((minuto_dia / 1440.0 - 0.3) * 2 * np.pi)
+    fator_semana = np.where(dia_semana >= 5, 0.6, 1.0)
+    ruido = gerador.normal(1.0, 0.08, len(fins)).clip(0.5, 1.5)
+    return carga_media_kw * ciclo * fator_semana * ruido
+
+
+def _com_ausentes(valores, gerador, taxa_ausentes):
+    valores = valores.copy()
+    valores[gerador.random(len(valores)) < taxa_ausentes] = np.nan
+    return valores
+
+
+def _cabecalho(contrato, serial, colunas):
+    return [
+        f"Cliente (contrato)\t{contrato}",
+        f"Medidor (serial)\t{serial}",
+        "Postos horários\tMedidor",
+        "",
+        "Data\tDia\tPostos horários\t" + "\t".join(colunas),
+    ]
+
+
+def _linhas_dados(fins, postos, dia_semana, colunas_valores):
+    # "aaaa-mm-ddTHH:MM" -> "dd/mm/aaaa HH:MM"
+    datas = [f"{s[8:10]}/{s[5:7]}/{s[:4]} {s[11:16]}" for s in np.datetime_as_string(fins, unit='m').tolist()]
+    colunas = [datas, DIAS_SEMANA[dia_semana].tolist(), POSTOS[postos].tolist()] + list(colunas_valores)
+    return ['\t'.join(campos) for campos in zip(*colunas)]
+
+
+def gerar_medidor(dias=30, intervalo_min=15, inicio='2024-01-01', contrato='123456', serial='987654',
+                  semente=0, taxa_ausentes=0.001, carga_media_kw=500.0):
+    """
+    Relatórios de um medidor com dados coerentes entre si. Retorna um dicionário
+    com os textos 'consumo', 'demanda' e 'faturamento' (este com os totais por
+    posto calculados a partir dos mesmos intervalos).
+    """
+    gerador = np.random.default_rng(semente)
+    fins = instantes(dias, intervalo_min, inicio)
+    postos, _ = classificar_postos(fins)
+    dia_semana = (fins.astype('datetime64[D]').astype(np.int64) + 3) % 7
+
+    kw_fornecido = perfil_carga(fins, gerador, carga_media_kw)
+    # Injeção (geração própria) só durante o dia
+    minuto_dia = (fins - fins.astype('datetime64[D]')).astype(np.int64)
+    sol = np.clip(np.sin((minuto_dia / 1440.0 - 0.25) * 2 * np.pi), 0, None)
+    kw_recebido = carga_media_kw * 0.3 * sol * gerador.uniform(0.7, 1.0, len(fins))
+    dmcr = kw_fornecido * gerador.uniform(1.0, 1.05, len(fins))
+    ufer = np.where(gerador.random(len(fins)) < 0.2, kw_fornecido * gerador.uniform(0.0, 0.05, len(fins)), 0.0)
+    horas = intervalo_min / 60.0
+
+    consumo = {
+        'kWh fornecido': _com_ausentes(np.round(kw_fornecido * horas, 3), gerador, taxa_ausentes),
+        'kWh recebido': _com_ausentes(np.round(kw_recebido * horas, 3), gerador, taxa_ausentes),
+    }
+    demanda = {
+        'kW fornecido': _com_ausentes(np.round(kw_fornecido, 3), gerador, taxa_ausentes),
+        'kW recebido': _com_ausentes(np.round(kw_recebido, 3), gerador, taxa_ausentes),
+        'DMCR': _com_ausentes(np.round(dmcr, 3), gerador, taxa_ausentes),
+        'UFER': _com_ausentes(np.round(ufer * horas, 3), gerador, taxa_ausentes),
+    }
+
+    textos = {}
+    for nome, colunas in (('consumo', consumo), ('demanda', demanda)):
+        linhas = _cabecalho(contrato, serial, colunas)
+        linhas += _linhas_dados(fins, postos, dia_semana, [formatar_br(v) for v in colunas.values()])
+        textos[nome] = '\n'.join(linhas) + '\n'
+    textos['faturamento'] = _texto_faturamento(contrato, serial, postos, consumo, demanda, fins)
+    return textos
+
+
+def _texto_faturamento(contrato, serial, postos, consumo, demanda, fins):
+    """Resumo de faturamento por posto, no formato lido por processar_dados_faturamento."""
+    inicio = np.datetime_as_string(fins[0].astype('datetime64[D]'))
+    fim = np.datetime_as_string(fins[-1].astype('datetime64[D]'))
+    linhas = [
+        f"Contrato\t{contrato}",
+        f"Serial do medidor\t{serial}",
+        f"Período\t{inicio} a {fim}",
+        "Postos horários e segmentos reativos\tMedidor",
+        "",
+    ]
+    totais = [
+        ('kWh fornecido', consumo['kWh fornecido'], np.nansum),
+        ('kWh recebido', consumo['kWh recebido'], np.nansum),
+        ('kWh fornecido - Demanda máxima', demanda['kW fornecido'], np.nanmax),
+        ('kWh recebido - Demanda máxima', demanda['kW recebido'], np.nanmax),
+        ('UFER', demanda['UFER'], np.nansum),
+        ('DMCR', demanda['DMCR'], np.nanmax),
+    ]
+    for codigo, posto in enumerate(POSTOS):
+        linhas.append(posto)
+        no_posto = postos == codigo
+        for nome, valores, reducao in totais:
+            valor = reducao(valores[no_posto]) if no_posto.any() else 0.0
+            linhas.append(f"{nome}\t{formatar_br(np.array([valor]))[0]}")
+        linhas.append("")
+    linhas.append("Dados gerais do faturamento")
+    return '\n'.join(linhas) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=30)
+    parser.add_argument('--intervalo', type=int, default=15, help="minutos por intervalo (padrão: %(default)s)")
+    parser.add_argument('--inicio', default='2024-01-01')
+    parser.add_argument('--contratos', type=int, default=1, help="quantidade de contratos gerados")
+    parser.add_argument('--medidores', type=int, default=1, help="medidores por contrato (em períodos consecutivos)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--relatorios', nargs='+', choices=('consumo', 'demanda', 'faturamento'), default=['consumo', 'demanda'],
+                        help="relatórios gravados por medidor (padrão: consumo demanda)")
+    parser.add_argument('--saida', required=True, help="pasta onde os .txt são gravados")
+    args = parser.parse_args()
+
+    os.makedirs(args.saida, exist_ok=True)
+    for c in range(args.contratos):
+        contrato = str(100000 + c)
+        inicio = np.datetime64(args.inicio, 'D')
+        for m in range(args.medidores):
+            serial = str(900000 + c * 10 + m)
+            textos = gerar_medidor(args.dias, args.intervalo, str(inicio), contrato, serial, semente=args.semente + c * 10 + m)
+            for nome in args.relatorios:
+                texto = textos[nome]
+                with open(os.path.join(args.saida, f"{contrato}_{serial}_{nome}.txt"), 'w', encoding='utf-8') as arquivo:
+                    arquivo.write(texto)
+            inicio += np.timedelta64(args.dias, 'D')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Mede o tempo de inicialização do núcleo e das páginas, cada medição num processo novo.
+
+    python benchmarks/tempo_inicializacao.py [--repeticoes 5] [--sem-paginas]
+
+Para cada módulo do pacote critcom mostra o tempo de import (sem contar a
+subida do interpretador) e quais dependências pesadas ele carregou. Sai com
+código 1 se algum módulo do núcleo importar o Streamlit. As páginas são medidas
+pela primeira execução no AppTest do Streamlit (partida a frio).
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    'critcom',
+    'critcom.cache',
+    'critcom.memoria',
+    'critcom.governador',
+    'critcom.desempenho',
+    'critcom.confirmacao',
+    'critcom.faturamento',
+    'critcom.recursos',
+    'critcom.tabelas',
+    'critcom.cli',
+    'critcom.graficos',
+    'critcom.graficos_plotly',
+    'critcom.leitura',
+    'critcom.completude',
+    'critcom.calendario',
+    'critcom.arquivos',
+    'critcom.acervo',
+    'critcom.paralelo',
+    'critcom.agregacao',
+    'critcom.picos',
+    'critcom.medidores',
+    'critcom.lote',
+    'critcom.planilhas',
+]
+DEPENDENCIAS_PESADAS = ('streamlit', 'pandas', 'numpy', 'openpyxl', 'plotly')
+
+_SCRIPT_IMPORT = """
+import sys, time, json
+inicio = time.perf_counter()
+import {modulo}
+decorrido = time.perf_counter() - inicio
+print(json.dumps({{'segundos': decorrido, 'carregados': [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+_SCRIPT_PAGINA = """
+import sys, time, json
+sys.path.insert(0, {raiz!r})
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+at = AppTest.from_file({pagina!r}, default_timeout=120)
+at.run()
+print(json.dumps({{'segundos': time.perf_counter() - inicio, 'erros': len(at.exception)}}))
+"""
+
+
+def _rodar(script):
+    saida = subprocess.run([sys.executable, '-c', script], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def medir_modulos(repeticoes):
+    resultados = {}
+    for modulo in MODULOS:
+        medidas = [_rodar(_SCRIPT_IMPORT.format(modulo=modulo, pesadas=DEPENDENCIAS_PESADAS)) for _ in range(repeticoes)]
+        resultados[modulo] = {
+            'mediana_ms': statistics.median(m['segundos'] for m in medidas) * 1000,
+            'carregados': medidas[0]['carregados'],
+        }
+    return resultados
+
+
+def medir_cli(repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'critcom', '--help'], cwd=RAIZ, capture_output=True, check=True)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def medir_paginas(repeticoes):
+    resultados = {}
+    for pagina in sorted(glob.glob(os.path.join(RAIZ, 'pages', '*.py'))):
+        medidas = [_rodar(_SCRIPT_PAGINA.format(raiz=RAIZ, pagina=pagina)) for _ in range(repeticoes)]
+        resultados[os.path.basename(pagina)] = {
+            'mediana_ms': statistics.median(m['segundos'] for m in medidas) * 1000,
+            'erros': max(m['erros'] for m in medidas),
+        }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sem-paginas', action='store_true', help="não mede as páginas (dispensa o Streamlit)")
+    args = parser.parse_args()
+
+    modulos = medir_modulos(args.repeticoes)
+    print(f"{'módulo':<22}{'import (ms)':>12}  dependências carregadas")
+    for modulo, medida in modulos.items():
+        print(f"{modulo:<22}{medida['mediana_ms']:>12.1f}  {', '.join(medida['carregados']) or '-'}")
+    print(f"\n{'python -m critcom --help':<34}{medir_cli(args.repeticoes):>8.1f} ms (com a subida do interpretador)")
+
+    if not args.sem_paginas:
+        print(f"\n{'página (partida a frio)':<40}{'ms':>10}")
+        for pagina, medida in medir_paginas(max(1, args.repeticoes // 2)).items():
+            aviso = f"  ({medida['erros']} exceções)" if medida['erros'] else ""
+            print(f"{pagina:<40}{medida['mediana_ms']:>10.1f}{aviso}")
+
+    com_streamlit = [modulo for modulo, medida in modulos.items() if 'streamlit' in medida['carregados']]
+    if com_streamlit:
+        print(f"\nERRO: o núcleo importa o Streamlit em: {', '.join(com_streamlit)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
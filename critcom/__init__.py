@@ -0,0 +1,103 @@
+"""
+Núcleo de processamento do CRITCOM.
+
+Funções compartilhadas pelas páginas do aplicativo para ler os relatórios de
+memória de massa colados pelo usuário e calcular a confirmação. A confirmação
+em lote, sem a interface, fica em `python -m critcom`.
+
+Nenhum módulo do pacote importa o Streamlit. Os nomes abaixo são carregados sob
+demanda: `import critcom` não importa pandas nem NumPy até que uma função que
+dependa deles seja usada. As páginas usam `critcom.<nome>` para que a primeira
+exibição, ainda sem dados colados, não pague o import do parser.
+"""
+import importlib
+
+_EXPORTACOES = {
+    'ler_relatorio_intervalos': 'critcom.leitura',
+    'ler_linhas_intervalos': 'critcom.leitura',
+    'extrair_info_cliente': 'critcom.cabecalho',
+    'ler_cabecalho': 'critcom.cabecalho',
+    'ler_intervalos': 'critcom.arquivos',
+    'texto_inicial': 'critcom.arquivos',
+    'texto_completo': 'critcom.arquivos',
+    'MedicaoSalva': 'critcom.acervo',
+    'ErroAcervo': 'critcom.acervo',
+    'guardar_relatorio': 'critcom.acervo',
+    'agendar_relatorio': 'critcom.acervo',
+    'GUARDAR_ACERVO_PADRAO': 'critcom.acervo',
+    'carregar_intervalos': 'critcom.acervo',
+    'listar_medicoes': 'critcom.acervo',
+    'ler_intervalos_paralelo': 'critcom.paralelo',
+    'indice_completude': 'critcom.completude',
+    'serie_completa': 'critcom.completude',
+    'resumo_completude': 'critcom.completude',
+    'tabelas_completude': 'critcom.completude',
+    'ClassificadorPostos': 'critcom.calendario',
+    'ErroCalendario': 'critcom.calendario',
+    'carregar_calendarios': 'critcom.calendario',
+    'descrever_calendario': 'critcom.calendario',
+    'agregar_por_posto': 'critcom.agregacao',
+    'recalcular_resultados': 'critcom.agregacao',
+    'resultados_por_grandeza': 'critcom.agregacao',
+    'processar_relatorio': 'critcom.agregacao',
+    'IndiceDemanda': 'critcom.picos',
+    'processar_dados_faturamento': 'critcom.faturamento',
+    'periodos_faturamento': 'critcom.faturamento',
+    'extrair_info_faturamento': 'critcom.faturamento',
+    'get_params': 'critcom.confirmacao',
+    'get_sumarizacao': 'critcom.confirmacao',
+    'calcular_grandezas': 'critcom.confirmacao',
+    'linhas_um_medidor': 'critcom.confirmacao',
+    'linhas_dois_medidores': 'critcom.confirmacao',
+    'linhas_medidores': 'critcom.confirmacao',
+    'linhas_comparacao': 'critcom.confirmacao',
+    'rotulos_medidores': 'critcom.confirmacao',
+    'colunas_medidores': 'critcom.confirmacao',
+    'format_br': 'critcom.confirmacao',
+    'formatar_tabela': 'critcom.confirmacao',
+    'formatar_coluna_br': 'critcom.confirmacao',
+    'COLUNAS_UM_MEDIDOR': 'critcom.confirmacao',
+    'COLUNAS_DOIS_MEDIDORES': 'critcom.confirmacao',
+    'COLUNAS_COMPARACAO': 'critcom.confirmacao',
+    'GRANDEZAS_FATURAMENTO': 'critcom.confirmacao',
+    'tabela_html_um_medidor': 'critcom.tabelas',
+    'tabela_html_dois_medidores': 'critcom.tabelas',
+    'tabela_html_medidores': 'critcom.tabelas',
+    'agregar_medidores': 'critcom.medidores',
+    'confirmar_medidores': 'critcom.medidores',
+    'pacote_graficos': 'critcom.graficos',
+    'serie_reduzida': 'critcom.graficos',
+    'JS_PACOTE': 'critcom.graficos',
+    'assinatura_series': 'critcom.graficos',
+    'html_grafico': 'critcom.graficos',
+    'figura_intervalos': 'critcom.graficos_plotly',
+    'CONFIG_PLOTLY': 'critcom.graficos_plotly',
+    'planilha_confirmacao': 'critcom.planilhas',
+    'MIME_XLSX': 'critcom.planilhas',
+    'bytes_sessao': 'critcom.memoria',
+    'resumo_memoria_sessao': 'critcom.memoria',
+    'retomar_sessao': 'critcom.governador',
+    'registrar_sessao': 'critcom.governador',
+    'resumo_sessoes': 'critcom.governador',
+    'Perfil': 'critcom.desempenho',
+    'SCRIPTS_GRAFICOS': 'critcom.recursos',
+    'tags_scripts': 'critcom.recursos',
+    'GRAFICOS_CHARTJS': 'critcom.recursos',
+    'GRAFICOS_PLOTLY': 'critcom.recursos',
+    'OPCOES_GRAFICOS': 'critcom.recursos',
+}
+
+__all__ = sorted(_EXPORTACOES)
+
+
+def __getattr__(nome):
+    modulo = _EXPORTACOES.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module 'critcom' has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,344 @@
+import datetime
+import os
+import sqlite3
+import threading
+import zlib
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+# --- ACERVO DE MEDIÇÕES ---
+# Os relatórios de intervalos lidos pelas páginas podem ficar guardados num
+# banco SQLite local (sem dependência nova), para reabrir uma confirmação sem
+# colar os relatórios de novo. Cada relatório vira um bloco colunar: uma linha
+# em `blocos` com o medidor, o período coberto e o hash do conteúdo, e uma linha
+# em `colunas` por coluna do DataFrame, com os valores num BLOB (o array NumPy
+# comprimido com zlib). O filtro de período escolhe os blocos pelo índice
+# (contrato, serial, relatório, início) e recorta os instantes depois de
+# descomprimir. Instantes presentes em blocos sobrepostos vêm do mais recente.
+#
+# Guardar é opcional (caixa na barra lateral das páginas; CRITCOM_GUARDAR_ACERVO=1
+# liga por padrão) e a gravação roda numa thread, fora da reexecução da página.
+#
+# O módulo não importa pandas nem NumPy no topo: as páginas listam o acervo na
+# primeira exibição.
+
+ARQUIVO_ACERVO = os.environ.get('CRITCOM_ACERVO', os.path.join(os.path.expanduser('~'), '.critcom', 'acervo.sqlite3'))
+# Caixa "guardar no acervo" marcada por padrão em todas as sessões
+GUARDAR_ACERVO_PADRAO = os.environ.get('CRITCOM_GUARDAR_ACERVO', '') not in ('', '0')
+# Espera pelo lock de escrita de outra sessão (s)
+ESPERA_LOCK = 30
+# Compressão dos BLOBs: o nível 1 já reduz bem os instantes e as colunas zeradas
+NIVEL_ZLIB = 1
+
+# Versão 2: blocos colunares. A versão 1 guardava um valor por linha (tabelas
+# medicoes, relatorios e origens), que são apagadas ao abrir o banco: o acervo
+# é só uma cópia dos relatórios colados, guardados de novo na próxima confirmação.
+VERSAO_ESQUEMA = 2
+_ESQUEMA_ANTIGO = """
+DROP TABLE IF EXISTS medicoes;
+DROP TABLE IF EXISTS relatorios;
+DROP TABLE IF EXISTS origens;
+"""
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS blocos (
+    id INTEGER PRIMARY KEY,
+    contrato TEXT NOT NULL,
+    serial TEXT NOT NULL,
+    relatorio TEXT NOT NULL,
+    inicio INTEGER NOT NULL,
+    fim INTEGER NOT NULL,
+    linhas INTEGER NOT NULL,
+    hash TEXT NOT NULL UNIQUE,
+    cabecalho TEXT NOT NULL,
+    gravado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocos_medidor ON blocos (contrato, serial, relatorio, inicio);
+CREATE TABLE IF NOT EXISTS colunas (
+    bloco INTEGER NOT NULL REFERENCES blocos (id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    categorias TEXT,
+    dados BLOB NOT NULL,
+    PRIMARY KEY (bloco, posicao)
+) WITHOUT ROWID;
+"""
+
+# Relatório guardado, usado pelas páginas no lugar do texto colado ou do arquivo.
+# `inicio` e `fim` (datetime, inclusivos) limitam o período carregado.
+MedicaoSalva = namedtuple('MedicaoSalva', 'contrato serial relatorio inicio fim', defaults=(None, None))
+
+
+class ErroAcervo(Exception):
+    """Falha ao gravar no acervo (arquivo sem permissão, disco cheio, banco corrompido...)."""
+
+
+def conectar(caminho=None, criar=True):
+    """Conexão com o acervo (esquema criado se preciso); None se o arquivo não existir e `criar` for falso."""
+    caminho = caminho or ARQUIVO_ACERVO
+    if not criar and not os.path.isfile(caminho):
+        return None
+    pasta = os.path.dirname(caminho)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    conexao = sqlite3.connect(caminho, timeout=ESPERA_LOCK)
+    # WAL: leituras de outras sessões não esperam pela gravação
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA foreign_keys=ON")
+    if conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_ESQUEMA:
+        conexao.executescript(_ESQUEMA_ANTIGO + _ESQUEMA + f"PRAGMA user_version = {VERSAO_ESQUEMA};")
+    return conexao
+
+
+def _segundos(instante):
+    """Segundos desde 1970 de um datetime, Timestamp ou texto ISO (sem fuso)."""
+    if isinstance(instante, str):
+        instante = datetime.datetime.fromisoformat(instante)
+    if not isinstance(instante, datetime.datetime):
+        instante = datetime.datetime.combine(instante, datetime.time())
+    return int((instante.replace(tzinfo=None) - datetime.datetime(1970, 1, 1)).total_seconds())
+
+
+def _instante(segundos):
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=segundos)
+
+
+def cabecalho_relatorio(texto):
+    """Linhas do relatório antes dos intervalos (até a linha "Data  Dia  Postos horários ...")."""
+    from critcom.leitura import colunas_do_cabecalho
+
+    linhas = []
+    for linha in (texto or '').splitlines():
+        linhas.append(linha)
+        if colunas_do_cabecalho(linha) is not None:
+            break
+    return '\n'.join(linhas)
+
+
+def _comprimir(valores):
+    import numpy as np
+
+    return zlib.compress(np.ascontiguousarray(valores).tobytes(), NIVEL_ZLIB)
+
+
+def _descomprimir(dados, tipo):
+    import numpy as np
+
+    return np.frombuffer(zlib.decompress(dados), dtype=tipo)
+
+
+def guardar_intervalos(df, contrato, serial, relatorio, cabecalho='', hash_fonte=None, caminho=None):
+    """
+    Grava o DataFrame de intervalos (formato de ler_relatorio_intervalos) no
+    acervo, como um bloco. Um conteúdo já guardado (mesmo `hash_fonte`) não é
+    gravado de novo. Retorna o número de valores gravados.
+    """
+    import numpy as np
+
+    if df is None or df.empty:
+        return 0
+    segundos = df['DataHora'].to_numpy('datetime64[s]').astype(np.int64)
+    colunas = [coluna for coluna in df.columns if coluna not in ('DataHora', 'Dia', 'Posto Horario')]
+    dias = df['Dia'].cat
+    # (nome, tipo do array, categorias, dados); Dia e Posto Horario vão como códigos das categorias
+    registros = [
+        ('DataHora', '<i8', None, _comprimir(segundos)),
+        ('Dia', dias.codes.dtype.str, '\t'.join(dias.categories), _comprimir(dias.codes.to_numpy())),
+        ('Posto Horario', '|i1', None, _comprimir(df['Posto Horario'].cat.codes.to_numpy(np.int8))),
+    ]
+    for coluna in colunas:
+        valores = df[coluna].to_numpy()
+        registros.append((coluna, valores.dtype.str, None, _comprimir(valores)))
+    hash_fonte = hash_fonte or f"{contrato}/{serial}/{relatorio}/{segundos.min()}-{segundos.max()}/{len(segundos)}"
+
+    with closing(conectar(caminho)) as conexao, conexao:
+        if conexao.execute("SELECT 1 FROM blocos WHERE hash = ?", (hash_fonte,)).fetchone():
+            return 0
+        bloco = conexao.execute(
+            "INSERT INTO blocos (contrato, serial, relatorio, inicio, fim, linhas, hash, cabecalho, gravado_em)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (contrato, serial, relatorio, int(segundos.min()), int(segundos.max()), len(segundos), hash_fonte,
+             cabecalho, datetime.datetime.now().isoformat(timespec='seconds')),
+        ).lastrowid
+        conexao.executemany(
+            "INSERT INTO colunas VALUES (?, ?, ?, ?, ?, ?)",
+            [(bloco, posicao, *registro) for posicao, registro in enumerate(registros)],
+        )
+    return len(segundos) * len(colunas)
+
+
+def preparar_relatorio(fonte):
+    """
+    Contrato, serial, hash do conteúdo e cabeçalho do relatório lido de `fonte`
+    (texto colado ou arquivo enviado), ou None se não houver o que guardar
+    (medição do próprio acervo, ou cabeçalho sem contrato e serial numéricos).
+    """
+    from critcom.arquivos import inspecionar_arquivo, texto_inicial
+    from critcom.cabecalho import extrair_info_cliente
+    from critcom.cache import hash_texto
+
+    if not fonte or isinstance(fonte, MedicaoSalva):
+        return None
+    inicio = texto_inicial(fonte)
+    info = extrair_info_cliente(inicio)
+    if not info['contrato'].isdigit() or not info['serial'].isdigit():
+        return None
+    hash_fonte = hash_texto(fonte) if isinstance(fonte, str) else inspecionar_arquivo(fonte)[0]
+    return info['contrato'], info['serial'], hash_fonte, cabecalho_relatorio(inicio)
+
+
+def _gravar(preparado, relatorio, df, caminho):
+    contrato, serial, hash_fonte, cabecalho = preparado
+    try:
+        return guardar_intervalos(df, contrato, serial, relatorio, cabecalho, hash_fonte, caminho)
+    except (sqlite3.Error, OSError) as erro:
+        raise ErroAcervo(f"Não foi possível gravar no acervo {caminho or ARQUIVO_ACERVO}: {erro}") from erro
+
+
+def guardar_relatorio(fonte, relatorio, df, caminho=None):
+    """
+    Guarda o relatório lido de `fonte` (texto colado ou arquivo enviado), se o
+    cabeçalho tiver contrato e serial. Um conteúdo já guardado (mesmo hash) não é
+    gravado de novo. Retorna o número de valores gravados.
+    """
+    preparado = preparar_relatorio(fonte) if df is not None else None
+    return 0 if preparado is None else _gravar(preparado, relatorio, df, caminho)
+
+
+_gravador = None
+_lock_gravador = threading.Lock()
+
+
+def agendar_relatorio(fonte, relatorio, df, caminho=None):
+    """
+    Como guardar_relatorio, mas só o cabeçalho e o hash são lidos agora (o
+    arquivo enviado não é lido fora da sessão); a gravação roda numa thread,
+    uma de cada vez. Retorna o Future (com o número de valores gravados ou o
+    ErroAcervo), ou None se não houver o que guardar.
+    """
+    global _gravador
+    preparado = preparar_relatorio(fonte) if df is not None else None
+    if preparado is None:
+        return None
+    with _lock_gravador:
+        if _gravador is None:
+            _gravador = ThreadPoolExecutor(max_workers=1, thread_name_prefix='critcom-acervo')
+    return _gravador.submit(_gravar, preparado, relatorio, df, caminho)
+
+
+def carregar_intervalos(contrato, serial, relatorio, inicio=None, fim=None, caminho=None):
+    """
+    DataFrame de intervalos (mesmo formato de ler_relatorio_intervalos) de um
+    medidor guardado, só com os instantes entre `inicio` e `fim` (inclusivos).
+    Retorna None se não houver dados no período.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from critcom.completude import registrar_completude
+    from critcom.leitura import POSTOS_HORARIOS, compactar_valores
+
+    conexao = conectar(caminho, criar=False)
+    if conexao is None:
+        return None
+    limite_inicio = _segundos(inicio) if inicio is not None else None
+    limite_fim = _segundos(fim) if fim is not None else None
+    consulta = "SELECT id FROM blocos WHERE contrato = ? AND serial = ? AND relatorio = ?"
+    argumentos = [contrato, serial, relatorio]
+    if limite_inicio is not None:
+        consulta += " AND fim >= ?"
+        argumentos.append(limite_inicio)
+    if limite_fim is not None:
+        consulta += " AND inicio <= ?"
+        argumentos.append(limite_fim)
+    with closing(conexao):
+        blocos = [bloco for bloco, in conexao.execute(consulta + " ORDER BY id DESC", argumentos)]
+        if not blocos:
+            return None
+        registros = conexao.execute(
+            f"SELECT bloco, nome, tipo, categorias, dados FROM colunas WHERE bloco IN ({', '.join('?' * len(blocos))})"
+            " ORDER BY bloco DESC, posicao",
+            blocos,
+        ).fetchall()
+
+    # Do bloco mais recente ao mais antigo: os instantes já vistos num bloco mais novo são descartados
+    por_bloco = {}
+    for bloco, nome, tipo, categorias, dados in registros:
+        valores = _descomprimir(dados, tipo)
+        if categorias is not None:
+            # O código -1 (dia vazio) pega o None do fim da lista
+            valores = np.array([*(categorias.split('\t') if categorias else []), None], dtype=object)[valores]
+        por_bloco.setdefault(bloco, {})[nome] = valores
+    partes, vistos = [], np.empty(0, dtype=np.int64)
+    for bloco in blocos:
+        colunas_bloco = por_bloco[bloco]
+        segundos = colunas_bloco['DataHora']
+        manter = ~np.isin(segundos, vistos)
+        if limite_inicio is not None:
+            manter &= segundos >= limite_inicio
+        if limite_fim is not None:
+            manter &= segundos <= limite_fim
+        vistos = np.union1d(vistos, segundos)
+        if manter.any():
+            partes.append({nome: valores[manter] for nome, valores in colunas_bloco.items()})
+    if not partes:
+        return None
+
+    # Colunas na ordem em que apareceram, do bloco mais antigo ao mais novo
+    partes.reverse()
+    colunas = list(dict.fromkeys(nome for parte in partes for nome in parte if nome not in ('DataHora', 'Dia', 'Posto Horario')))
+    segundos = np.concatenate([parte['DataHora'] for parte in partes])
+    ordem = np.argsort(segundos, kind='stable')
+    df = pd.DataFrame({
+        'DataHora': segundos[ordem].astype('datetime64[s]').astype('datetime64[ns]'),
+        'Dia': pd.Categorical(np.concatenate([parte['Dia'] for parte in partes])[ordem]),
+        'Posto Horario': pd.Categorical.from_codes(
+            np.concatenate([parte['Posto Horario'] for parte in partes])[ordem], categories=POSTOS_HORARIOS),
+    })
+    for coluna in colunas:
+        valores = np.concatenate([
+            parte[coluna].astype(np.float64) if coluna in parte else np.full(len(parte['DataHora']), np.nan)
+            for parte in partes
+        ])
+        df[coluna] = compactar_valores(valores[ordem])
+    return registrar_completude(df)
+
+
+def listar_medicoes(relatorio=None, caminho=None):
+    """
+    Relatórios guardados, do mais recente para o mais antigo: dicionários com
+    contrato, serial, relatorio, inicio, fim (datetime) e atualizado_em.
+    """
+    conexao = conectar(caminho, criar=False)
+    if conexao is None:
+        return []
+    consulta = "SELECT contrato, serial, relatorio, MAX(gravado_em), MIN(inicio), MAX(fim) FROM blocos"
+    argumentos = []
+    if relatorio is not None:
+        consulta += " WHERE relatorio = ?"
+        argumentos.append(relatorio)
+    with closing(conexao):
+        registros = conexao.execute(
+            consulta + " GROUP BY contrato, serial, relatorio ORDER BY MAX(gravado_em) DESC, MAX(id) DESC", argumentos,
+        ).fetchall()
+    return [
+        {
+            'contrato': contrato, 'serial': serial, 'relatorio': tipo, 'atualizado_em': atualizado_em,
+            'inicio': _instante(minimo), 'fim': _instante(maximo),
+        }
+        for contrato, serial, tipo, atualizado_em, minimo, maximo in registros
+    ]
+
+
+def texto_cabecalho(medicao, caminho=None):
+    """Cabeçalho guardado do relatório (contrato, serial, origem dos postos), o do bloco mais recente."""
+    conexao = conectar(caminho, criar=False)
+    if conexao is None:
+        return ''
+    with closing(conexao):
+        registro = conexao.execute(
+            "SELECT cabecalho FROM blocos WHERE contrato = ? AND serial = ? AND relatorio = ? ORDER BY id DESC LIMIT 1",
+            (medicao.contrato, medicao.serial, medicao.relatorio),
+        ).fetchone()
+    return registro[0] if registro else ''
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from critcom.leitura import COLUNAS_FIXAS, POSTOS_HORARIOS, ler_relatorio_intervalos
+
+# --- AGREGAÇÃO POR POSTO HORÁRIO ---
+
+
+def operacao_da_coluna(nome_coluna, tipo_calculo='consumo'):
+    """Consumo sempre soma; na demanda só a UFER soma, as demais colunas usam o máximo."""
+    if tipo_calculo == 'demanda' and nome_coluna.strip().upper() != "UFER":
+        return 'máximo'
+    return 'soma'
+
+
+def codificar_postos(postos):
+    """Codifica os postos horários como int8 na ordem de POSTOS_HORARIOS (-1 se desconhecido)."""
+    if isinstance(postos.dtype, pd.CategoricalDtype) and tuple(postos.cat.categories) == POSTOS_HORARIOS:
+        # O parser já entrega os postos codificados
+        return postos.cat.codes.to_numpy()
+    return pd.Categorical(postos, categories=POSTOS_HORARIOS).codes
+
+
+def agregar_por_grupo(codigos, valores, eh_maximo, num_grupos):
+    """
+    Soma ou máximo de todas as colunas de `valores` por grupo, em uma única passagem.
+
+    `codigos` tem o grupo de cada linha (negativo para ignorar a linha) e `eh_maximo`
+    indica, por coluna, se a operação é máximo (True) ou soma (False). As linhas são
+    ordenadas uma vez pelo código e cada grupo vira uma fatia contígua: os máximos
+    saem do reduceat, e as somas do groupby do pandas, cuja soma compensada (Kahan)
+    dá os mesmos valores do cálculo coluna a coluna por posto. NaN é ignorado;
+    grupos vazios ou só com NaN resultam em 0.0. Retorna uma matriz num_grupos x colunas.
+    """
+    eh_maximo = np.asarray(eh_maximo, dtype=bool)
+    resultado = np.zeros((num_grupos, valores.shape[1]), dtype=np.float64)
+    if len(codigos) == 0:
+        return resultado
+
+    ordem = np.argsort(codigos, kind='stable')
+    codigos_ordenados = codigos[ordem]
+    inicios = np.searchsorted(codigos_ordenados, np.arange(num_grupos), side='left')
+    fins = np.searchsorted(codigos_ordenados, np.arange(num_grupos), side='right')
+    presentes = fins > inicios
+    if not presentes.any():
+        return resultado
+    inicios_presentes = inicios[presentes]
+    # A última fatia do reduceat vai até o fim do array; descarta códigos além do último grupo
+    ordenados = valores[ordem[:fins[presentes][-1]]]
+
+    if (~eh_maximo).any():
+        # add.reduceat soma da esquerda para a direita e perde dígitos nas somas longas
+        primeiro = inicios_presentes[0]
+        somas = pd.DataFrame(ordenados[primeiro:, ~eh_maximo].astype(np.float64)).groupby(codigos_ordenados[primeiro:len(ordenados)]).sum()
+        resultado[np.ix_(presentes, ~eh_maximo)] = somas.to_numpy()
+    if eh_maximo.any():
+        maximos = np.fmax.reduceat(ordenados[:, eh_maximo].astype(np.float64), inicios_presentes, axis=0)
+        resultado[np.ix_(presentes, eh_maximo)] = np.nan_to_num(maximos, nan=0.0)
+    return resultado
+
+
+def agregar_por_posto(df, tipo_calculo='consumo'):
+    """
+    Agrega todas as colunas de dados por posto horário.
+    Retorna um DataFrame compacto postos x grandezas (linhas em POSTOS_HORARIOS).
+    """
+    colunas_dados = [col for col in df.columns if col not in COLUNAS_FIXAS]
+    eh_maximo = [operacao_da_coluna(col, tipo_calculo) == 'máximo' for col in colunas_dados]
+    matriz = agregar_por_grupo(
+        codificar_postos(df['Posto Horario']),
+        df[colunas_dados].to_numpy(),
+        eh_maximo,
+        len(POSTOS_HORARIOS),
+    )
+    return pd.DataFrame(matriz, index=list(POSTOS_HORARIOS), columns=colunas_dados)
+
+
+def resultados_por_grandeza(agregado, tipo_calculo='consumo'):
+    """Converte a matriz postos x grandezas para o dicionário usado na montagem das tabelas."""
+    resultados = {}
+    for posicao, nome_coluna in enumerate(agregado.columns):
+        valores = agregado.iloc[:, posicao].tolist()
+        resultados[nome_coluna] = {
+            'operacao': operacao_da_coluna(nome_coluna, tipo_calculo),
+            'valores': dict(zip(agregado.index, valores)),
+        }
+    return resultados
+
+
+def recalcular_resultados(df, tipo_calculo='consumo'):
+    """
+    Calcula os resultados agregados (soma ou máximo) a partir de um DataFrame.
+    """
+    if df is None:
+        return None
+    return resultados_por_grandeza(agregar_por_posto(df, tipo_calculo), tipo_calculo)
+
+
+def processar_relatorio(texto_bruto, tipo_calculo='consumo'):
+    """Lê um relatório de consumo ou demanda e retorna (resultados agregados, DataFrame bruto)."""
+    df = ler_relatorio_intervalos(texto_bruto)
+    return recalcular_resultados(df, tipo_calculo), df
@@ -0,0 +1,154 @@
+import codecs
+import re
+
+from critcom.acervo import MedicaoSalva, carregar_intervalos, texto_cabecalho
+from critcom.cache import CACHE_LEITURA, novo_hash
+
+# --- RELATÓRIOS ENVIADOS COMO ARQUIVO ---
+# Os arquivos exportados (.txt/.csv) são lidos em blocos: uma passagem calcula o
+# hash dos bytes (chave do cache) e confirma a codificação; a leitura decodifica
+# bloco a bloco e entrega as linhas direto ao parser, sem montar o texto inteiro.
+# Toda função aceita também o texto colado (str) e a medição guardada no acervo
+# (MedicaoSalva), para que as páginas tratem as entradas do mesmo jeito.
+
+TAMANHO_BLOCO = 1024 * 1024
+# Trecho inicial decodificado para ler contrato, serial e avisos do cabeçalho
+TAMANHO_INICIO = 64 * 1024
+
+CODIFICACOES_BOM = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# Exportações do Windows sem BOM que não são UTF-8 válido
+CODIFICACAO_ALTERNATIVA = 'cp1252'
+
+# CSV exportado com ';' (o separador decimal é a vírgula)
+_CABECALHO_CSV = re.compile(r"^Data;Dia;Postos horários;", re.MULTILINE)
+
+
+def _blocos(arquivo):
+    arquivo.seek(0)
+    while True:
+        bloco = arquivo.read(TAMANHO_BLOCO)
+        if not bloco:
+            break
+        yield bloco
+    arquivo.seek(0)
+
+
+def inspecionar_arquivo(arquivo):
+    """
+    Hash dos bytes e codificação do arquivo, numa única passagem em blocos.
+    Com BOM, vale a codificação indicada; sem BOM, UTF-8 se todo o conteúdo for
+    válido, senão cp1252.
+    """
+    arquivo.seek(0)
+    inicio = arquivo.read(4)
+    codificacao = next((nome for bom, nome in CODIFICACOES_BOM if inicio.startswith(bom)), None)
+
+    hash_arquivo = novo_hash()
+    validador = codecs.getincrementaldecoder('utf-8')() if codificacao is None else None
+    for bloco in _blocos(arquivo):
+        hash_arquivo.update(bloco)
+        if validador is not None:
+            try:
+                validador.decode(bloco)
+            except UnicodeDecodeError:
+                validador = None
+                codificacao = CODIFICACAO_ALTERNATIVA
+    if validador is not None:
+        try:
+            validador.decode(b'', final=True)
+            codificacao = 'utf-8'
+        except UnicodeDecodeError:
+            codificacao = CODIFICACAO_ALTERNATIVA
+    return hash_arquivo.hexdigest(), codificacao or 'utf-8'
+
+
+def _pedacos_decodificados(arquivo, codificacao):
+    decodificador = codecs.getincrementaldecoder(codificacao)(errors='replace')
+    for bloco in _blocos(arquivo):
+        yield decodificador.decode(bloco)
+    yield decodificador.decode(b'', final=True)
+
+
+def linhas_arquivo(arquivo, codificacao=None):
+    """
+    Gera as linhas do arquivo decodificadas bloco a bloco, com as mesmas quebras
+    de str.splitlines(). Só a última linha incompleta de cada bloco fica pendente.
+    """
+    if codificacao is None:
+        codificacao = inspecionar_arquivo(arquivo)[1]
+    pendente = ''
+    for pedaco in _pedacos_decodificados(arquivo, codificacao):
+        texto = pendente + pedaco
+        corte = texto.rfind('\n') + 1
+        yield from texto[:corte].splitlines()
+        pendente = texto[corte:]
+    yield from pendente.splitlines()
+
+
+def _inicio_decodificado(arquivo, codificacao, tamanho=TAMANHO_INICIO):
+    arquivo.seek(0)
+    inicio = arquivo.read(tamanho)
+    arquivo.seek(0)
+    return codecs.getincrementaldecoder(codificacao)(errors='replace').decode(inicio)
+
+
+def texto_inicial(fonte, tamanho=TAMANHO_INICIO):
+    """
+    Começo do relatório, suficiente para o cabeçalho (contrato, serial, origem dos
+    postos). O texto colado é devolvido inteiro.
+    """
+    if not fonte or isinstance(fonte, str):
+        return fonte
+    if isinstance(fonte, MedicaoSalva):
+        return texto_cabecalho(fonte)
+    return _inicio_decodificado(fonte, inspecionar_arquivo(fonte)[1], tamanho)
+
+
+def texto_completo(fonte):
+    """Texto inteiro do relatório (para os relatórios curtos, como o de faturamento)."""
+    if not fonte or isinstance(fonte, str):
+        return fonte
+    return ''.join(_pedacos_decodificados(fonte, inspecionar_arquivo(fonte)[1]))
+
+
+def chave_arquivo(hash_arquivo):
+    """Chave do cache de leitura para o arquivo com esse hash."""
+    from critcom.leitura import VERSAO_PARSER
+
+    return ('critcom.arquivos.ler_intervalos', VERSAO_PARSER, hash_arquivo)
+
+
+def ler_arquivo_intervalos(arquivo, codificacao=None):
+    """DataFrame de intervalos do arquivo, lido sem passar pelo cache."""
+    # O parser (pandas) só é importado quando há relatório para ler
+    from critcom.leitura import ler_linhas_intervalos
+
+    if codificacao is None:
+        codificacao = inspecionar_arquivo(arquivo)[1]
+    linhas = linhas_arquivo(arquivo, codificacao)
+    if _CABECALHO_CSV.search(_inicio_decodificado(arquivo, codificacao)):
+        linhas = (linha.replace(';', '\t') for linha in linhas)
+    return ler_linhas_intervalos(linhas)
+
+
+def ler_intervalos(fonte):
+    """
+    DataFrame de intervalos a partir do texto colado, do arquivo enviado ou do
+    acervo. Arquivos ficam no mesmo cache de leitura, pela chave do hash dos bytes.
+    """
+    from critcom.leitura import ler_relatorio_intervalos
+
+    if not fonte:
+        return None
+    if isinstance(fonte, str):
+        return ler_relatorio_intervalos(fonte)
+    if isinstance(fonte, MedicaoSalva):
+        # O filtro de período é aplicado na consulta ao acervo
+        return carregar_intervalos(*fonte)
+
+    hash_arquivo, codificacao = inspecionar_arquivo(fonte)
+    return CACHE_LEITURA.obter_ou_calcular(chave_arquivo(hash_arquivo), lambda: ler_arquivo_intervalos(fonte, codificacao))
@@ -0,0 +1,97 @@
+import re
+
+from critcom.cache import memoizar_por_texto
+
+# --- CABEÇALHO DOS RELATÓRIOS ---
+# Módulo leve (só expressões regulares): as páginas podem mostrar contrato e
+# serial sem carregar o parser, o pandas e o NumPy.
+#
+# Os metadados ficam todos antes dos dados: a leitura para na primeira linha de
+# intervalo ("dd/mm/aaaa ...") ou no primeiro bloco de posto do faturamento, e
+# uma única expressão regular percorre só essa região. O cache usa o hash da
+# região, então o custo não cresce com o número de intervalos colados.
+
+VERSAO_CABECALHO = 3
+NAO_ENCONTRADO = "Não encontrado"
+# Sem linha de dados nem posto, o cabeçalho não passa deste tamanho (caracteres)
+LIMITE_CABECALHO = 64 * 1024
+
+_FIM_CABECALHO = re.compile(r"^(?:\d{2}/\d{2}/\d{4}|(?:Fora Ponta|Ponta|Reservado)[^\S\n]*$)", re.MULTILINE)
+_PADRAO_METADADOS = re.compile(
+    r"Cliente \(contrato\)\s+(?P<contrato_cliente>\d+)"
+    r"|Contrato\s+(?P<contrato>\d+)"
+    r"|Medidor \(serial\)\s+(?P<serial_medidor>\d+)"
+    r"|Serial do medidor\s+(?P<serial_do_medidor>\d+)"
+    r"|Medidor\s+(?P<medidor>\d+)"
+    r"|Postos horários(?P<segmentos> e segmentos reativos)?\s+(?P<cadastro>Cadastro de opção tarifária)"
+    r"|^Data[^\S\n]+Dia[^\S\n]+Postos horários[^\S\n]+(?P<colunas>.*)$",
+    re.MULTILINE,
+)
+# Cada relatório mantém as regras de antes: no de intervalos, o contrato vem só
+# de "Cliente (contrato)" e o serial de "Medidor (serial)" ou, na falta dele, de
+# "Medidor"; no de faturamento, vale o rótulo que aparecer primeiro no texto.
+_CONTRATO_INTERVALOS = ('contrato_cliente',)
+_SERIAL_INTERVALOS = ('serial_medidor', 'medidor')
+_CONTRATO_FATURAMENTO = ('contrato_cliente', 'contrato')
+_SERIAL_FATURAMENTO = ('serial_medidor', 'medidor', 'serial_do_medidor')
+
+
+def regiao_cabecalho(texto_bruto):
+    """Trecho do texto antes da primeira linha de dados (ou do primeiro posto do faturamento)."""
+    fim = _FIM_CABECALHO.search(texto_bruto, 0, LIMITE_CABECALHO)
+    return texto_bruto[:fim.start()] if fim else texto_bruto[:LIMITE_CABECALHO]
+
+
+def _por_prioridade(encontrados, grupos):
+    """Valor do primeiro grupo da lista que foi encontrado."""
+    return next((encontrados[g][1] for g in grupos if g in encontrados), NAO_ENCONTRADO)
+
+
+def _mais_a_esquerda(encontrados, grupos):
+    """Valor, entre os grupos da lista, do que aparece primeiro no texto."""
+    achados = [encontrados[g] for g in grupos if g in encontrados]
+    return min(achados)[1] if achados else NAO_ENCONTRADO
+
+
+@memoizar_por_texto(versao=VERSAO_CABECALHO)
+def _metadados(regiao):
+    # Primeira ocorrência de cada grupo: (posição, valor)
+    encontrados = {}
+    for achado in _PADRAO_METADADOS.finditer(regiao):
+        grupo = achado.lastgroup
+        if grupo == 'cadastro':
+            grupo = 'cadastro_faturamento' if achado.group('segmentos') else 'cadastro_intervalos'
+        encontrados.setdefault(grupo, (achado.start(), achado.group(achado.lastgroup)))
+    colunas = encontrados.get('colunas', (None, None))[1]
+    colunas = [col.strip() for col in colunas.strip().split('\t')] if colunas is not None else None
+    return {
+        'intervalos': {
+            'contrato': _por_prioridade(encontrados, _CONTRATO_INTERVALOS),
+            'serial': _por_prioridade(encontrados, _SERIAL_INTERVALOS),
+            'postos_cadastro': 'cadastro_intervalos' in encontrados,
+            'colunas': colunas,
+        },
+        'faturamento': {
+            'contrato': _mais_a_esquerda(encontrados, _CONTRATO_FATURAMENTO),
+            'serial': _mais_a_esquerda(encontrados, _SERIAL_FATURAMENTO),
+            'postos_cadastro': 'cadastro_faturamento' in encontrados,
+            'colunas': colunas,
+        },
+    }
+
+
+def ler_cabecalho(texto_bruto, faturamento=False):
+    """
+    Metadados do relatório numa única passagem pelo cabeçalho: contrato,
+    serial, `postos_cadastro` (postos horários vindos do "Cadastro de opção
+    tarifária") e `colunas` do cabeçalho dos intervalos (None se não houver).
+    Com `faturamento`, contrato, serial e postos seguem as regras do relatório
+    de faturamento. O dicionário retornado é compartilhado pelo cache.
+    """
+    return _metadados(regiao_cabecalho(texto_bruto or ''))['faturamento' if faturamento else 'intervalos']
+
+
+# --- FUNÇÃO PARA EXTRAIR INFORMAÇÕES DO CLIENTE ---
+def extrair_info_cliente(texto_bruto):
+    info = ler_cabecalho(texto_bruto)
+    return {"contrato": info['contrato'], "serial": info['serial']}
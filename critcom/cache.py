@@ -0,0 +1,145 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+# --- CACHE DE LEITURA COMPARTILHADO ---
+# O módulo é importado uma única vez pelo servidor do Streamlit, então o cache
+# sobrevive às reexecuções das páginas e é compartilhado entre as sessões.
+
+LIMITE_PADRAO_MB = 256
+
+
+def tamanho_em_bytes(valor):
+    """Estimativa da memória ocupada por um resultado guardado no cache."""
+    if valor is None:
+        return 0
+    if hasattr(valor, 'memory_usage'):
+        # DataFrame ou Series do pandas (sem importar o pandas aqui)
+        uso = valor.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if hasattr(valor, 'nbytes'):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(item) for item in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_em_bytes(k) + tamanho_em_bytes(v) for k, v in valor.items())
+    return sys.getsizeof(valor)
+
+
+def novo_hash():
+    """Hash usado nas chaves do cache (o dos arquivos é atualizado bloco a bloco)."""
+    return hashlib.blake2b(digest_size=20)
+
+
+def hash_texto(texto):
+    """Hash do conteúdo colado, usado como chave do cache."""
+    hash_conteudo = novo_hash()
+    hash_conteudo.update(texto.encode('utf-8', 'surrogatepass'))
+    return hash_conteudo.hexdigest()
+
+
+class CacheLRU:
+    """
+    Cache com limite de memória em bytes e descarte do item menos usado (LRU).
+    Os valores guardados são compartilhados entre sessões e devem ser tratados
+    como somente leitura.
+    """
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave, padrao=None):
+        """Valor guardado na chave, ou `padrao` se não estiver no cache (sem calcular)."""
+        with self._lock:
+            if chave not in self._itens:
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return self._itens[chave][0]
+
+    def obter_ou_calcular(self, chave, calcular):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][0]
+            self.falhas += 1
+
+        valor = calcular()
+        self.guardar(chave, valor)
+        return valor
+
+    def guardar(self, chave, valor):
+        tamanho = tamanho_em_bytes(valor)
+        if tamanho > self.limite_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._bytes += tamanho
+            while self._bytes > self.limite_bytes:
+                _, (_, tamanho_descartado) = self._itens.popitem(last=False)
+                self._bytes -= tamanho_descartado
+                self.descartes += 1
+
+    def ids_valores(self):
+        """ids dos valores guardados, para saber quais objetos de uma sessão são do cache."""
+        with self._lock:
+            return {id(valor) for valor, _ in self._itens.values()}
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+            }
+
+
+CACHE_LEITURA = CacheLRU(int(os.environ.get('CRITCOM_CACHE_MB', LIMITE_PADRAO_MB)) * 1024 * 1024)
+
+
+def memoizar_por_texto(namespace=None, versao=1):
+    """
+    Decorador para funções cujo primeiro argumento é o texto colado pelo usuário.
+
+    A chave combina o namespace (por padrão, módulo e nome da função), a versão
+    do parser e o hash do texto. Funções definidas dentro das páginas devem
+    informar um namespace próprio, pois todas as páginas rodam como __main__.
+    A função decorada ganha o atributo `chave(texto_bruto, *args)`, para quem
+    calcula o mesmo resultado fora dela (em outro processo, por exemplo).
+    """
+    def decorador(funcao):
+        nome = namespace or f"{funcao.__module__}.{funcao.__qualname__}"
+
+        def chave(texto_bruto, *args):
+            return (nome, versao, hash_texto(texto_bruto), args)
+
+        @wraps(funcao)
+        def envoltorio(texto_bruto, *args):
+            if not texto_bruto:
+                return funcao(texto_bruto, *args)
+            return CACHE_LEITURA.obter_ou_calcular(chave(texto_bruto, *args), lambda: funcao(texto_bruto, *args))
+
+        envoltorio.chave = chave
+        return envoltorio
+
+    return decorador
@@ -0,0 +1,221 @@
+import datetime
+import json
+import os
+from collections import namedtuple
+
+# --- CALENDÁRIO TARIFÁRIO (POSTOS HORÁRIOS) ---
+# Quando os postos do relatório vêm do "Cadastro de opção tarifária", podem não
+# corresponder aos horários da distribuidora. O classificador refaz a coluna
+# Posto Horario a partir de DataHora com um calendário configurável: janelas
+# de ponta (dias úteis) e reservado (todos os dias), fins de semana e feriados.
+#
+# Os calendários ficam num arquivo JSON (critcom/calendarios.json, ou o
+# caminho em CRITCOM_CALENDARIOS). Os horários de cada distribuidora não vêm
+# com o aplicativo: o arquivo traz só um modelo, a ser ajustado.
+#
+# A classificação é uma consulta a uma tabela pré-calculada: posto por minuto
+# da semana, em dia normal ou feriado (2 x 10080 posições), indexada pelo
+# minuto da semana e pelo mapa de feriados dos dias da série. Os intervalos
+# são marcados pelo fim, então o posto é o do minuto anterior ao instante.
+#
+# O módulo não importa pandas nem NumPy no topo: as páginas listam os
+# calendários na primeira exibição.
+
+ARQUIVO_CALENDARIOS = os.environ.get(
+    'CRITCOM_CALENDARIOS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calendarios.json'),
+)
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+# Segunda a sexta (0 = segunda)
+DIAS_UTEIS = (0, 1, 2, 3, 4)
+
+# Janelas em minutos do dia (início, fim), fim exclusivo; fim <= início cruza a meia-noite.
+# `feriados` são datas fixas (mês, dia, desde o ano, até o ano ou None) e `pascoa` os
+# deslocamentos em dias a partir do domingo de Páscoa.
+Calendario = namedtuple('Calendario', 'nome ponta reservado feriados pascoa')
+
+
+class ErroCalendario(Exception):
+    """Arquivo de calendários ausente ou com formato inválido."""
+
+
+def _minuto_do_dia(texto, nome):
+    try:
+        horas, minutos = (int(parte) for parte in str(texto).split(':'))
+    except ValueError:
+        raise ErroCalendario(f"Calendário {nome!r}: horário inválido {texto!r} (use HH:MM).") from None
+    if not (0 <= horas <= 24 and 0 <= minutos < 60 and horas * 60 + minutos <= MINUTOS_DIA):
+        raise ErroCalendario(f"Calendário {nome!r}: horário inválido {texto!r} (use HH:MM).")
+    return horas * 60 + minutos
+
+
+def _janela(valor, nome):
+    if valor is None:
+        return None
+    if not isinstance(valor, (list, tuple)) or len(valor) != 2:
+        raise ErroCalendario(f"Calendário {nome!r}: janela {valor!r} deve ser [\"HH:MM\", \"HH:MM\"].")
+    return tuple(_minuto_do_dia(horario, nome) for horario in valor)
+
+
+def _feriado_fixo(valor, nome):
+    """'MM-DD', 'AAAA-MM-DD' ou {"dia": "MM-DD", "desde": AAAA} -> (mês, dia, desde o ano, até o ano)."""
+    desde = 0
+    if isinstance(valor, dict):
+        desde = int(valor.get('desde', 0))
+        valor = valor.get('dia', '')
+    partes = str(valor).split('-')
+    try:
+        if len(partes) == 3:
+            data = datetime.date(*(int(parte) for parte in partes))
+            return data.month, data.day, data.year, data.year
+        mes, dia = (int(parte) for parte in partes)
+        datetime.date(2000, mes, dia)
+    except (TypeError, ValueError):
+        raise ErroCalendario(f"Calendário {nome!r}: feriado inválido {valor!r} (use MM-DD ou AAAA-MM-DD).") from None
+    return mes, dia, desde, None
+
+
+def carregar_calendarios(caminho=None):
+    """
+    Calendários do arquivo JSON, por nome e na ordem do arquivo. Os feriados
+    nacionais e os da Páscoa valem para todos; cada calendário pode acrescentar
+    os regionais em "feriados".
+    """
+    caminho = caminho or ARQUIVO_CALENDARIOS
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError) as erro:
+        raise ErroCalendario(f"Não foi possível ler os calendários em {caminho}: {erro}") from erro
+
+    nacionais = [_feriado_fixo(valor, 'nacional') for valor in dados.get('feriados_nacionais', [])]
+    pascoa = tuple(int(deslocamento) for deslocamento in dados.get('feriados_pascoa', {}).values())
+    calendarios = {}
+    for nome, config in dados.get('calendarios', {}).items():
+        ponta = _janela(config.get('ponta'), nome)
+        if ponta is None:
+            raise ErroCalendario(f"Calendário {nome!r}: falta a janela de ponta.")
+        regionais = [_feriado_fixo(valor, nome) for valor in config.get('feriados', [])]
+        calendarios[nome] = Calendario(nome, ponta, _janela(config.get('reservado'), nome), tuple(nacionais + regionais), pascoa)
+    return calendarios
+
+
+def _horario(minuto):
+    return f"{minuto // 60:02d}:{minuto % 60:02d}"
+
+
+def descrever_calendario(calendario):
+    """Janelas e feriados do calendário em uma linha, para exibição."""
+    partes = [f"Ponta das {_horario(calendario.ponta[0])} às {_horario(calendario.ponta[1])} em dias úteis"]
+    if calendario.reservado is not None:
+        partes.append(f"reservado das {_horario(calendario.reservado[0])} às {_horario(calendario.reservado[1])} todos os dias")
+    partes.append(f"{len(calendario.feriados)} feriados de data fixa e {len(calendario.pascoa)} móveis, sem ponta")
+    return "; ".join(partes) + "."
+
+
+def pascoa(ano):
+    """Domingo de Páscoa (calendário gregoriano, algoritmo de Meeus/Jones/Butcher)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return datetime.date(ano, mes, dia)
+
+
+def feriados(calendario, ano_inicial, ano_final):
+    """Datas dos feriados do calendário entre os anos dados (inclusive), ordenadas."""
+    datas = set()
+    for ano in range(ano_inicial, ano_final + 1):
+        for mes, dia, desde, ate in calendario.feriados:
+            if ano >= desde and (ate is None or ano <= ate):
+                datas.add(datetime.date(ano, mes, dia))
+        domingo = pascoa(ano)
+        datas.update(domingo + datetime.timedelta(days=deslocamento) for deslocamento in calendario.pascoa)
+    return sorted(datas)
+
+
+def _marcar(linha, janela, dias):
+    """Marca na linha (minutos da semana) a janela em cada um dos dias; a janela pode cruzar a meia-noite."""
+    import numpy as np
+
+    inicio, fim = janela
+    duracao = (fim - inicio) % MINUTOS_DIA or MINUTOS_DIA
+    for dia in dias:
+        # O que passa da meia-noite cai no dia seguinte (de domingo, na segunda)
+        linha[(dia * MINUTOS_DIA + inicio + np.arange(duracao)) % MINUTOS_SEMANA] = True
+
+
+class ClassificadorPostos:
+    """
+    Tabela de postos de um calendário: código (ordem de POSTOS_HORARIOS) por
+    minuto da semana, em dia normal (linha 0) ou feriado (linha 1). Feriados e
+    fins de semana não têm ponta; o reservado vale todos os dias, e a ponta
+    prevalece se as janelas se sobrepuserem.
+    """
+
+    def __init__(self, calendario):
+        import numpy as np
+
+        from critcom.leitura import POSTOS_HORARIOS
+
+        self.calendario = calendario
+        codigo = {posto: numero for numero, posto in enumerate(POSTOS_HORARIOS)}
+        reservado = np.zeros(MINUTOS_SEMANA, dtype=bool)
+        if calendario.reservado is not None:
+            _marcar(reservado, calendario.reservado, range(7))
+        ponta = np.zeros(MINUTOS_SEMANA, dtype=bool)
+        _marcar(ponta, calendario.ponta, DIAS_UTEIS)
+
+        self.tabela = np.full((2, MINUTOS_SEMANA), codigo['Fora Ponta'], dtype=np.int8)
+        self.tabela[:, reservado] = codigo['Reservado']
+        self.tabela[0, ponta] = codigo['Ponta']
+
+    def classificar(self, data_hora):
+        """Códigos dos postos (int8) dos instantes de fim de intervalo em `data_hora` (Series ou array datetime64)."""
+        import numpy as np
+
+        minutos = np.asarray(data_hora, dtype='datetime64[m]').astype(np.int64) - 1
+        if len(minutos) == 0:
+            return np.zeros(0, dtype=np.int8)
+        dias = minutos // MINUTOS_DIA
+        primeiro_dia = int(dias.min())
+        # 1970-01-01 foi uma quinta-feira (3, com a segunda como 0)
+        minuto_semana = (dias + 3) % 7 * MINUTOS_DIA + minutos % MINUTOS_DIA
+
+        ano_inicial = datetime.date.fromordinal(datetime.date(1970, 1, 1).toordinal() + primeiro_dia).year
+        ano_final = datetime.date.fromordinal(datetime.date(1970, 1, 1).toordinal() + int(dias.max())).year
+        datas = np.array(feriados(self.calendario, ano_inicial, ano_final), dtype='datetime64[D]').astype(np.int64)
+        mapa_feriados = np.zeros(int(dias.max()) - primeiro_dia + 1, dtype=np.intp)
+        datas = datas[(datas >= primeiro_dia) & (datas < primeiro_dia + len(mapa_feriados))]
+        mapa_feriados[datas - primeiro_dia] = 1
+        return self.tabela[mapa_feriados[dias - primeiro_dia], minuto_semana]
+
+    def reclassificar(self, df):
+        """
+        Cópia rasa do DataFrame de intervalos com a coluna Posto Horario refeita
+        pelo calendário, e o número de intervalos que mudaram de posto.
+        """
+        import pandas as pd
+
+        from critcom.agregacao import codificar_postos
+        from critcom.leitura import POSTOS_HORARIOS
+
+        codigos = self.classificar(df['DataHora'])
+        alterados = int((codigos != codificar_postos(df['Posto Horario'])).sum())
+        postos = pd.Categorical.from_codes(codigos, categories=POSTOS_HORARIOS)
+        return df.assign(**{'Posto Horario': postos}), alterados
+
+
+def classificador_postos(nome, caminho=None):
+    """Classificador do calendário `nome` do arquivo de calendários."""
+    calendarios = carregar_calendarios(caminho)
+    if nome not in calendarios:
+        raise ErroCalendario(f"Calendário {nome!r} não encontrado em {caminho or ARQUIVO_CALENDARIOS}.")
+    return ClassificadorPostos(calendarios[nome])
@@ -0,0 +1,66 @@
+import argparse
+import os
+import sys
+import time
+
+from critcom.confirmacao import TIPOS_MEDICAO
+
+# --- LINHA DE COMANDO: python -m critcom ---
+
+DESCRICAO = """
+Confirmação em lote, sem a interface. A entrada é uma pasta com os relatórios
+exportados (.txt de consumo, demanda ou faturamento, agrupados por contrato e
+serial lidos do cabeçalho) ou um manifesto CSV com as colunas contrato,
+consumo, demanda, faturamento e, opcionalmente, serial, constante, tipo e perdas
+(uma linha por medidor, medidor anterior primeiro).
+"""
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='python -m critcom', description=DESCRICAO)
+    parser.add_argument('entrada', help="pasta com os relatórios ou manifesto .csv")
+    parser.add_argument('-o', '--saida', default='resultados.csv', help="arquivo de saída .csv ou .xlsx (padrão: %(default)s)")
+    parser.add_argument('-p', '--processos', type=int, default=None, help="processos em paralelo (padrão: número de CPUs)")
+    parser.add_argument('--constante', type=float, default=1.0, help="constante padrão dos medidores (padrão: %(default)s)")
+    parser.add_argument('--tipo', choices=TIPOS_MEDICAO, default="Grandeza", help="tipo de medição padrão (padrão: %(default)s)")
+    parser.add_argument('--perdas', choices=("Não", "Sim"), default="Não", help="adicionar perdas de 2,5%% (padrão: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    # Importado só aqui: pandas e NumPy não pesam no --help
+    from critcom.lote import ErroLote, descobrir_diretorio, executar_lote, gravar_tabela, ler_manifesto, tabela_consolidada
+
+    padroes = dict(constante=args.constante, tipo_opcao=args.tipo, perdas_opcao=args.perdas)
+
+    try:
+        if os.path.isdir(args.entrada):
+            trabalhos, avisos = descobrir_diretorio(args.entrada, **padroes)
+        else:
+            trabalhos, avisos = ler_manifesto(args.entrada, **padroes)
+    except (ErroLote, OSError) as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 2
+    for aviso in avisos:
+        print(f"Aviso: {aviso}", file=sys.stderr)
+    if not trabalhos:
+        print("Nenhum contrato encontrado na entrada.", file=sys.stderr)
+        return 2
+
+    inicio = time.perf_counter()
+    concluidos, falhas = [], []
+
+    def ao_concluir(trabalho, erro):
+        concluidos.append(trabalho['contrato'])
+        if erro:
+            falhas.append(trabalho['contrato'])
+        situacao = f"erro: {erro}" if erro else "ok"
+        print(f"[{len(concluidos)}/{len(trabalhos)}] contrato {trabalho['contrato']}: {situacao}", file=sys.stderr)
+
+    linhas = executar_lote(trabalhos, processos=args.processos, ao_concluir=ao_concluir)
+    gravar_tabela(tabela_consolidada(linhas), args.saida)
+
+    decorrido = time.perf_counter() - inicio
+    print(f"{len(trabalhos)} contratos em {decorrido:.1f} s ({len(falhas)} com erro). Resultados em {args.saida}", file=sys.stderr)
+    return 1 if falhas else 0
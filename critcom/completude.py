@@ -0,0 +1,205 @@
+import threading
+import weakref
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# --- COMPLETUDE DOS INTERVALOS ---
+# Intervalos faltando, instantes repetidos (troca de medidor, relatórios
+# sobrepostos) ou fora do passo (horário de verão, relógio ajustado) mudam as
+# somas da confirmação sem aviso. O índice abaixo é montado com diferenças
+# NumPy sobre os instantes em minutos, sem laço pelas linhas: fica pronto junto
+# com o DataFrame do parser e é consultado pelo diálogo de resultados.
+#
+# A grade esperada vai do primeiro ao último instante do relatório, no passo
+# mais frequente entre instantes consecutivos. Os intervalos são marcados pelo
+# fim: o de 00:00 pertence ao dia anterior. O posto de um intervalo faltando é
+# estimado pelo mesmo horário da semana nos intervalos presentes.
+
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+POSTO_NAO_IDENTIFICADO = 'Não identificado'
+COLUNAS_CONTAGEM = ['Esperados', 'Presentes', 'Faltando', 'Duplicados']
+
+# Resumo da série de um relatório, só com arrays NumPy (as tabelas do diálogo
+# saem de tabelas_completude). `passo` em minutos; `inicio`, `fim` e os
+# instantes em datetime64[m]. `lacunas` tem uma linha (primeiro, último
+# intervalo faltando) por lacuna; `repeticoes` é (instantes, vezes). `por_dia`
+# (a partir de `primeiro_dia`) e `por_posto` (POSTOS_HORARIOS e, por último, o
+# posto não identificado) têm as colunas COLUNAS_CONTAGEM.
+Completude = namedtuple(
+    'Completude',
+    'passo inicio fim esperados presentes duplicados fora_do_passo lacunas repeticoes primeiro_dia por_dia por_posto',
+)
+
+# Índices dos DataFrames do parser, pelo id(); a entrada sai quando o DataFrame é coletado
+_indices = {}
+_lock_indices = threading.Lock()
+_AUSENTE = object()
+
+
+def _contar(grupos, num_grupos):
+    return np.bincount(grupos, minlength=num_grupos)[:num_grupos]
+
+
+def _contagens(esperados, presentes, duplicados):
+    return np.column_stack((esperados, presentes, esperados - presentes, duplicados))
+
+
+def calcular_completude(df):
+    """
+    Monta o índice de completude de um DataFrame de intervalos (formato de
+    ler_relatorio_intervalos). Retorna None se não houver dados.
+    """
+    from critcom.agregacao import codificar_postos
+    from critcom.leitura import POSTOS_HORARIOS
+
+    if df is None or df.empty:
+        return None
+    minutos = df['DataHora'].to_numpy('datetime64[m]').astype(np.int64)
+    ordem = np.argsort(minutos, kind='stable')
+    minutos = minutos[ordem]
+    postos = codificar_postos(df['Posto Horario'])[ordem]
+
+    # Repetições: cada instante conta uma vez; as cópias seguintes são duplicadas
+    novo = np.empty(len(minutos), dtype=bool)
+    novo[0] = True
+    np.not_equal(minutos[1:], minutos[:-1], out=novo[1:])
+    unicos, postos_unicos = minutos[novo], postos[novo]
+    copias = minutos[~novo]
+
+    diferencas = np.diff(unicos)
+    if len(diferencas):
+        passos, frequencias = np.unique(diferencas, return_counts=True)
+        passo = int(passos[np.argmax(frequencias)])
+    else:
+        passo = 15
+    inicio, fim = int(unicos[0]), int(unicos[-1])
+    no_passo = (unicos - inicio) % passo == 0
+    presentes, postos_presentes = unicos[no_passo], postos_unicos[no_passo]
+
+    grade = np.arange(inicio, fim + 1, passo, dtype=np.int64)
+    faltando = grade[~np.isin(grade, presentes, assume_unique=True)]
+    saltos = np.diff(presentes)
+    buracos = np.flatnonzero(saltos > passo)
+    lacunas = np.column_stack((presentes[buracos] + passo, presentes[buracos + 1] - passo))
+    repetidos, vezes = np.unique(copias, return_counts=True)
+
+    # Por dia: o intervalo que termina às 00:00 é do dia anterior
+    primeiro_dia = (inicio - 1) // MINUTOS_DIA
+    num_dias = (fim - 1) // MINUTOS_DIA - primeiro_dia + 1
+    por_dia = _contagens(
+        _contar((grade - 1) // MINUTOS_DIA - primeiro_dia, num_dias),
+        _contar((presentes - 1) // MINUTOS_DIA - primeiro_dia, num_dias),
+        _contar((copias - 1) // MINUTOS_DIA - primeiro_dia, num_dias),
+    )
+
+    # Por posto: o dos faltantes vem do mesmo minuto da semana entre os presentes.
+    # O código -1 (posto não identificado) vai para a última linha.
+    posto_semana = np.full(MINUTOS_SEMANA, -1, dtype=np.int8)
+    posto_semana[presentes % MINUTOS_SEMANA] = postos_presentes
+    num_postos = len(POSTOS_HORARIOS) + 1
+    presentes_posto = _contar(postos_presentes % num_postos, num_postos)
+    por_posto = _contagens(
+        presentes_posto + _contar(posto_semana[faltando % MINUTOS_SEMANA] % num_postos, num_postos),
+        presentes_posto,
+        _contar(postos[~novo] % num_postos, num_postos),
+    )
+
+    return Completude(
+        passo=passo,
+        inicio=np.datetime64(inicio, 'm'),
+        fim=np.datetime64(fim, 'm'),
+        esperados=len(grade),
+        presentes=len(presentes),
+        duplicados=len(copias),
+        fora_do_passo=int((~no_passo).sum()),
+        lacunas=lacunas.astype('datetime64[m]'),
+        repeticoes=(repetidos.astype('datetime64[m]'), vezes + 1),
+        primeiro_dia=np.datetime64(primeiro_dia, 'D'),
+        por_dia=por_dia,
+        por_posto=por_posto,
+    )
+
+
+def _esquecer(chave):
+    with _lock_indices:
+        _indices.pop(chave, None)
+
+
+def _guardar(df, indice):
+    with _lock_indices:
+        _indices[id(df)] = indice
+    weakref.finalize(df, _esquecer, id(df))
+
+
+def registrar_completude(df, indice=_AUSENTE):
+    """
+    Guarda o índice do DataFrame recém-lido, calculado aqui ou já pronto
+    (`indice`, vindo do processo que leu o relatório); retorna o próprio DataFrame.
+    """
+    if df is not None:
+        _guardar(df, calcular_completude(df) if indice is _AUSENTE else indice)
+    return df
+
+
+def indice_completude(df):
+    """
+    Índice de completude do DataFrame. Os do parser e do acervo já vêm
+    calculados; os demais (lidos em outro processo, por exemplo) são
+    calculados aqui e guardados.
+    """
+    if df is None:
+        return None
+    with _lock_indices:
+        indice = _indices.get(id(df), _AUSENTE)
+    if indice is _AUSENTE:
+        indice = calcular_completude(df)
+        _guardar(df, indice)
+    return indice
+
+
+def serie_completa(indice):
+    """True se não falta nenhum intervalo e não há repetições nem instantes fora do passo."""
+    return indice is None or (indice.presentes == indice.esperados and not indice.duplicados and not indice.fora_do_passo)
+
+
+def resumo_completude(indice):
+    """Uma linha com as contagens do índice, para exibição."""
+    if indice is None:
+        return "Sem intervalos."
+    partes = [f"{indice.presentes:,} de {indice.esperados:,} intervalos de {indice.passo} min".replace(',', '.')]
+    if indice.esperados > indice.presentes:
+        partes.append(f"{indice.esperados - indice.presentes:,} faltando em {len(indice.lacunas)} lacuna(s)".replace(',', '.'))
+    if indice.duplicados:
+        partes.append(f"{indice.duplicados:,} repetido(s)".replace(',', '.'))
+    if indice.fora_do_passo:
+        partes.append(f"{indice.fora_do_passo:,} fora do passo".replace(',', '.'))
+    return "; ".join(partes) + "."
+
+
+def tabelas_completude(indice):
+    """
+    Tabelas do diálogo, só as que têm linhas: contagem por posto, dias com
+    intervalos faltando ou repetidos, lacunas e instantes repetidos.
+    """
+    from critcom.leitura import POSTOS_HORARIOS
+
+    if indice is None:
+        return {}
+    por_posto = pd.DataFrame(indice.por_posto, index=[*POSTOS_HORARIOS, POSTO_NAO_IDENTIFICADO], columns=COLUNAS_CONTAGEM)
+    if not indice.por_posto[-1].any():
+        por_posto = por_posto.iloc[:-1]
+    afetados = np.flatnonzero(indice.por_dia[:, 2:].any(axis=1))
+    dias = pd.DataFrame(indice.por_dia[afetados], columns=COLUNAS_CONTAGEM)
+    dias.insert(0, 'Dia', (indice.primeiro_dia + afetados).astype('datetime64[s]'))
+    lacunas = pd.DataFrame({
+        'Início': indice.lacunas[:, 0].astype('datetime64[s]'),
+        'Fim': indice.lacunas[:, 1].astype('datetime64[s]'),
+        'Intervalos': (indice.lacunas[:, 1] - indice.lacunas[:, 0]).astype(np.int64) // indice.passo + 1,
+    })
+    instantes, vezes = indice.repeticoes
+    repeticoes = pd.DataFrame({'DataHora': instantes.astype('datetime64[s]'), 'Vezes': vezes})
+    tabelas = {"Por posto": por_posto, "Dias afetados": dias, "Lacunas": lacunas, "Repetições": repeticoes}
+    return {titulo: tabela for titulo, tabela in tabelas.items() if len(tabela)}
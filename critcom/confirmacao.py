@@ -0,0 +1,223 @@
+# --- REGRAS DA CONFIRMAÇÃO (K, PERDAS E SUMARIZAÇÃO) ---
+
+# Ordem dos postos nas tabelas de resultados
+POSTOS_TABELA = ('Ponta', 'Reservado', 'Fora Ponta')
+TIPOS_MEDICAO = ("Grandeza", "Grandeza EAC", "Pulso")
+
+PERDAS_MULTIPLICADOR = 1.025
+PERDAS_PERCENTUAL = 2.5
+
+# Grandezas da confirmação com mais de um medidor, na ordem da tabela.
+# 'type' indica em qual resultado (consumo ou demanda) a grandeza é procurada.
+GRANDEZAS_INTERVALOS = [
+    {'key': 'kWh fornecido', 'type': 'consumo', 'label': 'kWh fornecido acumulado'},
+    {'key': 'kW fornecido', 'type': 'demanda', 'label': 'kW fornecido máximo'},
+    {'key': 'UFER', 'type': 'demanda', 'label': 'UFER (ERE) acumulado'},
+    {'key': 'DMCR', 'type': 'demanda', 'label': 'DMCR (DRE) máximo'},
+    {'key': 'kWh recebido', 'type': 'consumo', 'label': 'kWh recebido acumulado'},
+    {'key': 'kW recebido', 'type': 'demanda', 'label': 'kW recebido máximo'}
+]
+# No relatório de faturamento a UFER vem junto com o consumo
+GRANDEZAS_FATURAMENTO = [
+    dict(item, type='consumo') if item['key'] == 'UFER' else item for item in GRANDEZAS_INTERVALOS
+]
+
+# Casas decimais de cada coluna formatada
+COLUNAS_UM_MEDIDOR = {'Valor': 4, 'K': 4, 'Perdas (%)': 1, 'Valor Final': 4}
+COLUNAS_DOIS_MEDIDORES = {
+    'Valor calculado (antigo)': 4, 'K (antigo)': 4, 'Perdas (%) (antigo)': 1, 'Valor final (antigo)': 4,
+    'Valor calculado (novo)': 4, 'K (novo)': 4, 'Perdas (%) (novo)': 1, 'Valor final (novo)': 4,
+    'Sumarização': 4
+}
+COLUNAS_COMPARACAO = {'Original': 4, 'Recalculado': 4, 'Diferença': 4}
+
+
+def get_params(constante, tipo_opcao, perdas_opcao, grandeza):
+    """
+    Retorna (K, perdas exibidas em %, multiplicador de perdas) de um medidor.
+    Só as grandezas de demanda ("kW ...") têm o K ajustado pelo tipo de medição.
+    """
+    perdas_multiplier = PERDAS_MULTIPLICADOR if perdas_opcao == "Sim" else 1.0
+    perdas_display = PERDAS_PERCENTUAL if perdas_opcao == "Sim" else 0.0
+
+    k_value = constante
+    if grandeza.startswith("kW "):
+        if tipo_opcao == "Grandeza EAC": k_value = constante / 4
+        elif tipo_opcao == "Pulso": k_value = constante * 4
+
+    return k_value, perdas_display, perdas_multiplier
+
+
+def get_sumarizacao(grandeza, val_antigo, val_novo):
+    """Demandas e DMCR ficam com o maior valor; as grandezas acumuladas são somadas."""
+    if grandeza.startswith("kW ") or grandeza == "DMCR":
+        return max(val_antigo, val_novo)
+    return val_antigo + val_novo
+
+
+def calcular_grandezas(resultados, parametros, grandezas=GRANDEZAS_INTERVALOS):
+    """
+    Aplica K e perdas de cada medidor e sumariza as grandezas entre medidores.
+
+    `resultados` tem um par (resultados_consumo, resultados_demanda) por medidor e
+    `parametros` um trio (constante, tipo, perdas) por medidor, na mesma ordem.
+    Retorna uma lista de (item de `grandezas`, posto, medidores, sumarização), em
+    que `medidores` traz (valor, K, perdas %, valor final) de cada medidor. Só
+    entram as grandezas presentes em pelo menos um dos medidores. O cálculo é
+    feito em critcom.medidores, o mesmo usado com os DataFrames de intervalos.
+    """
+    from critcom.medidores import confirmar_resultados
+
+    return confirmar_resultados(resultados, parametros, grandezas)
+
+
+def rotulos_medidores(num_medidores):
+    """Sufixos das colunas de cada medidor: (antigo, novo) com dois, senão a numeração."""
+    if num_medidores == 2:
+        return ('antigo', 'novo')
+    return tuple(str(numero) for numero in range(1, num_medidores + 1))
+
+
+def colunas_medidores(rotulos):
+    """Casas decimais das colunas formatadas da tabela com os medidores de `rotulos`."""
+    casas = {}
+    for rotulo in rotulos:
+        casas.update({
+            f'Valor calculado ({rotulo})': 4, f'K ({rotulo})': 4, f'Perdas (%) ({rotulo})': 1, f'Valor final ({rotulo})': 4,
+        })
+    casas['Sumarização'] = 4
+    return casas
+
+
+def linhas_medidores(calculadas, rotulos):
+    """Linhas da tabela de confirmação (com separadores) a partir de calcular_grandezas."""
+    table_data = []
+    item_atual = None
+    for item, posto, medidores, sumarizacao in calculadas:
+        if item is not item_atual:
+            table_data.append({'Posto Horário': f"--- {item['label']} ---"})
+            item_atual = item
+        linha = {'Posto Horário': posto}
+        for rotulo, (valor, k_value, perdas_display, final) in zip(rotulos, medidores):
+            linha.update({
+                f'Valor calculado ({rotulo})': valor, f'K ({rotulo})': k_value,
+                f'Perdas (%) ({rotulo})': perdas_display, f'Valor final ({rotulo})': final,
+            })
+        linha['Sumarização'] = sumarizacao
+        table_data.append(linha)
+    return table_data
+
+
+def linhas_dois_medidores(resultados_antigo, resultados_novo, params_antigo, params_novo, grandezas=GRANDEZAS_INTERVALOS):
+    """Linhas da tabela de confirmação com medidor anterior e novo (com separadores)."""
+    calculadas = calcular_grandezas([resultados_antigo, resultados_novo], [params_antigo, params_novo], grandezas)
+    return linhas_medidores(calculadas, rotulos_medidores(2))
+
+
+def linhas_um_medidor(resultados_consumo, resultados_demanda, constante, tipo_opcao, perdas_opcao):
+    """
+    Linhas da tabela de confirmação de um medidor. A primeira coluna do relatório
+    de consumo vem primeiro; as demais só entram se tiverem algum valor positivo.
+    """
+    table_data = []
+
+    def create_separator(label):
+        return {'Posto Horário': f"--- {label} ---", 'Valor': '', 'K': '', 'Perdas (%)': '', 'Valor Final': ''}
+
+    def add_section(resultados, key, label):
+        table_data.append(create_separator(label))
+        dados = resultados[key]
+        for posto in POSTOS_TABELA:
+            valor = dados['valores'].get(posto, 0.0)
+            k_value, perdas_display, perdas_multiplier = get_params(constante, tipo_opcao, perdas_opcao, key)
+            table_data.append({
+                'Posto Horário': posto,
+                'Valor': valor,
+                'K': k_value,
+                'Perdas (%)': perdas_display,
+                'Valor Final': valor * k_value * perdas_multiplier
+            })
+
+    def add_demanda_section(key, label):
+        if resultados_demanda and key in resultados_demanda:
+            add_section(resultados_demanda, key, label)
+
+    consumo_cols = list(resultados_consumo.keys()) if resultados_consumo else []
+    if consumo_cols:
+        add_section(resultados_consumo, consumo_cols[0], f"{consumo_cols[0]} acumulado")
+
+    add_demanda_section('kW fornecido', 'kW fornecido máximo')
+    add_demanda_section('UFER', 'UFER (ERE) acumulado')
+    add_demanda_section('DMCR', 'DMCR (DRE) máximo')
+
+    for col_name in consumo_cols[1:]:
+        if any(v > 0 for v in resultados_consumo[col_name]['valores'].values()):
+            add_section(resultados_consumo, col_name, f"{col_name} acumulado")
+
+    add_demanda_section('kW recebido', 'kW recebido máximo')
+    return table_data
+
+
+def linhas_comparacao(original, recalculado, coluna):
+    """
+    Valor de `coluna` lado a lado em duas tabelas de confirmação das mesmas
+    grandezas (postos do relatório e postos recalculados pelo calendário), uma
+    linha por grandeza e posto.
+    """
+    def por_grandeza(table_data):
+        valores, grandeza = {}, None
+        for linha in table_data:
+            rotulo = linha['Posto Horário']
+            if rotulo.startswith('---'):
+                grandeza = rotulo.strip('- ')
+            else:
+                valores[(grandeza, rotulo)] = linha.get(coluna, 0.0)
+        return valores
+
+    recalculados = por_grandeza(recalculado)
+    linhas = []
+    for (grandeza, posto), valor in por_grandeza(original).items():
+        novo = recalculados.get((grandeza, posto), 0.0)
+        linhas.append({
+            'Grandeza': grandeza, 'Posto Horário': posto, 'Original': valor, 'Recalculado': novo, 'Diferença': novo - valor,
+        })
+    return linhas
+
+
+# --- FORMATAÇÃO ---
+
+# Troca os separadores do formato americano (1,234.5) pelos do brasileiro (1.234,5)
+_TROCA_BR = str.maketrans(',.', '.,')
+
+
+def format_br(value, precision):
+    """Número no formato brasileiro (1.234,5678); vazio e NaN viram texto vazio."""
+    if isinstance(value, str):
+        return value
+    if value is None or value != value:  # NaN é diferente de si mesmo
+        return ''
+    if isinstance(value, (int, float)):
+        return f"{value:,.{precision}f}".translate(_TROCA_BR)
+    return value
+
+
+def formatar_coluna_br(valores, precision):
+    """
+    format_br de uma coluna inteira. Os números são formatados com um único
+    formato e os separadores trocados num só translate sobre a coluna unida.
+    """
+    formato = f"{{:,.{precision}f}}".format
+    eh_numero = [isinstance(v, (int, float)) and v == v for v in valores]
+    numeros = iter('\n'.join(formato(v) for v, numero in zip(valores, eh_numero) if numero).translate(_TROCA_BR).split('\n'))
+    return [next(numeros) if numero else format_br(v, precision) for v, numero in zip(valores, eh_numero)]
+
+
+def formatar_tabela(table_data, casas_por_coluna):
+    """Monta o DataFrame de resultados com as colunas numéricas já formatadas."""
+    import pandas as pd
+
+    df_resultados = pd.DataFrame(table_data)
+    for col, precision in casas_por_coluna.items():
+        if col in df_resultados.columns:
+            df_resultados[col] = formatar_coluna_br(df_resultados[col].tolist(), precision)
+    return df_resultados
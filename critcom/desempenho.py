@@ -0,0 +1,236 @@
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+# --- MEDIÇÃO DE DESEMPENHO DAS PÁGINAS ---
+# Trechos medidos em cada execução de uma página: leitura do cabeçalho, parser,
+# agregação, aplicação de K e perdas, formatação da tabela, montagem dos
+# gráficos e envio dos components.html. Cada trecho registra o tempo de
+# relógio, o pico de memória alocada durante ele (tracemalloc), as linhas
+# processadas e os bytes enviados ao navegador. Os trechos aparecem no painel
+# de depuração da barra lateral e são acrescentados, um por linha JSON, ao
+# arquivo de log (CRITCOM_LOG_DESEMPENHO), junto com o contrato e o serial dos
+# relatórios, para achar quais medições deixam o aplicativo lento.
+#
+# Desligada (o padrão), a medição não faz nada além de devolver o trecho nulo.
+# O tracemalloc só fica ligado enquanto há trecho aberto e deixa o código
+# medido mais lento; o tempo de relógio serve para comparar trechos e
+# relatórios entre si. O rastreamento é do processo inteiro: com duas sessões
+# medindo ao mesmo tempo, os picos de memória de uma incluem a outra.
+
+ARQUIVO_LOG = os.environ.get(
+    'CRITCOM_LOG_DESEMPENHO', os.path.join(os.path.expanduser('~'), '.critcom', 'desempenho.jsonl'),
+)
+# Liga a medição em todas as sessões, sem o painel de depuração (CRITCOM_DESEMPENHO=1)
+ATIVO_PADRAO = os.environ.get('CRITCOM_DESEMPENHO', '') not in ('', '0')
+
+# `nivel` é a profundidade do trecho (0 para os de fora); `pico_bytes`, `linhas`
+# e `bytes_payload` são None quando não se aplicam ou não foram medidos.
+Trecho = namedtuple('Trecho', 'nome nivel inicio segundos pico_bytes linhas bytes_payload')
+
+_lock_rastreio = threading.Lock()
+_trechos_rastreando = 0
+# O tracemalloc foi ligado aqui (e não por PYTHONTRACEMALLOC, por exemplo) e é desligado no fim
+_rastreio_proprio = False
+_lock_log = threading.Lock()
+
+
+class _Medicao:
+    """O que o código medido informa dentro do `with`: linhas processadas e o dado enviado (para contar os bytes)."""
+
+    __slots__ = ('linhas', 'dados')
+
+    def __init__(self, linhas=None, dados=None):
+        self.linhas = linhas
+        self.dados = dados
+
+
+class _MedicaoNula:
+    """Trecho de uma medição desligada: aceita e descarta as atribuições."""
+
+    __slots__ = ()
+    linhas = None
+    dados = None
+
+    def __setattr__(self, nome, valor):
+        pass
+
+
+_NULA = _MedicaoNula()
+
+
+def _iniciar_rastreio():
+    global _trechos_rastreando, _rastreio_proprio
+    with _lock_rastreio:
+        if _trechos_rastreando == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _rastreio_proprio = True
+        _trechos_rastreando += 1
+
+
+def _encerrar_rastreio():
+    global _trechos_rastreando, _rastreio_proprio
+    with _lock_rastreio:
+        _trechos_rastreando -= 1
+        if _trechos_rastreando == 0 and _rastreio_proprio:
+            tracemalloc.stop()
+            _rastreio_proprio = False
+
+
+def contar_linhas(valor):
+    """Linhas de um resultado: DataFrames, listas e dicionários pelo tamanho; None se não houver."""
+    if valor is None or isinstance(valor, (str, bytes)):
+        return None
+    try:
+        return len(valor)
+    except TypeError:
+        return None
+
+
+def bytes_payload(valor):
+    """
+    Bytes que o valor ocupa ao ser enviado ao navegador: textos em UTF-8,
+    figuras do Plotly pelo JSON e dicionários e listas (pacotes de gráficos)
+    pelo JSON compacto. None para o que não é enviado.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return len(valor.encode('utf-8'))
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    if hasattr(valor, 'to_json'):
+        return len(valor.to_json().encode('utf-8'))
+    if isinstance(valor, (dict, list, tuple)):
+        return len(json.dumps(valor, separators=(',', ':'), default=str).encode('utf-8'))
+    return None
+
+
+class Perfil:
+    """
+    Trechos medidos numa execução da página `pagina`. Com `ativo` falso (e sem
+    CRITCOM_DESEMPENHO), trecho() e medir() só executam o código. `memoria`
+    liga o tracemalloc nos trechos; `contexto` (contrato, serial) vai em cada
+    linha do log.
+    """
+
+    def __init__(self, pagina, ativo=False, memoria=True, arquivo=None):
+        self.pagina = pagina
+        self.ativo = ativo or ATIVO_PADRAO
+        self.memoria = memoria
+        self.arquivo = arquivo or ARQUIVO_LOG
+        self.execucao = uuid.uuid4().hex[:12]
+        self.contexto = {}
+        self.trechos = []
+        self._gravados = 0
+        # Picos (tracemalloc) dos trechos abertos, do mais externo ao atual: [pico até agora]
+        self._abertos = []
+
+    def anotar(self, **campos):
+        """Acrescenta ao contexto do log os campos com valor (contrato, serial, ...)."""
+        self.contexto.update({nome: valor for nome, valor in campos.items() if valor is not None})
+
+    @contextmanager
+    def trecho(self, nome, linhas=None, dados=None):
+        """
+        Mede o bloco `with` como o trecho `nome`. O bloco pode informar
+        `medicao.linhas` e `medicao.dados` (contados só depois de parar o
+        relógio); trechos dentro de trechos são medidos à parte.
+        """
+        if not self.ativo:
+            yield _NULA
+            return
+        medicao = _Medicao(linhas, dados)
+        nivel = len(self._abertos)
+        memoria = self.memoria
+        if memoria:
+            _iniciar_rastreio()
+            if self._abertos:
+                # O pico do trecho de fora até aqui, antes de zerar para o de dentro
+                self._abertos[-1][0] = max(self._abertos[-1][0], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        self._abertos.append([0])
+        # A posição na lista é a da abertura: o trecho de fora vem antes dos de dentro
+        posicao = len(self.trechos)
+        self.trechos.append(None)
+        inicio = time.time()
+        relogio = time.perf_counter()
+        try:
+            yield medicao
+        finally:
+            segundos = time.perf_counter() - relogio
+            aberto = self._abertos.pop()
+            pico_bytes = None
+            if memoria:
+                pico = max(aberto[0], tracemalloc.get_traced_memory()[1])
+                pico_bytes = max(0, pico - base)
+                if self._abertos:
+                    self._abertos[-1][0] = max(self._abertos[-1][0], pico)
+                _encerrar_rastreio()
+            self.trechos[posicao] = Trecho(
+                nome, nivel, inicio, segundos, pico_bytes,
+                medicao.linhas, bytes_payload(medicao.dados),
+            )
+
+    def medir(self, nome, funcao, *args, **kwargs):
+        """Executa `funcao(*args, **kwargs)` como o trecho `nome`; as linhas saem do tamanho do resultado."""
+        with self.trecho(nome) as medicao:
+            resultado = funcao(*args, **kwargs)
+            medicao.linhas = contar_linhas(resultado)
+        return resultado
+
+    def tabela(self):
+        """Trechos medidos, um dicionário por trecho (para st.dataframe), com o nome recuado pelo nível."""
+        return [
+            {
+                'Trecho': '\u2003' * trecho.nivel + trecho.nome,
+                'ms': round(trecho.segundos * 1000, 1),
+                'Pico (KiB)': None if trecho.pico_bytes is None else round(trecho.pico_bytes / 1024, 1),
+                'Linhas': trecho.linhas,
+                'Enviado (KiB)': None if trecho.bytes_payload is None else round(trecho.bytes_payload / 1024, 1),
+            }
+            for trecho in self.trechos if trecho is not None
+        ]
+
+    def gravar(self):
+        """
+        Acrescenta ao log os trechos ainda não gravados, um objeto JSON por
+        linha. Pode ser chamado de novo depois de mais trechos (gráficos montados
+        numa reexecução do fragmento). Retorna False se o arquivo não pôde ser escrito.
+        """
+        novos = self.trechos[self._gravados:]
+        # Só os já fechados (a gravação não acontece com trecho aberto, mas por garantia)
+        if None in novos:
+            novos = novos[:novos.index(None)]
+        if not self.ativo or not novos:
+            return True
+        linhas = [
+            json.dumps({
+                'instante': datetime.datetime.fromtimestamp(trecho.inicio).isoformat(timespec='milliseconds'),
+                'execucao': self.execucao,
+                'pagina': self.pagina,
+                **self.contexto,
+                'trecho': trecho.nome,
+                'nivel': trecho.nivel,
+                'segundos': round(trecho.segundos, 6),
+                'pico_bytes': trecho.pico_bytes,
+                'linhas': trecho.linhas,
+                'bytes_payload': trecho.bytes_payload,
+            }, ensure_ascii=False, default=str)
+            for trecho in novos
+        ]
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.arquivo)), exist_ok=True)
+            with _lock_log, open(self.arquivo, 'a', encoding='utf-8') as saida:
+                saida.write('\n'.join(linhas) + '\n')
+        except OSError:
+            return False
+        self._gravados += len(novos)
+        return True
@@ -0,0 +1,144 @@
+import re
+
+from critcom.cabecalho import ler_cabecalho
+from critcom.cache import memoizar_por_texto
+
+# --- RELATÓRIO DE FATURAMENTO ---
+# O relatório é lido linha a linha, numa única passagem: a linha com o nome de
+# um posto abre o bloco do posto, e cada linha "grandeza  valor" dentro dele é
+# despachada pelo nome da grandeza num dicionário. O bloco termina na linha em
+# branco, no próximo posto ou em "Dados gerais do faturamento". Vários períodos
+# de faturamento colados juntos são lidos separadamente e depois combinados.
+
+VERSAO_FATURAMENTO = 2
+POSTOS_FATURAMENTO = ('Fora Ponta', 'Ponta', 'Reservado')
+FIM_PERIODO = "Dados gerais do faturamento"
+
+# Nome no relatório -> (tipo, chave interna). Consumo é somado entre períodos e demanda fica com o máximo
+GRANDEZAS_RELATORIO = {
+    'kWh fornecido': ('consumo', 'kWh fornecido'),
+    'kWh recebido': ('consumo', 'kWh recebido'),
+    'kWh fornecido - Demanda máxima': ('demanda', 'kW fornecido'),
+    'kWh recebido - Demanda máxima': ('demanda', 'kW recebido'),
+    'UFER': ('consumo', 'UFER'),
+    'DMCR': ('demanda', 'DMCR'),
+}
+OPERACOES = {'consumo': 'soma', 'demanda': 'máximo'}
+
+_POSTOS = frozenset(POSTOS_FATURAMENTO)
+_LINHA_VALOR = re.compile(r"(.*?)\s+([\d.,-]+)\s*$")
+_VALOR_APOS_NOME = re.compile(r"\s+([\d.,-]+)")
+# Para linhas com outros campos depois do valor: o nome mais longo vem primeiro
+# ("kWh fornecido - Demanda máxima" antes de "kWh fornecido")
+_NOMES_POR_TAMANHO = sorted(GRANDEZAS_RELATORIO, key=len, reverse=True)
+
+
+def _para_numero(valor_str):
+    """Converte "1.234,56" para float; texto inválido vira NaN."""
+    try:
+        return float(valor_str.replace('.', '').replace(',', '.'))
+    except ValueError:
+        return float('nan')
+
+
+def _grandeza_da_linha(linha):
+    """(nome da grandeza, valor em texto) da linha "grandeza  valor", ou None."""
+    # Caso comum: campos separados por tabulação
+    nome, _, resto = linha.partition('\t')
+    if nome in GRANDEZAS_RELATORIO:
+        valor = _VALOR_APOS_NOME.match('\t' + resto)
+        if valor:
+            return nome, valor.group(1)
+    partes = _LINHA_VALOR.match(linha)
+    if partes and partes.group(1) in GRANDEZAS_RELATORIO:
+        return partes.groups()
+    for nome in _NOMES_POR_TAMANHO:
+        if linha.startswith(nome):
+            valor = _VALOR_APOS_NOME.match(linha, len(nome))
+            if valor:
+                return nome, valor.group(1)
+    return None
+
+
+@memoizar_por_texto(versao=VERSAO_FATURAMENTO)
+def _ler_periodos(texto_bruto):
+    # Memoizado à parte: periodos_faturamento e processar_dados_faturamento
+    # leem o mesmo texto na mesma execução da página e dividem esta leitura
+    periodos = []
+    periodo = None      # dicionário do período atual
+    posto = None        # posto do bloco atual (None fora de um bloco)
+    vistos = set()      # postos já lidos no período atual
+    bloco_vazio = True  # linhas em branco logo depois do nome do posto não fecham o bloco
+
+    for linha in (texto_bruto or '').splitlines():
+        conteudo = linha.strip()
+        if conteudo in _POSTOS:
+            if periodo is None or conteudo in vistos:
+                periodo, vistos = {}, set()
+                periodos.append(periodo)
+            posto, bloco_vazio = conteudo, True
+            vistos.add(posto)
+        elif FIM_PERIODO in linha:
+            posto, periodo = None, None
+        elif posto is None:
+            continue
+        elif not conteudo:
+            if not bloco_vazio:
+                posto = None
+        else:
+            bloco_vazio = False
+            grandeza = _grandeza_da_linha(linha)
+            if grandeza is not None:
+                _, chave = GRANDEZAS_RELATORIO[grandeza[0]]
+                # Vale a primeira ocorrência da grandeza no bloco
+                periodo.setdefault(chave, {}).setdefault(posto, _para_numero(grandeza[1]))
+    return periodos
+
+
+def periodos_faturamento(texto_bruto):
+    """
+    Valores de cada período de faturamento do texto: uma lista com um dicionário
+    {chave interna: {posto: valor}} por período. Um período termina em "Dados
+    gerais do faturamento" ou quando um posto já lido aparece de novo. A lista
+    vem do cache de leitura e não deve ser alterada.
+    """
+    return _ler_periodos(texto_bruto)
+
+
+def _combinar(valores, operacao):
+    """Soma ou máximo entre períodos; NaN só se nenhum período tiver valor."""
+    validos = [valor for valor in valores if valor == valor]
+    if not validos:
+        return float('nan')
+    return sum(validos) if operacao == 'soma' else max(validos)
+
+
+@memoizar_por_texto(versao=VERSAO_FATURAMENTO)
+def processar_dados_faturamento(texto_bruto):
+    """
+    Processa o relatório de faturamento para extrair os valores de consumo e
+    demanda, combinando os períodos quando houver mais de um.
+    """
+    if not texto_bruto:
+        return None, None
+
+    periodos = _ler_periodos(texto_bruto)
+    resultados = {'consumo': {}, 'demanda': {}}
+    for tipo, chave in GRANDEZAS_RELATORIO.values():
+        com_grandeza = [periodo[chave] for periodo in periodos if chave in periodo]
+        if not com_grandeza:
+            continue
+        operacao = OPERACOES[tipo]
+        valores = {}
+        # Garante que todos os postos existam em todos os resultados para consistência
+        for posto in POSTOS_FATURAMENTO:
+            no_posto = [por_posto[posto] for por_posto in com_grandeza if posto in por_posto]
+            valores[posto] = _combinar(no_posto, operacao) if no_posto else 0.0
+        resultados[tipo][chave] = {'operacao': operacao, 'valores': valores}
+    return resultados['consumo'], resultados['demanda']
+
+
+def extrair_info_faturamento(texto_bruto):
+    """Extrai informações de Contrato e Serial de qualquer um dos textos (MM bruta ou faturamento)."""
+    info = ler_cabecalho(texto_bruto, faturamento=True)
+    return {"contrato": info['contrato'], "serial": info['serial']}
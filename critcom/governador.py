@@ -0,0 +1,223 @@
+import os
+import pickle
+import threading
+import time
+import zlib
+
+from critcom.cache import CACHE_LEITURA
+from critcom.memoria import bytes_objeto, bytes_sessao, formatar_bytes
+
+# --- GOVERNADOR DE MEMÓRIA DAS SESSÕES ---
+# Cada aba aberta guarda no session_state os textos colados, os DataFrames de
+# intervalos e o índice da demanda, mesmo depois que o usuário deixa a
+# confirmação de lado. O governador soma os bytes de todas as sessões e, quando
+# o total passa do orçamento, grava em disco (pickle comprimido com zlib) os
+# valores das sessões ociosas há mais tempo, tirando-os do session_state. Na
+# próxima interação da sessão, a página os recarrega antes de usá-los.
+#
+# Só saem da memória as chaves que a página declara (nunca as dos widgets, que
+# o Streamlit reescreve a cada execução). Valores que também estão no cache de
+# leitura ficam: não ocupam nada além do cache, e o cache tem o seu próprio
+# limite. O orçamento considera só a parte exclusiva de cada sessão.
+#
+# O `estado` de cada sessão é o session_state do contexto de execução do
+# Streamlit (com `filtered_state` e acesso por chave protegido por lock), o que
+# permite esvaziar uma sessão a partir da execução de outra.
+
+ORCAMENTO_PADRAO_MB = 1024
+ORCAMENTO_BYTES = int(float(os.environ.get('CRITCOM_MEMORIA_MB', ORCAMENTO_PADRAO_MB)) * 1024 * 1024)
+PASTA_DESPEJO = os.environ.get('CRITCOM_DESPEJO', os.path.join(os.path.expanduser('~'), '.critcom', 'sessoes'))
+# Só é despejada a sessão parada há pelo menos esse tempo (s), bem mais do que dura uma execução
+OCIOSIDADE_MINIMA = float(os.environ.get('CRITCOM_OCIOSIDADE_S', 10 * 60))
+# Sessões sem uso há mais tempo (s) são esquecidas, com o arquivo em disco (aba fechada)
+VALIDADE_SESSAO = 24 * 60 * 60
+
+
+class _Sessao:
+    def __init__(self, id_sessao, estado):
+        self.id_sessao = id_sessao
+        self.estado = estado
+        self.chaves = set()
+        self.bytes = 0
+        self.ultimo_uso = time.monotonic()
+        self.arquivo = None
+        self.despejadas = ()
+        self.lock = threading.Lock()
+
+
+class GovernadorMemoria:
+    """
+    Registro das sessões abertas, com os bytes exclusivos de cada uma e o
+    instante do último uso. Quando a soma passa de `orcamento_bytes`, as sessões
+    ociosas há mais tempo (LRU) têm as chaves declaradas gravadas em `pasta`.
+    """
+
+    def __init__(self, orcamento_bytes, pasta, ociosidade=OCIOSIDADE_MINIMA, validade=VALIDADE_SESSAO):
+        self.orcamento_bytes = orcamento_bytes
+        self.pasta = pasta
+        self.ociosidade = ociosidade
+        self.validade = validade
+        self._sessoes = {}
+        self._lock = threading.Lock()
+        self.despejos = 0
+        self.recargas = 0
+        self.falhas = 0
+
+    def _caminho(self, id_sessao):
+        return os.path.join(self.pasta, f"{id_sessao}.pkl.z")
+
+    def retomar(self, id_sessao, estado):
+        """
+        Marca a sessão em uso e devolve ao `estado` os valores despejados em
+        disco. Retorna False se havia valores despejados e o arquivo não pôde
+        ser lido (a confirmação precisa ser calculada de novo).
+        """
+        with self._lock:
+            sessao = self._sessoes.get(id_sessao)
+            if sessao is None:
+                sessao = self._sessoes[id_sessao] = _Sessao(id_sessao, estado)
+            sessao.estado = estado
+            sessao.ultimo_uso = time.monotonic()
+
+        with sessao.lock:
+            if sessao.arquivo is None:
+                return True
+            arquivo, sessao.arquivo = sessao.arquivo, None
+            try:
+                with open(arquivo, 'rb') as entrada:
+                    valores = pickle.loads(zlib.decompress(entrada.read()))
+            except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+                self.falhas += 1
+                valores = None
+            finally:
+                _remover(arquivo)
+            despejadas, sessao.despejadas = sessao.despejadas, ()
+            if valores is None or any(chave not in valores for chave in despejadas):
+                return False
+            for chave in despejadas:
+                estado[chave] = valores[chave]
+            self.recargas += 1
+            return True
+
+    def registrar(self, id_sessao, estado, chaves=()):
+        """
+        Atualiza os bytes da sessão ao fim da execução da página e, se o total
+        passar do orçamento, despeja as outras sessões ociosas. `chaves` são as
+        chaves do session_state que podem ir para o disco.
+        """
+        _, total, compartilhados = bytes_sessao(estado.filtered_state)
+        with self._lock:
+            sessao = self._sessoes.get(id_sessao)
+            if sessao is None:
+                sessao = self._sessoes[id_sessao] = _Sessao(id_sessao, estado)
+            sessao.estado = estado
+            sessao.chaves.update(chaves)
+            sessao.bytes = total - compartilhados
+            sessao.ultimo_uso = time.monotonic()
+        self.governar(atual=id_sessao)
+
+    def governar(self, atual=None):
+        """
+        Esquece as sessões vencidas e despeja as ociosas até o total caber no
+        orçamento. A sessão `atual` (a que está executando) nunca é despejada.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            for id_sessao, sessao in list(self._sessoes.items()):
+                if agora - sessao.ultimo_uso > self.validade:
+                    del self._sessoes[id_sessao]
+                    if sessao.arquivo is not None:
+                        _remover(sessao.arquivo)
+            excesso = sum(sessao.bytes for sessao in self._sessoes.values()) - self.orcamento_bytes
+            if excesso <= 0:
+                return 0
+            candidatas = sorted(
+                (sessao for sessao in self._sessoes.values()
+                 if sessao.id_sessao != atual and sessao.arquivo is None and sessao.chaves and agora - sessao.ultimo_uso >= self.ociosidade),
+                key=lambda sessao: sessao.ultimo_uso,
+            )
+
+        liberados = 0
+        for sessao in candidatas:
+            if liberados >= excesso:
+                break
+            liberados += self._despejar(sessao)
+        return liberados
+
+    def _despejar(self, sessao):
+        """Grava em disco as chaves declaradas da sessão e as tira do session_state; retorna os bytes liberados."""
+        with sessao.lock:
+            if sessao.arquivo is not None or time.monotonic() - sessao.ultimo_uso < self.ociosidade:
+                return 0
+            do_cache = CACHE_LEITURA.ids_valores()
+            valores = {}
+            for chave in sorted(sessao.chaves):
+                valor = sessao.estado[chave] if chave in sessao.estado else None
+                if valor is not None and id(valor) not in do_cache:
+                    valores[chave] = valor
+            if not valores:
+                return 0
+            vistos = set()
+            tamanho = sum(bytes_objeto(valor, vistos) for valor in valores.values())
+
+            arquivo = self._caminho(sessao.id_sessao)
+            temporario = arquivo + '.tmp'
+            try:
+                os.makedirs(self.pasta, exist_ok=True)
+                with open(temporario, 'wb') as saida:
+                    saida.write(zlib.compress(pickle.dumps(valores, protocol=pickle.HIGHEST_PROTOCOL), 1))
+                os.replace(temporario, arquivo)
+            except (OSError, pickle.PicklingError):
+                self.falhas += 1
+                _remover(temporario)
+                return 0
+
+            for chave in valores:
+                del sessao.estado[chave]
+            sessao.arquivo = arquivo
+            sessao.despejadas = tuple(valores)
+            sessao.bytes = max(0, sessao.bytes - tamanho)
+            self.despejos += 1
+            return tamanho
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'sessoes': len(self._sessoes),
+                'em_disco': sum(sessao.arquivo is not None for sessao in self._sessoes.values()),
+                'bytes': sum(sessao.bytes for sessao in self._sessoes.values()),
+                'orcamento_bytes': self.orcamento_bytes,
+                'despejos': self.despejos,
+                'recargas': self.recargas,
+                'falhas': self.falhas,
+            }
+
+
+def _remover(caminho):
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+GOVERNADOR_SESSOES = GovernadorMemoria(ORCAMENTO_BYTES, PASTA_DESPEJO)
+
+
+def retomar_sessao(id_sessao, estado):
+    """Recarrega os valores da sessão despejados em disco (ver GovernadorMemoria.retomar)."""
+    return GOVERNADOR_SESSOES.retomar(id_sessao, estado)
+
+
+def registrar_sessao(id_sessao, estado, chaves=()):
+    """Registra os bytes da sessão e aplica o orçamento de memória (ver GovernadorMemoria.registrar)."""
+    GOVERNADOR_SESSOES.registrar(id_sessao, estado, chaves)
+
+
+def resumo_sessoes():
+    """Uma linha com as sessões abertas no servidor e o uso do orçamento de memória."""
+    dados = GOVERNADOR_SESSOES.estatisticas()
+    texto = (f"Sessões no servidor: {dados['sessoes']}, com {formatar_bytes(dados['bytes'])} "
+             f"de {formatar_bytes(dados['orcamento_bytes'])}")
+    if dados['em_disco']:
+        texto += f"; {dados['em_disco']} ociosa(s) em disco"
+    return texto + "."
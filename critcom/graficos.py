@@ -0,0 +1,293 @@
+import base64
+import hashlib
+import html
+import json
+
+import numpy as np
+
+# --- DADOS DOS GRÁFICOS DO DIÁLOGO DE RESULTADOS ---
+
+# Pontos por série desenhados de uma vez (cerca de dois por pixel na largura do diálogo)
+PONTOS_POR_SERIE = 2000
+# Pontos enviados por série: acima disso, só o menor e o maior valor de cada trecho
+# vão ao navegador, e os pontos originais de um período vêm com a `janela` de
+# pacote_graficos (escolhida no diálogo por escolher_janela)
+MAX_PONTOS_ENVIADOS = 2 * PONTOS_POR_SERIE
+# Valores em ponto fixo: até 4 casas decimais; o menor int32 marca valor ausente
+MAX_CASAS_DECIMAIS = 4
+SEM_VALOR = -2 ** 31
+
+
+def indices_min_max(y, num_baldes):
+    """
+    Divide a série em `num_baldes` baldes consecutivos e mantém o índice do menor e
+    do maior valor de cada um, além do primeiro e do último ponto. Como só são
+    escolhidos pontos originais, os picos aparecem com o valor exato.
+    """
+    n = len(y)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    largura = -(-n // max(1, num_baldes))
+    num_baldes = -(-n // largura)
+    invalidos = np.isnan(y)
+
+    para_min = np.full(num_baldes * largura, np.inf)
+    para_min[:n] = np.where(invalidos, np.inf, y)
+    para_max = np.full(num_baldes * largura, -np.inf)
+    para_max[:n] = np.where(invalidos, -np.inf, y)
+
+    base = np.arange(num_baldes) * largura
+    i_min = base + para_min.reshape(num_baldes, largura).argmin(axis=1)
+    i_max = base + para_max.reshape(num_baldes, largura).argmax(axis=1)
+    indices = np.unique(np.concatenate([i_min, i_max, [0, n - 1]]))
+    return indices[~invalidos[indices]]
+
+
+def _base64(array, tipo):
+    return base64.b64encode(np.ascontiguousarray(array, dtype=tipo).tobytes()).decode('ascii')
+
+
+def _codificar_valores(y):
+    """
+    Codifica os valores como inteiros de 32 bits em ponto fixo (valor x 10^casas)
+    quando isso reproduz exatamente os valores lidos do relatório; caso contrário,
+    usa float64. NaN vira SEM_VALOR no formato inteiro.
+    """
+    validos = ~np.isnan(y)
+    finitos = y[validos]
+    for casas in range(MAX_CASAS_DECIMAIS + 1):
+        escala = 10 ** casas
+        inteiros = np.round(finitos * escala)
+        if np.abs(inteiros).max(initial=0) < -SEM_VALOR and np.array_equal(inteiros / escala, finitos):
+            codificados = np.full(len(y), SEM_VALOR, dtype=np.int64)
+            codificados[validos] = inteiros
+            return {'escala': escala, 'y': _base64(codificados, '<i4')}
+    return {'escala': 0, 'y': _base64(y, '<f8')}
+
+
+def serie_reduzida(df, max_pontos=MAX_PONTOS_ENVIADOS):
+    """Se as séries deste DataFrame vão ao navegador reduzidas (mais linhas que `max_pontos`)."""
+    return df is not None and len(df) > max_pontos
+
+
+def pacote_graficos(series, pontos_alvo=PONTOS_POR_SERIE, max_pontos=MAX_PONTOS_ENVIADOS, janela=None):
+    """
+    Monta o pacote colunar com os dados de todos os gráficos do diálogo.
+
+    `series` mapeia o nome usado no JavaScript para (df, coluna) ou
+    (df, coluna, mascara). Cada vetor de tempos distinto (em geral um por
+    relatório, compartilhado entre consumo e demanda quando coincidem) é enviado
+    uma única vez como minutos em int32 a partir de um instante inicial. Cada
+    série leva só os valores, alinhados a esse vetor. Linhas fora da máscara ou
+    sem valor viram NaN e não são desenhadas.
+
+    Séries com mais de `max_pontos` valores vão reduzidas, com tempos próprios,
+    ao menor e ao maior valor de cada um de `pontos_alvo` / 2 trechos
+    (indices_min_max); o zoom no navegador não traz mais detalhe. `janela`
+    (início, fim; datetimes inclusivos) recorta as séries antes, para enviar os
+    pontos originais de um período. Retorna um dicionário pronto para json.dumps, aberto por abrirPacote no JS.
+    """
+    pacote = {'tempos': [], 'series': {}}
+    tempos_por_hash = {}
+
+    def indice_tempo(minutos):
+        chave_tempo = hashlib.blake2b(minutos.tobytes(), digest_size=16).digest()
+        if chave_tempo not in tempos_por_hash:
+            inicio = int(minutos[0]) if len(minutos) else 0
+            tempos_por_hash[chave_tempo] = len(pacote['tempos'])
+            pacote['tempos'].append({'inicio': inicio * 60000, 'minutos': _base64(minutos - inicio, '<i4')})
+        return tempos_por_hash[chave_tempo]
+
+    for nome, (df, coluna, *mascara) in series.items():
+        if df is None or coluna not in df.columns:
+            continue
+        minutos = df['DataHora'].to_numpy().astype('datetime64[m]').astype(np.int64)
+        y = df[coluna].to_numpy(np.float64)
+        if mascara and mascara[0] is not None:
+            y = np.where(mascara[0], y, np.nan)
+        if janela is not None:
+            limites = np.array(janela, dtype='datetime64[m]').astype(np.int64)
+            dentro = (minutos >= limites[0]) & (minutos <= limites[1])
+            minutos, y = minutos[dentro], y[dentro]
+        # A busca binária no navegador exige tempos em ordem crescente
+        if len(minutos) > 1 and (np.diff(minutos) < 0).any():
+            ordem = np.argsort(minutos, kind='stable')
+            minutos, y = minutos[ordem], y[ordem]
+
+        if np.count_nonzero(~np.isnan(y)) > max_pontos:
+            enviados = indices_min_max(y, max(1, pontos_alvo // 2))
+            minutos, y = minutos[enviados], y[enviados]
+        serie = _codificar_valores(y)
+        serie['tempo'] = indice_tempo(minutos)
+        pacote['series'][nome] = serie
+    return pacote
+
+
+# Funções JavaScript compartilhadas pelos diálogos: abrem o pacote colunar de
+# pacote_graficos e montam os pontos de cada série. Os datasets usam parsing: false.
+JS_PACOTE = f"""
+            function decodificarBase64(texto, Tipo) {{
+                const binario = atob(texto);
+                const bytes = new Uint8Array(binario.length);
+                for (let i = 0; i < binario.length; i++) bytes[i] = binario.charCodeAt(i);
+                return new Tipo(bytes.buffer);
+            }}
+
+            function abrirPacote(pacote) {{
+                // Os tempos chegam como hora local do relatório contada em UTC
+                const tempos = pacote.tempos.map(tempo => {{
+                    const minutos = decodificarBase64(tempo.minutos, Int32Array);
+                    const x = new Float64Array(minutos.length);
+                    for (let i = 0; i < minutos.length; i++) {{
+                        const ms = tempo.inicio + minutos[i] * 60000;
+                        x[i] = ms + new Date(ms).getTimezoneOffset() * 60000;
+                    }}
+                    return x;
+                }});
+                const series = {{}};
+                for (const [nome, serie] of Object.entries(pacote.series)) {{
+                    let y;
+                    if (serie.escala) {{
+                        const inteiros = decodificarBase64(serie.y, Int32Array);
+                        y = new Float64Array(inteiros.length);
+                        for (let i = 0; i < inteiros.length; i++) y[i] = inteiros[i] === {SEM_VALOR} ? NaN : inteiros[i] / serie.escala;
+                    }} else {{
+                        y = decodificarBase64(serie.y, Float64Array);
+                    }}
+                    series[nome] = {{ x: tempos[serie.tempo], y: y }};
+                }}
+                return series;
+            }}
+
+            function pontosSerie(serie) {{
+                const pontos = [];
+                for (let i = 0; i < serie.y.length; i++) {{
+                    if (!Number.isNaN(serie.y[i])) pontos.push({{ x: serie.x[i], y: serie.y[i] }});
+                }}
+                return pontos;
+            }}
+"""
+
+
+def assinatura_series(series):
+    """
+    Hash do conteúdo das séries (no formato de pacote_graficos): instantes,
+    valores e máscara. Identifica um gráfico já montado sem depender da
+    identidade dos DataFrames, que podem ser recriados com os mesmos dados.
+    """
+    hash_series = hashlib.blake2b(digest_size=16)
+    for nome, (df, coluna, *mascara) in series.items():
+        hash_series.update(nome.encode('utf-8') + b'\0')
+        if df is None or coluna not in df.columns:
+            continue
+        hash_series.update(df['DataHora'].to_numpy().astype('datetime64[m]').astype(np.int64).tobytes())
+        hash_series.update(np.ascontiguousarray(df[coluna].to_numpy()).tobytes())
+        if mascara and mascara[0] is not None:
+            hash_series.update(np.packbits(np.asarray(mascara[0], dtype=bool)).tobytes())
+        hash_series.update(b'\1')
+    return hash_series.hexdigest()
+
+
+def html_grafico(titulo, pacote, series, altura_copia=750):
+    """
+    Documento HTML (para components.html) com um gráfico Chart.js das `series`
+    do `pacote` (de pacote_graficos), dadas como (nome no pacote, rótulo, cor).
+    O botão copia o gráfico como imagem de 2000 x `altura_copia` pixels.
+    """
+    from critcom.recursos import SCRIPTS_GRAFICOS, tags_scripts
+
+    return f"""
+        {tags_scripts(*(nome for nome in SCRIPTS_GRAFICOS if nome != 'html2canvas'))}
+
+        <style>
+            .capture-area {{ padding: 10px; background-color: #ffffff; }}
+            .button-container {{ text-align: right; margin-top: 10px; margin-bottom: 20px; }}
+            .copy-button {{ background-color: #0068c9; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; }}
+            .copy-button:hover {{ background-color: #0055a3; }}
+            h3 {{ font-family: sans-serif; }}
+        </style>
+
+        <div class="capture-area">
+            <h3>{html.escape(titulo)}</h3>
+            <canvas id="canvasGrafico"></canvas>
+        </div>
+        <div class="button-container">
+            <button class="copy-button" onclick="copyChartAsImage(this)">Copiar Gráfico como Imagem</button>
+        </div>
+
+        <script>
+            {JS_PACOTE}
+            const chartData = abrirPacote({json.dumps(pacote)});
+            const datasets = [];
+            for (const [nome, label, cor] of {json.dumps(series)}) {{
+                const serie = chartData[nome];
+                if (serie) datasets.push({{ label: label, data: pontosSerie(serie), borderColor: cor, tension: 0.1, pointRadius: 0, borderWidth: 2 }});
+            }}
+            const chartInstance = new Chart(document.getElementById('canvasGrafico').getContext('2d'), {{
+                type: 'line',
+                data: {{ datasets: datasets }},
+                options: {{
+                    responsive: true,
+                    maintainAspectRatio: true,
+                    parsing: false,
+                    plugins: {{ zoom: {{ zoom: {{ wheel: {{ enabled: true }}, pinch: {{ enabled: true }}, mode: 'x' }} }} }},
+                    scales: {{ x: {{ type: 'time', time: {{ unit: 'day' }} }} }}
+                }}
+            }});
+
+            function copyChartAsImage(button) {{
+                const originalText = button.innerText;
+                button.innerText = 'Copiando...';
+
+                const tempCanvas = document.createElement('canvas');
+                tempCanvas.width = 2000;
+                tempCanvas.height = {int(altura_copia)};
+                const tempCtx = tempCanvas.getContext('2d');
+
+                const whiteBackgroundPlugin = {{
+                    id: 'whiteBackground',
+                    beforeDraw: (chart) => {{
+                        const ctx = chart.canvas.getContext('2d');
+                        ctx.save();
+                        ctx.globalCompositeOperation = 'destination-over';
+                        ctx.fillStyle = 'white';
+                        ctx.fillRect(0, 0, chart.width, chart.height);
+                        ctx.restore();
+                    }}
+                }};
+
+                const visibleDatasets = chartInstance.config.data.datasets.filter((_, index) => chartInstance.isDatasetVisible(index));
+
+                const tempConfig = {{
+                    type: 'line',
+                    data: {{ ...chartInstance.config.data, datasets: visibleDatasets }},
+                    options: {{
+                        ...chartInstance.config.options,
+                        responsive: false,
+                        maintainAspectRatio: false,
+                        animation: false,
+                        plugins: {{
+                            ...chartInstance.config.options.plugins,
+                            legend: {{ labels: {{ font: {{ size: 24 }} }} }}
+                        }},
+                        scales: {{
+                            ...chartInstance.config.options.scales,
+                            x: {{ ...chartInstance.config.options.scales.x, min: chartInstance.scales.x.min, max: chartInstance.scales.x.max, ticks: {{ font: {{ size: 20 }} }} }},
+                            y: {{ ...chartInstance.config.options.scales.y, ticks: {{ font: {{ size: 20 }} }} }}
+                        }}
+                    }},
+                    plugins: [whiteBackgroundPlugin]
+                }};
+
+                new Chart(tempCtx, tempConfig);
+
+                setTimeout(() => {{
+                    tempCanvas.toBlob(function(blob) {{
+                        navigator.clipboard.write([ new ClipboardItem({{ 'image/png': blob }}) ])
+                        .then(() => {{ button.innerText = 'Copiado!'; setTimeout(() => {{ button.innerText = originalText; }}, 2000); }})
+                        .catch(err => {{ console.error('Erro ao copiar: ', err); button.innerText = 'Falha ao copiar'; setTimeout(() => {{ button.innerText = originalText; }}, 2000); }});
+                    }});
+                }}, 250);
+            }}
+        </script>
+    """
@@ -0,0 +1,74 @@
+import numpy as np
+from plotly import graph_objects as go
+from plotly.subplots import make_subplots
+
+# --- GRÁFICOS DO DIÁLOGO EM PLOTLY (WEBGL) ---
+# Alternativa aos gráficos Chart.js de critcom.graficos para séries longas: o
+# scattergl desenha as linhas na GPU, então arrastar e dar zoom continua fluido
+# com centenas de milhares de pontos, sem reduzir as séries. Todos os
+# painéis ficam numa única figura com o eixo x compartilhado: o zoom em um vale
+# para os demais.
+#
+# Os instantes vão como milissegundos desde a época (a hora do relatório,
+# contada em UTC, como no pacote do Chart.js) e os valores no tipo em que foram
+# lidos; o Plotly envia os arrays NumPy em binário (base64), não como listas de
+# texto. O módulo só é importado quando o diálogo usa o Plotly.
+
+ALTURA_PAINEL = 320
+ESPESSURA_LINHA = 1.5
+# Opções do st.plotly_chart: zoom pela roda do mouse, como nos gráficos Chart.js
+CONFIG_PLOTLY = {'scrollZoom': True, 'displaylogo': False}
+
+
+def _serie(df, coluna, mascara=None):
+    """Instantes (ms) e valores da coluna em ordem de tempo; fora da máscara vira NaN (lacuna na linha)."""
+    minutos = df['DataHora'].to_numpy().astype('datetime64[m]').astype(np.int64)
+    y = df[coluna].to_numpy()
+    # float32 só quando a leitura guardou assim (conversão exata); o resto segue em float64
+    if y.dtype != np.float32:
+        y = y.astype(np.float64)
+    if mascara is not None:
+        y = np.where(mascara, y, np.nan)
+    if len(minutos) > 1 and (np.diff(minutos) < 0).any():
+        ordem = np.argsort(minutos, kind='stable')
+        minutos, y = minutos[ordem], y[ordem]
+    return (minutos * 60000).astype(np.float64), y
+
+
+def figura_intervalos(paineis, altura_painel=ALTURA_PAINEL):
+    """
+    Figura com um painel por item de `paineis`, um abaixo do outro, com o eixo x
+    compartilhado. `paineis` é uma lista de (título, séries) e cada série é
+    (rótulo, cor, df, coluna) ou (rótulo, cor, df, coluna, mascara); séries sem
+    DataFrame ou sem a coluna são ignoradas, e painéis sem nenhuma série são
+    omitidos. Retorna None se não sobrar nenhum painel.
+    """
+    paineis = [
+        (titulo, [serie for serie in series if serie[2] is not None and serie[3] in serie[2].columns])
+        for titulo, series in paineis
+    ]
+    paineis = [(titulo, series) for titulo, series in paineis if series]
+    if not paineis:
+        return None
+
+    figura = make_subplots(
+        rows=len(paineis), cols=1, shared_xaxes=True,
+        subplot_titles=[titulo for titulo, _ in paineis], vertical_spacing=min(0.08, 0.3 / len(paineis)),
+    )
+    for linha, (titulo, series) in enumerate(paineis, start=1):
+        for rotulo, cor, df, coluna, *mascara in series:
+            x, y = _serie(df, coluna, mascara[0] if mascara else None)
+            figura.add_trace(
+                go.Scattergl(
+                    x=x, y=y, mode='lines', name=rotulo, line={'color': cor, 'width': ESPESSURA_LINHA},
+                    legendgroup=titulo, legendgrouptitle_text=titulo,
+                    hovertemplate="%{x|%d/%m/%Y %H:%M}<br>%{y}<extra>" + rotulo + "</extra>",
+                ),
+                row=linha, col=1,
+            )
+    figura.update_xaxes(type='date')
+    figura.update_layout(
+        height=altura_painel * len(paineis) + 80, margin={'l': 40, 'r': 20, 't': 40, 'b': 30},
+        legend={'groupclick': 'toggleitem'}, uirevision='intervalos',
+    )
+    return figura
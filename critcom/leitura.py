@@ -0,0 +1,238 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from critcom.cache import memoizar_por_texto
+from critcom.completude import registrar_completude
+
+# --- CONSTANTES DOS RELATÓRIOS ---
+
+# Incrementar sempre que o formato do DataFrame retornado mudar (invalida o cache)
+VERSAO_PARSER = 4
+
+POSTOS_HORARIOS = ('Fora Ponta', 'Ponta', 'Reservado')
+COLUNAS_FIXAS = ['DataHora', 'Dia', 'Posto Horario']
+
+_PADRAO_CABECALHO = re.compile(r"^Data\s+Dia\s+Postos horários\s+(.*)$")
+_POSTOS_VALIDOS = frozenset(POSTOS_HORARIOS)
+_PADRAO_VALOR_AUSENTE = re.compile(r"^-?$", re.MULTILINE)
+# Valores aceitos pela versão anterior do parser: só dígitos, pontos, vírgulas e hífens
+_PADRAO_VALOR = re.compile(r"\s*[\d.,-]+\s*")
+_PADRAO_COLUNA_VALORES = re.compile(r"[\d.,-]+(?:\n[\d.,-]+)*")
+_inicio_linha_dados = re.compile(r"\d{2}/\d{2}/\d{4}").match
+
+# Posições dos dígitos em "dd/mm/aaaa HH:MM" (largura fixa de 16 caracteres)
+_LARGURA_DATA = 16
+_POSICOES_DIGITOS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]
+_POSICOES_SEPARADORES = {2: ord('/'), 5: ord('/'), 10: ord(' '), 13: ord(':')}
+
+
+def _padrao_linha_dados(num_colunas_dados):
+    """
+    Monta a expressão regular usada quando a linha não está separada por tabulações.
+    É o mesmo formato aceito pela versão anterior do parser.
+    """
+    regex_parts = [
+        r"^(\d{2}/\d{2}/\d{4}\s\d{2}:\d{2})",
+        r"([A-Za-zçáéíóúãõâêôü]+)",
+        r"(Fora Ponta|Ponta|Reservado)"
+    ]
+    regex_parts.extend([r"([\d.,-]+)"] * num_colunas_dados)
+    return re.compile(r"\s+".join(regex_parts) + r"$")
+
+
+def _decodificar_datas(datas):
+    """
+    Converte as datas "dd/mm/aaaa HH:MM" diretamente para datetime64, sem passar
+    pelo parser de strings do pandas. Retorna as datas e a máscara de linhas válidas.
+    """
+    buffer = np.frombuffer(''.join(datas).encode('ascii', 'replace'), dtype=np.uint8)
+    buffer = buffer.reshape(-1, _LARGURA_DATA)
+
+    validas = np.ones(len(buffer), dtype=bool)
+    for posicao, caractere in _POSICOES_SEPARADORES.items():
+        validas &= buffer[:, posicao] == caractere
+
+    digitos = buffer[:, _POSICOES_DIGITOS].astype(np.int64) - ord('0')
+    validas &= ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+
+    dia = digitos[:, 0] * 10 + digitos[:, 1]
+    mes = digitos[:, 2] * 10 + digitos[:, 3]
+    ano = digitos[:, 4] * 1000 + digitos[:, 5] * 100 + digitos[:, 6] * 10 + digitos[:, 7]
+    hora = digitos[:, 8] * 10 + digitos[:, 9]
+    minuto = digitos[:, 10] * 10 + digitos[:, 11]
+    validas &= (mes >= 1) & (mes <= 12) & (dia >= 1) & (hora <= 23) & (minuto <= 59)
+
+    meses = np.where(validas, (ano - 1970) * 12 + (mes - 1), 0).astype('datetime64[M]')
+    inicio_mes = meses.astype('datetime64[D]')
+    dias_no_mes = ((meses + 1).astype('datetime64[D]') - inicio_mes).astype(np.int64)
+    validas &= dia <= dias_no_mes
+
+    data_hora = (inicio_mes + (dia - 1)).astype('datetime64[m]') + (hora * 60 + minuto)
+    return data_hora.astype('datetime64[ns]'), validas
+
+
+def _codificar_postos(postos):
+    """
+    Converte os postos (já validados) em códigos int8 na ordem de POSTOS_HORARIOS.
+    As substituições são feitas sobre o texto de todos os postos de uma só vez;
+    "Fora Ponta" é trocado antes de "Ponta" por conter o outro nome.
+    """
+    texto = '\t'.join(postos)
+    for codigo, posto in sorted(enumerate(POSTOS_HORARIOS), key=lambda item: -len(item[1])):
+        texto = texto.replace(posto, str(codigo))
+    return (np.frombuffer(texto.replace('\t', '').encode('ascii'), dtype=np.uint8) - ord('0')).astype(np.int8)
+
+
+def _decodificar_numeros(valores):
+    """
+    Converte uma coluna de valores no formato brasileiro ("1.234,56") para float64.
+    A troca de separadores é feita uma única vez sobre o texto da coluna inteira.
+
+    Retorna também a máscara das linhas cujo valor tem só dígitos, pontos,
+    vírgulas e hífens, como exigia a versão anterior do parser ("-" vale e vira
+    NaN; valores com letras ou vazios descartam a linha), ou True quando a
+    coluna inteira é válida.
+    """
+    texto = '\n'.join(valores)
+    if _PADRAO_COLUNA_VALORES.fullmatch(texto):
+        validas = True
+    else:
+        validas = np.array([_PADRAO_VALOR.fullmatch(valor) is not None for valor in valores], dtype=bool)
+    texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return np.array(texto.split('\n'), dtype=np.float64), validas
+    except ValueError:
+        pass
+    # Valores "-" ou vazios viram NaN; o restante segue o errors='coerce'
+    partes = _PADRAO_VALOR_AUSENTE.sub('nan', texto).split('\n')
+    try:
+        return np.array(partes, dtype=np.float64), validas
+    except ValueError:
+        return pd.to_numeric(pd.Series(partes, dtype=object), errors='coerce').to_numpy(np.float64), validas
+
+
+def compactar_valores(valores):
+    """
+    A coluna em float32 quando a conversão preserva exatamente todos os valores
+    (contagens de pulsos, colunas zeradas); senão, a própria coluna em float64.
+    Quem lê as colunas converte para float64 e obtém os mesmos números.
+    """
+    compactos = valores.astype(np.float32)
+    if np.array_equal(compactos.astype(np.float64), valores, equal_nan=True):
+        return compactos
+    return valores
+
+
+def _separar_campos(linhas_dados, num_colunas_dados):
+    """
+    Separa os campos de todas as linhas de dados de uma só vez.
+
+    No caminho rápido as linhas são unidas e divididas pelas tabulações numa única
+    chamada, e cada coluna é obtida por fatiamento. Se a contagem de campos não
+    fechar (linha separada por espaços, posto desconhecido...), cada linha é
+    validada individualmente, com a expressão regular como alternativa.
+    Retorna as listas de datas, dias, postos e uma lista de valores por coluna.
+    """
+    num_campos = len(COLUNAS_FIXAS) + num_colunas_dados
+    campos = '\t'.join(linhas_dados).split('\t')
+    if len(campos) == num_campos * len(linhas_dados):
+        datas, postos = campos[0::num_campos], campos[2::num_campos]
+        if _POSTOS_VALIDOS.issuperset(postos) and set(map(len, datas)) == {_LARGURA_DATA}:
+            valores = [campos[i::num_campos] for i in range(len(COLUNAS_FIXAS), num_campos)]
+            return datas, campos[1::num_campos], postos, valores
+
+    padrao_linha = _padrao_linha_dados(num_colunas_dados)
+    datas, dias, postos = [], [], []
+    valores = [[] for _ in range(num_colunas_dados)]
+    for linha in linhas_dados:
+        campos = linha.rstrip().split('\t')
+        if len(campos) != num_campos or len(campos[0]) != _LARGURA_DATA or campos[2] not in _POSTOS_VALIDOS:
+            dados_match = padrao_linha.match(linha.strip())
+            if not dados_match:
+                continue
+            campos = dados_match.groups()
+        datas.append(campos[0])
+        dias.append(campos[1])
+        postos.append(campos[2])
+        for coluna, valor in zip(valores, campos[3:]):
+            coluna.append(valor)
+    return datas, dias, postos, valores
+
+
+def colunas_do_cabecalho(linha):
+    """Colunas de dados se a linha for o cabeçalho "Data  Dia  Postos horários ..."; senão None."""
+    header_match = _PADRAO_CABECALHO.match(linha)
+    if not header_match:
+        return None
+    return [col.strip() for col in header_match.group(1).strip().split('\t')]
+
+
+def primeira_data(linhas):
+    """Data e hora (datetime64) da primeira linha de dados, ou None se não houver."""
+    for linha in linhas:
+        if _inicio_linha_dados(linha):
+            data_hora, validas = _decodificar_datas([linha[:_LARGURA_DATA].ljust(_LARGURA_DATA)])
+            if validas[0]:
+                return data_hora[0]
+    return None
+
+
+def ler_linhas_intervalos(linhas):
+    """
+    Lê as linhas de um relatório de consumo ou demanda em uma única passagem.
+
+    Procura o cabeçalho "Data  Dia  Postos horários ...", separa os campos de cada
+    linha de dados pelas tabulações e decodifica datas e valores direto para arrays
+    NumPy. Linhas com data inválida são descartadas e, como na versão anterior,
+    também as que têm algum valor que não seja número ou "-" (letras, campo
+    vazio); na completude, elas contam como intervalos ausentes. Retorna um DataFrame com as colunas DataHora, Dia,
+    Posto Horario e as colunas do cabeçalho, ou None se não houver dados. A
+    completude da série é calculada na mesma leitura e consultada por
+    indice_completude(df).
+    """
+    linhas = iter(linhas)
+    colunas_dados = None
+    for linha in linhas:
+        colunas_dados = colunas_do_cabecalho(linha)
+        if colunas_dados is not None:
+            break
+    if colunas_dados is None:
+        return None
+
+    linhas_dados = [linha for linha in linhas if _inicio_linha_dados(linha)]
+    if not linhas_dados:
+        return None
+    datas, dias, postos, valores = _separar_campos(linhas_dados, len(colunas_dados))
+    if not datas:
+        return None
+
+    data_hora, validas = _decodificar_datas(datas)
+    colunas = {
+        'DataHora': data_hora,
+        # Dia e posto como categorias: um byte por linha em vez de um objeto texto
+        'Dia': pd.Categorical(dias),
+        'Posto Horario': pd.Categorical.from_codes(_codificar_postos(postos), categories=POSTOS_HORARIOS),
+    }
+    df = pd.DataFrame(colunas)
+    for nome_coluna, valores_coluna in zip(colunas_dados, valores):
+        numeros, validas_coluna = _decodificar_numeros(valores_coluna)
+        validas &= validas_coluna
+        df[nome_coluna] = compactar_valores(numeros)
+    if not validas.all():
+        df = df[validas].reset_index(drop=True)
+    # O índice de completude (critcom.completude) fica pronto junto com o DataFrame
+    return registrar_completude(df) if not df.empty else None
+
+
+@memoizar_por_texto(versao=VERSAO_PARSER)
+def ler_relatorio_intervalos(texto_bruto):
+    """
+    Processa o texto bruto colado pelo usuário (relatório de consumo ou demanda)
+    e retorna o DataFrame de intervalos, ou None se não houver dados válidos.
+    O resultado fica em cache pelo conteúdo do texto e não deve ser alterado.
+    """
+    if not texto_bruto:
+        return None
+    return ler_linhas_intervalos(texto_bruto.splitlines())
@@ -0,0 +1,275 @@
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from critcom.arquivos import texto_completo
+from critcom.cabecalho import ler_cabecalho
+from critcom.confirmacao import GRANDEZAS_FATURAMENTO, GRANDEZAS_INTERVALOS, TIPOS_MEDICAO, calcular_grandezas, colunas_medidores
+from critcom.faturamento import processar_dados_faturamento
+from critcom.leitura import ler_relatorio_intervalos, primeira_data
+from critcom.medidores import confirmar_medidores
+
+# --- CONFIRMAÇÃO EM LOTE (SEM INTERFACE) ---
+# Cada contrato vira um "trabalho": um dicionário com o contrato e a lista de
+# medidores, cada um com os caminhos dos relatórios e os parâmetros de cálculo.
+# Os trabalhos são independentes e rodam em paralelo num pool de processos.
+
+RELATORIOS = ('consumo', 'demanda', 'faturamento')
+EXTENSOES_RELATORIO = ('.txt',)
+COLUNAS_DEMANDA = frozenset({'kW fornecido', 'kW recebido', 'DMCR', 'UFER'})
+NAO_ENCONTRADO = "Não encontrado"
+
+_PADRAO_POSTO_FATURAMENTO = re.compile(r"^(Fora Ponta|Ponta|Reservado)\s*$", re.MULTILINE)
+
+
+class ErroLote(Exception):
+    """Entrada do lote inválida (manifesto ou diretório sem relatórios)."""
+
+
+def ler_texto_arquivo(caminho):
+    """Lê um relatório exportado, com a mesma detecção de codificação dos arquivos enviados nas páginas."""
+    with open(caminho, 'rb') as arquivo:
+        return texto_completo(arquivo)
+
+
+def identificar_relatorio(texto):
+    """
+    Classifica o texto como 'consumo', 'demanda' ou 'faturamento' (None se não
+    reconhecido). Nos relatórios de intervalos, as colunas do cabeçalho decidem.
+    """
+    colunas = ler_cabecalho(texto)['colunas']
+    if colunas is not None:
+        return 'demanda' if COLUNAS_DEMANDA.intersection(colunas) else 'consumo'
+    if _PADRAO_POSTO_FATURAMENTO.search(texto):
+        return 'faturamento'
+    return None
+
+
+def _normalizar_tipo(valor):
+    for tipo in TIPOS_MEDICAO:
+        if tipo.lower() == valor.strip().lower():
+            return tipo
+    raise ErroLote(f"Tipo de medição desconhecido: {valor!r} (use {', '.join(TIPOS_MEDICAO)}).")
+
+
+def _normalizar_perdas(valor):
+    return "Sim" if valor.strip().lower() in ('sim', 's', '1', 'true') else "Não"
+
+
+def _normalizar_constante(valor):
+    texto = valor.strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    try:
+        return float(texto)
+    except ValueError:
+        raise ErroLote(f"Constante inválida: {valor!r}.") from None
+
+
+def descobrir_diretorio(pasta, constante=1.0, tipo_opcao="Grandeza", perdas_opcao="Não"):
+    """
+    Monta os trabalhos a partir dos relatórios .txt de uma pasta (e subpastas).
+
+    O tipo de cada relatório vem do conteúdo, e contrato e serial do cabeçalho.
+    Os relatórios são agrupados por contrato e, dentro dele, por serial; os
+    medidores ficam em ordem cronológica pela primeira data dos intervalos, e os
+    parâmetros de cálculo são os mesmos para todos. Retorna (trabalhos, avisos).
+    """
+    contratos = {}
+    inicios = {}
+    avisos = []
+    for raiz, pastas, arquivos in os.walk(pasta):
+        pastas.sort()
+        for nome in sorted(arquivos):
+            if not nome.lower().endswith(EXTENSOES_RELATORIO):
+                continue
+            caminho = os.path.join(raiz, nome)
+            texto = ler_texto_arquivo(caminho)
+            relatorio = identificar_relatorio(texto)
+            if relatorio is None:
+                avisos.append(f"{caminho}: relatório não reconhecido, ignorado.")
+                continue
+            info = ler_cabecalho(texto, faturamento=relatorio == 'faturamento')
+            if info['contrato'] == NAO_ENCONTRADO:
+                avisos.append(f"{caminho}: contrato não encontrado, ignorado.")
+                continue
+
+            medidores = contratos.setdefault(info['contrato'], {})
+            medidor = medidores.setdefault(info['serial'], {'serial': info['serial']})
+            if relatorio in medidor:
+                avisos.append(f"{caminho}: {relatorio} repetido para o serial {info['serial']}, ignorado.")
+                continue
+            medidor[relatorio] = caminho
+            data = primeira_data(texto.splitlines())
+            if data is not None:
+                chave = (info['contrato'], info['serial'])
+                inicios[chave] = min(data, inicios.get(chave, data))
+
+    trabalhos = []
+    for contrato, medidores in contratos.items():
+        # Medidores sem data (só faturamento) ficam por último, na ordem do serial
+        def ordem(medidor):
+            chave = (contrato, medidor['serial'])
+            return (chave not in inicios, inicios.get(chave, 0), medidor['serial'])
+
+        ordenados = sorted(medidores.values(), key=ordem)
+        for medidor in ordenados:
+            medidor.update(constante=constante, tipo=tipo_opcao, perdas=perdas_opcao)
+        trabalhos.append({'contrato': contrato, 'medidores': ordenados})
+    return trabalhos, avisos
+
+
+def ler_manifesto(caminho, constante=1.0, tipo_opcao="Grandeza", perdas_opcao="Não"):
+    """
+    Monta os trabalhos a partir de um manifesto CSV (separado por ';' ou ',').
+
+    Colunas: contrato e pelo menos uma de consumo, demanda ou faturamento (caminhos
+    relativos à pasta do manifesto); opcionais: serial, constante, tipo e perdas.
+    Cada linha é um medidor; linhas do mesmo contrato formam um trabalho, na ordem
+    do arquivo (medidor anterior primeiro). Retorna (trabalhos, avisos).
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=';,') if amostra.strip() else csv.excel
+        leitor = csv.DictReader(arquivo, dialect=dialeto)
+        colunas = {col.strip().lower() for col in leitor.fieldnames or []}
+        if 'contrato' not in colunas or not colunas & set(RELATORIOS):
+            raise ErroLote("O manifesto precisa da coluna 'contrato' e de ao menos uma entre consumo, demanda e faturamento.")
+        linhas = [{(k or '').strip().lower(): (v or '').strip() for k, v in linha.items()} for linha in leitor]
+
+    contratos = {}
+    avisos = []
+    for numero, linha in enumerate(linhas, start=2):
+        if not linha.get('contrato'):
+            avisos.append(f"{caminho}:{numero}: linha sem contrato, ignorada.")
+            continue
+        medidor = {
+            'serial': linha.get('serial') or NAO_ENCONTRADO,
+            'constante': _normalizar_constante(linha['constante']) if linha.get('constante') else constante,
+            'tipo': _normalizar_tipo(linha['tipo']) if linha.get('tipo') else tipo_opcao,
+            'perdas': _normalizar_perdas(linha['perdas']) if linha.get('perdas') else perdas_opcao,
+        }
+        for relatorio in RELATORIOS:
+            if linha.get(relatorio):
+                medidor[relatorio] = os.path.join(pasta, linha[relatorio])
+        contratos.setdefault(linha['contrato'], []).append(medidor)
+
+    trabalhos = [{'contrato': contrato, 'medidores': medidores} for contrato, medidores in contratos.items()]
+    return trabalhos, avisos
+
+
+def _dados_medidor(medidor):
+    """
+    Dados de um medidor e a fonte usada: os resultados (consumo, demanda) do
+    faturamento ou os DataFrames (consumo, demanda) dos relatórios de intervalos.
+    """
+    if medidor.get('faturamento'):
+        if medidor.get('consumo') or medidor.get('demanda'):
+            raise ErroLote("Informe faturamento ou consumo/demanda para o medidor, não ambos.")
+        return processar_dados_faturamento(ler_texto_arquivo(medidor['faturamento'])), 'faturamento'
+
+    dfs = []
+    for relatorio in ('consumo', 'demanda'):
+        texto = ler_texto_arquivo(medidor[relatorio]) if medidor.get(relatorio) else None
+        dfs.append(ler_relatorio_intervalos(texto) if texto else None)
+    return tuple(dfs), 'intervalos'
+
+
+def confirmar_contrato(trabalho):
+    """
+    Executa a confirmação de um contrato (um ou mais medidores) e retorna as
+    linhas da tabela consolidada. Roda nos processos do pool.
+    """
+    dados, fontes = [], set()
+    for medidor in trabalho['medidores']:
+        dado, fonte = _dados_medidor(medidor)
+        dados.append(dado)
+        fontes.add(fonte)
+    if len(fontes) > 1:
+        raise ErroLote("Medidores do mesmo contrato com relatórios de faturamento e de intervalos.")
+
+    parametros = [(m['constante'], m['tipo'], m['perdas']) for m in trabalho['medidores']]
+    fonte = fontes.pop()
+    if fonte == 'faturamento':
+        calculadas = calcular_grandezas(dados, parametros, GRANDEZAS_FATURAMENTO)
+    else:
+        calculadas = confirmar_medidores([con for con, _ in dados], [dem for _, dem in dados], parametros, GRANDEZAS_INTERVALOS)
+    linhas = []
+    for item, posto, medidores, sumarizacao in calculadas:
+        linha = {'Contrato': trabalho['contrato'], 'Fonte': fonte, 'Grandeza': item['label'], 'Posto Horário': posto}
+        for numero, (medidor, (valor, k_value, perdas_display, final)) in enumerate(zip(trabalho['medidores'], medidores), start=1):
+            linha[f'Serial ({numero})'] = medidor['serial']
+            linha[f'Valor calculado ({numero})'] = valor
+            linha[f'K ({numero})'] = k_value
+            linha[f'Perdas (%) ({numero})'] = perdas_display
+            linha[f'Valor final ({numero})'] = final
+        linha['Sumarização'] = sumarizacao
+        linhas.append(linha)
+    if not linhas:
+        raise ErroLote("Nenhum dado válido encontrado nos relatórios.")
+    return linhas
+
+
+def executar_lote(trabalhos, processos=None, ao_concluir=None):
+    """
+    Confirma todos os contratos num pool de processos e retorna as linhas na
+    ordem dos trabalhos. Um erro num contrato vira uma linha com a coluna Erro
+    preenchida, sem interromper os demais. `ao_concluir(trabalho, erro)` é
+    chamado a cada contrato terminado (útil para mostrar o progresso).
+    """
+    por_trabalho = [None] * len(trabalhos)
+
+    def registrar(indice, calcular):
+        erro = None
+        try:
+            por_trabalho[indice] = calcular()
+        except Exception as excecao:
+            erro = str(excecao) or type(excecao).__name__
+            por_trabalho[indice] = [{'Contrato': trabalhos[indice]['contrato'], 'Erro': erro}]
+        if ao_concluir:
+            ao_concluir(trabalhos[indice], erro)
+
+    if processos == 1 or len(trabalhos) <= 1:
+        for indice, trabalho in enumerate(trabalhos):
+            registrar(indice, lambda: confirmar_contrato(trabalho))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            futuros = {executor.submit(confirmar_contrato, trabalho): indice for indice, trabalho in enumerate(trabalhos)}
+            for futuro in as_completed(futuros):
+                registrar(futuros[futuro], futuro.result)
+    return [linha for linhas in por_trabalho for linha in linhas]
+
+
+def tabela_consolidada(linhas):
+    """
+    DataFrame com as colunas fixas, as de cada medidor (1, 2, ...) e a
+    sumarização. Os valores são arredondados às casas mostradas nas páginas,
+    sem o resíduo das somas em ponto flutuante (38342,33600000001).
+    """
+    num_medidores = max((int(col[len('Serial ('):-1]) for linha in linhas for col in linha if col.startswith('Serial (')), default=0)
+    colunas = ['Contrato', 'Fonte', 'Grandeza', 'Posto Horário']
+    for numero in range(1, num_medidores + 1):
+        colunas += [f'Serial ({numero})', f'Valor calculado ({numero})', f'K ({numero})', f'Perdas (%) ({numero})', f'Valor final ({numero})']
+    colunas += ['Sumarização', 'Erro']
+    df = pd.DataFrame(linhas, columns=colunas)
+    casas = colunas_medidores([str(numero) for numero in range(1, num_medidores + 1)])
+    return df.round({coluna: precisao for coluna, precisao in casas.items() if pd.api.types.is_numeric_dtype(df[coluna])})
+
+
+def gravar_tabela(df, caminho):
+    """Grava em XLSX (pela extensão) ou CSV no padrão brasileiro (';' e vírgula decimal)."""
+    if caminho.lower().endswith('.xlsx'):
+        from openpyxl import Workbook
+
+        from critcom.planilhas import adicionar_dataframe, salvar_planilha
+
+        wb = Workbook(write_only=True)
+        adicionar_dataframe(wb, 'Resultados', df)
+        salvar_planilha(wb, caminho)
+    else:
+        df.to_csv(caminho, index=False, sep=';', decimal=',', encoding='utf-8-sig')
@@ -0,0 +1,143 @@
+import numpy as np
+
+from critcom.agregacao import agregar_por_grupo, codificar_postos, operacao_da_coluna
+from critcom.confirmacao import (
+    GRANDEZAS_INTERVALOS, PERDAS_MULTIPLICADOR, PERDAS_PERCENTUAL, POSTOS_TABELA,
+)
+from critcom.leitura import COLUNAS_FIXAS, POSTOS_HORARIOS
+
+# --- CONFIRMAÇÃO COM N MEDIDORES ---
+# Os medidores são empilhados e agregados juntos: o grupo de cada intervalo é
+# medidor * 3 + posto, e uma única passagem de agregar_por_grupo devolve a
+# matriz medidores x postos x grandezas. K, perdas e sumarização são aplicados
+# sobre essa matriz, sem laços por célula.
+
+# Fator do K nas grandezas de demanda ("kW ...") por tipo de medição
+FATOR_TIPO = {"Grandeza": 1.0, "Grandeza EAC": 0.25, "Pulso": 4.0}
+# Posição de cada posto da tabela na matriz (ordem de POSTOS_HORARIOS)
+_INDICE_POSTOS_TABELA = [POSTOS_HORARIOS.index(posto) for posto in POSTOS_TABELA]
+
+
+def agregar_medidores(dfs, tipo_calculo='consumo'):
+    """
+    Agrega por posto os relatórios de vários medidores de uma vez.
+
+    `dfs` tem um DataFrame (ou None) por medidor. Retorna (valores, colunas,
+    presentes): `valores` é a matriz medidores x postos (POSTOS_HORARIOS) x
+    colunas, com 0.0 onde o medidor não tem a coluna, e `presentes` indica,
+    por medidor, quais colunas existiam no relatório.
+    """
+    colunas = []
+    for df in dfs:
+        if df is not None:
+            colunas += [col for col in df.columns if col not in COLUNAS_FIXAS and col not in colunas]
+    presentes = np.array([[df is not None and col in df.columns for col in colunas] for df in dfs], dtype=bool).reshape(len(dfs), len(colunas))
+
+    num_postos = len(POSTOS_HORARIOS)
+    grupos, blocos = [], []
+    for numero, df in enumerate(dfs):
+        if df is None or not colunas:
+            continue
+        codigos = codificar_postos(df['Posto Horario']).astype(np.int64)
+        grupos.append(np.where(codigos >= 0, numero * num_postos + codigos, -1))
+        blocos.append(df.reindex(columns=colunas).to_numpy(dtype=np.float64))
+
+    if not blocos:
+        return np.zeros((len(dfs), num_postos, len(colunas))), colunas, presentes
+    eh_maximo = [operacao_da_coluna(col, tipo_calculo) == 'máximo' for col in colunas]
+    matriz = agregar_por_grupo(np.concatenate(grupos), np.concatenate(blocos), eh_maximo, len(dfs) * num_postos)
+    return matriz.reshape(len(dfs), num_postos, len(colunas)), colunas, presentes
+
+
+def matriz_de_resultados(resultados, colunas):
+    """
+    Mesma matriz de agregar_medidores a partir dos dicionários de resultados já
+    agregados (relatório de faturamento ou recalcular_resultados), um por medidor.
+    """
+    valores = np.zeros((len(resultados), len(POSTOS_HORARIOS), len(colunas)))
+    presentes = np.zeros((len(resultados), len(colunas)), dtype=bool)
+    for numero, res in enumerate(resultados):
+        for j, coluna in enumerate(colunas):
+            if res and coluna in res:
+                presentes[numero, j] = True
+                por_posto = res[coluna]['valores']
+                valores[numero, :, j] = [por_posto.get(posto, 0.0) for posto in POSTOS_HORARIOS]
+    return valores, presentes
+
+
+def aplicar_parametros(valores, colunas, parametros):
+    """
+    Aplica K e perdas de cada medidor e sumariza entre medidores.
+
+    `parametros` tem um trio (constante, tipo, perdas) por medidor. Retorna
+    (k, perdas_display, finais, sumarizacao) com formas medidores x colunas,
+    medidores, medidores x postos x colunas e postos x colunas. Demandas e
+    DMCR ficam com o maior valor; as grandezas acumuladas são somadas.
+    """
+    eh_demanda = np.array([col.startswith("kW ") for col in colunas], dtype=bool)
+    constantes = np.array([constante for constante, _, _ in parametros], dtype=np.float64)
+    fatores = np.array([FATOR_TIPO.get(tipo, 1.0) for _, tipo, _ in parametros], dtype=np.float64)
+    com_perdas = np.array([perdas == "Sim" for _, _, perdas in parametros], dtype=bool)
+
+    k = np.where(eh_demanda[None, :], (constantes * fatores)[:, None], constantes[:, None])
+    perdas_display = np.where(com_perdas, PERDAS_PERCENTUAL, 0.0)
+    multiplicadores = np.where(com_perdas, PERDAS_MULTIPLICADOR, 1.0)
+    finais = valores * k[:, None, :] * multiplicadores[:, None, None]
+
+    eh_maximo = eh_demanda | np.array([col == "DMCR" for col in colunas], dtype=bool)
+    sumarizacao = np.where(eh_maximo[None, :], finais.max(axis=0), finais.sum(axis=0))
+    return k, perdas_display, finais, sumarizacao
+
+
+def _linhas_calculadas(grandezas, por_tipo, parametros):
+    """Linhas no formato de calcular_grandezas a partir das matrizes por tipo de relatório."""
+    linhas = []
+    calculados = {
+        tipo: (colunas, presentes, valores) + aplicar_parametros(valores, colunas, parametros)
+        for tipo, (valores, colunas, presentes) in por_tipo.items()
+    }
+    for item in grandezas:
+        colunas, presentes, valores, k, perdas_display, finais, sumarizacao = calculados[item['type']]
+        if item['key'] not in colunas:
+            continue
+        j = colunas.index(item['key'])
+        if not presentes[:, j].any():
+            continue
+        # Uma conversão para listas por grandeza; o restante é só indexação
+        valores_j = valores[:, _INDICE_POSTOS_TABELA, j].tolist()
+        finais_j = finais[:, _INDICE_POSTOS_TABELA, j].tolist()
+        k_j = k[:, j].tolist()
+        perdas_j = perdas_display.tolist()
+        sumarizacao_j = sumarizacao[_INDICE_POSTOS_TABELA, j].tolist()
+        for p, posto in enumerate(POSTOS_TABELA):
+            medidores = [
+                (valores_j[m][p], k_j[m], perdas_j[m], finais_j[m][p]) for m in range(len(parametros))
+            ]
+            linhas.append((item, posto, medidores, sumarizacao_j[p]))
+    return linhas
+
+
+def confirmar_medidores(consumos, demandas, parametros, grandezas=GRANDEZAS_INTERVALOS):
+    """
+    Confirmação de N medidores a partir dos DataFrames de intervalos.
+
+    `consumos` e `demandas` têm um DataFrame (ou None) por medidor e `parametros`
+    um trio (constante, tipo, perdas) por medidor, todos na mesma ordem. Retorna
+    as linhas no formato de calcular_grandezas.
+    """
+    por_tipo = {
+        'consumo': agregar_medidores(consumos, 'consumo'),
+        'demanda': agregar_medidores(demandas, 'demanda'),
+    }
+    return _linhas_calculadas(grandezas, por_tipo, parametros)
+
+
+def confirmar_resultados(resultados, parametros, grandezas=GRANDEZAS_INTERVALOS):
+    """Confirmação de N medidores a partir dos pares (consumo, demanda) já agregados."""
+    por_tipo = {}
+    for posicao, tipo in enumerate(('consumo', 'demanda')):
+        por_medidor = [par[posicao] for par in resultados]
+        colunas = list(dict.fromkeys(item['key'] for item in grandezas if item['type'] == tipo))
+        valores, presentes = matriz_de_resultados(por_medidor, colunas)
+        por_tipo[tipo] = (valores, colunas, presentes)
+    return _linhas_calculadas(grandezas, por_tipo, parametros)
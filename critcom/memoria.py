@@ -0,0 +1,68 @@
+import sys
+
+from critcom.cache import CACHE_LEITURA, tamanho_em_bytes
+
+# --- MEMÓRIA DAS SESSÕES ---
+# Estimativa dos bytes que cada sessão mantém no session_state: os textos
+# colados, os DataFrames de intervalos e os índices montados sobre eles. Os
+# DataFrames lidos vêm do cache de leitura e são os mesmos objetos para todas
+# as sessões que colaram o mesmo relatório; essa parte é informada à parte,
+# porque não se multiplica pelo número de sessões.
+
+
+def bytes_objeto(valor, vistos=None):
+    """
+    Bytes de um valor guardado na sessão: DataFrames e arrays pelo conteúdo,
+    coleções pelos itens e objetos (IndiceDemanda, por exemplo) pelos
+    atributos. Um objeto alcançado por mais de um caminho conta uma vez.
+    """
+    vistos = set() if vistos is None else vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    if valor is None or isinstance(valor, (str, bytes)) or hasattr(valor, 'memory_usage') or hasattr(valor, 'nbytes'):
+        return tamanho_em_bytes(valor)
+    if isinstance(valor, (tuple, list, set, frozenset)):
+        return sys.getsizeof(valor) + sum(bytes_objeto(item, vistos) for item in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(bytes_objeto(k, vistos) + bytes_objeto(v, vistos) for k, v in valor.items())
+    if hasattr(valor, '__dict__'):
+        return sys.getsizeof(valor) + bytes_objeto(vars(valor), vistos)
+    return sys.getsizeof(valor)
+
+
+def bytes_sessao(estado):
+    """
+    Bytes por chave do session_state (`estado`), dos maiores para os menores,
+    o total e quanto desse total é de valores do cache de leitura. Retorna
+    (lista de (chave, bytes), total, compartilhados).
+    """
+    do_cache = CACHE_LEITURA.ids_valores()
+    vistos = set()
+    por_chave, compartilhados = [], 0
+    for chave, valor in list(estado.items()):
+        tamanho = bytes_objeto(valor, vistos)
+        por_chave.append((chave, tamanho))
+        if id(valor) in do_cache:
+            compartilhados += tamanho
+    por_chave.sort(key=lambda item: -item[1])
+    return por_chave, sum(tamanho for _, tamanho in por_chave), compartilhados
+
+
+def formatar_bytes(tamanho):
+    """Tamanho legível, com vírgula decimal (1,5 MB)."""
+    if tamanho < 1024:
+        return f"{tamanho} B"
+    for unidade in ('KB', 'MB', 'GB'):
+        tamanho /= 1024
+        if tamanho < 1024 or unidade == 'GB':
+            return f"{tamanho:.1f} {unidade}".replace('.', ',')
+
+
+def resumo_memoria_sessao(estado):
+    """Uma linha com o total da sessão e a parte compartilhada com o cache de leitura."""
+    _, total, compartilhados = bytes_sessao(estado)
+    texto = f"Memória desta sessão: {formatar_bytes(total)}"
+    if compartilhados:
+        texto += f" ({formatar_bytes(compartilhados)} compartilhados com o cache de leitura)"
+    return texto + "."
@@ -0,0 +1,167 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from critcom.acervo import MedicaoSalva, carregar_intervalos
+from critcom.arquivos import chave_arquivo, inspecionar_arquivo, ler_arquivo_intervalos
+from critcom.cache import CACHE_LEITURA
+
+# --- LEITURA DOS RELATÓRIOS EM PARALELO ---
+# Os relatórios de uma confirmação são independentes: cada um vira uma tarefa
+# num pool de processos persistente (criado na primeira leitura e reaproveitado
+# pelas reexecuções e sessões seguintes). O cache de leitura é o do processo
+# principal: as fontes já lidas saem dele sem ir ao pool, e os resultados do
+# pool são guardados nele. Um relatório com erro não impede os demais; cada
+# leitura volta com o próprio tempo e a mensagem de erro, se houver.
+#
+# O processo que lê também monta o índice de completude e, com o tipo do
+# relatório, a agregação por posto: o processo principal só recebe o
+# DataFrame com os dois prontos.
+
+# Leitura de uma fonte: DataFrame (ou None), mensagem de erro (ou None), tempo
+# de leitura em segundos, origem ('cache', 'processo', 'local' ou 'vazio'),
+# índice de completude e resultados agregados por posto (no formato de
+# recalcular_resultados; None sem o tipo do relatório)
+Leitura = namedtuple('Leitura', 'df erro segundos origem completude resultados')
+
+# O Streamlit roda as sessões em threads: 'spawn' evita copiar o estado delas para os processos
+_CONTEXTO = multiprocessing.get_context('spawn')
+_AUSENTE = object()
+
+_executor = None
+_lock_executor = threading.Lock()
+
+
+def processos_padrao():
+    """Processos do pool: um por núcleo, ou o número em CRITCOM_PROCESSOS."""
+    return int(os.environ.get('CRITCOM_PROCESSOS', os.cpu_count() or 1))
+
+
+def _obter_executor():
+    global _executor
+    with _lock_executor:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=processos_padrao(), mp_context=_CONTEXTO)
+        return _executor
+
+
+def _descartar_executor():
+    """Descarta o pool depois que um processo morreu; o próximo uso cria outro."""
+    global _executor
+    with _lock_executor:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _ler_sem_cache(tarefa, tipo_calculo=None):
+    """
+    Lê uma fonte e retorna (df, erro, segundos, completude, resultados), com o
+    índice de completude e, se `tipo_calculo` for dado, a agregação por posto.
+    Roda nos processos do pool (ou no principal, sem pool), sem usar o cache:
+    ele fica no processo principal.
+    """
+    from critcom.agregacao import recalcular_resultados
+    from critcom.completude import indice_completude
+    from critcom.leitura import ler_linhas_intervalos
+
+    fonte, codificacao = tarefa
+    inicio = time.perf_counter()
+    try:
+        if isinstance(fonte, str):
+            df = ler_linhas_intervalos(fonte.splitlines())
+        elif isinstance(fonte, MedicaoSalva):
+            df = carregar_intervalos(*fonte)
+        else:
+            df = ler_arquivo_intervalos(io.BytesIO(fonte) if isinstance(fonte, bytes) else fonte, codificacao)
+        completude = indice_completude(df)
+        resultados = recalcular_resultados(df, tipo_calculo) if tipo_calculo else None
+        erro = None
+    except Exception as excecao:
+        df, completude, resultados, erro = None, None, None, str(excecao) or type(excecao).__name__
+    return df, erro, time.perf_counter() - inicio, completude, resultados
+
+
+def _preparar(fonte):
+    """Chave do cache (None para o acervo) e a tarefa de leitura da fonte."""
+    from critcom.leitura import ler_relatorio_intervalos
+
+    if isinstance(fonte, str):
+        return ler_relatorio_intervalos.chave(fonte), (fonte, None)
+    if isinstance(fonte, MedicaoSalva):
+        return None, (fonte, None)
+    hash_arquivo, codificacao = inspecionar_arquivo(fonte)
+    return chave_arquivo(hash_arquivo), (fonte, codificacao)
+
+
+def _para_o_pool(tarefa):
+    """Arquivos enviados não passam entre processos: vão os bytes."""
+    fonte, codificacao = tarefa
+    if isinstance(fonte, (str, MedicaoSalva)):
+        return tarefa
+    fonte.seek(0)
+    dados = fonte.read()
+    fonte.seek(0)
+    return dados, codificacao
+
+
+def ler_intervalos_paralelo(fontes, processos=None, tipos=None):
+    """
+    Lê várias fontes (texto colado, arquivo enviado ou MedicaoSalva) ao mesmo
+    tempo e retorna uma Leitura por fonte, na mesma ordem. `tipos` tem o tipo
+    de cada relatório ('consumo' ou 'demanda'), para a agregação por posto sair
+    junto com a leitura.
+
+    Com um único processo (ou uma única fonte fora do cache), a leitura é feita
+    no próprio processo, sem o custo de enviar os textos ao pool.
+    """
+    from critcom.agregacao import recalcular_resultados
+    from critcom.completude import indice_completude, registrar_completude
+
+    processos = processos or processos_padrao()
+    tipos = tipos or [None] * len(fontes)
+    leituras = [Leitura(None, None, 0.0, 'vazio', None, None)] * len(fontes)
+    pendentes = {}
+    for indice, fonte in enumerate(fontes):
+        if not fonte:
+            continue
+        chave, tarefa = _preparar(fonte)
+        if chave is not None:
+            valor = CACHE_LEITURA.obter(chave, _AUSENTE)
+            if valor is not _AUSENTE:
+                resultados = recalcular_resultados(valor, tipos[indice]) if tipos[indice] else None
+                leituras[indice] = Leitura(valor, None, 0.0, 'cache', indice_completude(valor), resultados)
+                continue
+        pendentes[indice] = (chave, tarefa)
+
+    lidos = {}
+    if processos > 1 and len(pendentes) > 1:
+        try:
+            executor = _obter_executor()
+            futuros = {
+                indice: executor.submit(_ler_sem_cache, _para_o_pool(tarefa), tipos[indice])
+                for indice, (_, tarefa) in pendentes.items()
+            }
+            for indice, futuro in futuros.items():
+                lidos[indice] = futuro.result() + ('processo',)
+        except BrokenProcessPool:
+            # Um processo morreu (falta de memória, por exemplo): o que faltou é lido aqui
+            _descartar_executor()
+    for indice, (_, tarefa) in pendentes.items():
+        if indice not in lidos:
+            lidos[indice] = _ler_sem_cache(tarefa, tipos[indice]) + ('local',)
+
+    for indice, (df, erro, segundos, completude, resultados, origem) in lidos.items():
+        chave = pendentes[indice][0]
+        if origem == 'processo':
+            # O índice veio pronto do outro processo: fica associado à cópia recebida
+            registrar_completude(df, completude)
+        if erro is None and chave is not None:
+            CACHE_LEITURA.guardar(chave, df)
+        leituras[indice] = Leitura(df, erro, segundos, origem, completude, resultados)
+    return leituras
@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from critcom.agregacao import codificar_postos, operacao_da_coluna
+from critcom.leitura import COLUNAS_FIXAS, POSTOS_HORARIOS
+
+# --- ÍNDICE PARA SUPRESSÃO DE PICOS DE DEMANDA ---
+
+TAMANHO_BLOCO = 256
+
+
+def _somas_compensadas(valores, num_blocos):
+    """
+    Soma de cada coluna por bloco de TAMANHO_BLOCO linhas, com a soma compensada de
+    Neumaier feita em todos os blocos de uma vez. Retorna (somas, resíduos): a soma
+    arredondada e o erro acumulado, que juntos representam a soma do bloco quase sem perda.
+    """
+    preenchido = np.zeros((num_blocos * TAMANHO_BLOCO, valores.shape[1]))
+    preenchido[:len(valores)] = valores
+    blocos = preenchido.reshape(num_blocos, TAMANHO_BLOCO, valores.shape[1])
+    somas = np.zeros((num_blocos, valores.shape[1]))
+    residuos = np.zeros_like(somas)
+    for posicao in range(TAMANHO_BLOCO):
+        parcela = blocos[:, posicao]
+        total = somas + parcela
+        maior = np.abs(somas) >= np.abs(parcela)
+        residuos += np.where(maior, (somas - total) + parcela, (parcela - total) + somas)
+        somas = total
+    return somas, residuos
+
+
+class IndiceDemanda:
+    """
+    Índice ordenado pela coluna de filtro (kW fornecido) dentro de cada posto horário.
+
+    Construído uma vez, logo após a leitura do relatório. Cada faixa do slider vira
+    duas buscas binárias por posto, e os resultados saem de estruturas pré-calculadas
+    por bloco de TAMANHO_BLOCO linhas: somas compensadas (valor e resíduo) para as
+    colunas somadas e máximos para as colunas de máximo. O DataFrame original não é
+    copiado nem filtrado.
+    """
+
+    def __init__(self, df, coluna_filtro='kW fornecido', tipo_calculo='demanda'):
+        self.coluna_filtro = coluna_filtro
+        self.colunas = [col for col in df.columns if col not in COLUNAS_FIXAS]
+        self.num_linhas = len(df)
+
+        chave = df[coluna_filtro].to_numpy(np.float64)
+        codigos = codificar_postos(df['Posto Horario'])
+        linhas = np.flatnonzero(~np.isnan(chave) & (codigos >= 0))
+        # Ordena por posto e, dentro do posto, pelo valor da coluna de filtro
+        self.ordem = linhas[np.lexsort((chave[linhas], codigos[linhas]))]
+        self.chave = chave[self.ordem]
+        codigos_ordenados = codigos[self.ordem]
+        grupos = np.arange(len(POSTOS_HORARIOS))
+        self.inicios = np.searchsorted(codigos_ordenados, grupos, side='left')
+        self.fins = np.searchsorted(codigos_ordenados, grupos, side='right')
+
+        valores = df[self.colunas].to_numpy(np.float64)[self.ordem]
+        eh_maximo = np.array([operacao_da_coluna(col, tipo_calculo) == 'máximo' for col in self.colunas], dtype=bool)
+        self._pos_filtro = self.colunas.index(coluna_filtro)
+        eh_maximo[self._pos_filtro] = False  # tratada à parte: já está ordenada
+        self._cols_soma = np.flatnonzero(~eh_maximo & (np.arange(len(self.colunas)) != self._pos_filtro))
+        self._cols_maximo = np.flatnonzero(eh_maximo)
+        self._filtro_e_maximo = operacao_da_coluna(coluna_filtro, tipo_calculo) == 'máximo'
+
+        num_blocos = -(-len(self.ordem) // TAMANHO_BLOCO)
+        # Colunas somadas e, por último, a coluna de filtro
+        self._somas = np.column_stack([np.nan_to_num(valores[:, self._cols_soma]), self.chave])
+        self._somas_bloco, self._residuos_bloco = _somas_compensadas(self._somas, num_blocos)
+
+        self._maximos = valores[:, self._cols_maximo]
+        preenchido = np.full((num_blocos * TAMANHO_BLOCO, len(self._cols_maximo)), np.nan)
+        preenchido[:len(self.ordem)] = self._maximos
+        self._maximos_bloco = np.fmax.reduce(
+            preenchido.reshape(num_blocos, TAMANHO_BLOCO, -1), axis=1
+        ) if num_blocos else preenchido[:0]
+
+    @property
+    def vazio(self):
+        return len(self.ordem) == 0
+
+    @property
+    def limites(self):
+        """Menor e maior valor da coluna de filtro (sem NaN)."""
+        return float(np.min(self.chave)), float(np.max(self.chave))
+
+    def _faixas(self, minimo, maximo):
+        """Posições [início, fim) dentro de cada posto para a faixa pedida."""
+        faixas = []
+        for inicio, fim in zip(self.inicios, self.fins):
+            chave_posto = self.chave[inicio:fim]
+            a = inicio if minimo is None else inicio + np.searchsorted(chave_posto, minimo, side='left')
+            b = fim if maximo is None else inicio + np.searchsorted(chave_posto, maximo, side='right')
+            faixas.append((a, max(a, b)))
+        return faixas
+
+    def _soma_intervalo(self, a, b):
+        """
+        Soma de cada coluna somada (e da coluna de filtro, a última) em [a, b): math.fsum
+        das pontas e das somas e resíduos dos blocos inteiros. Diferenças de somas
+        prefixadas perderiam dígitos em relação à soma das linhas filtradas.
+        """
+        bloco_a = -(-a // TAMANHO_BLOCO)
+        bloco_b = b // TAMANHO_BLOCO
+        if bloco_a >= bloco_b:
+            partes = [self._somas[a:b]]
+        else:
+            partes = [
+                self._somas[a:bloco_a * TAMANHO_BLOCO],
+                self._somas_bloco[bloco_a:bloco_b],
+                self._residuos_bloco[bloco_a:bloco_b],
+                self._somas[bloco_b * TAMANHO_BLOCO:b],
+            ]
+        return np.array([math.fsum(coluna) for coluna in np.vstack(partes).T.tolist()])
+
+    def _maximo_intervalo(self, a, b):
+        """Máximo de cada coluna de máximo em [a, b), combinando blocos inteiros e pontas."""
+        bloco_a = -(-a // TAMANHO_BLOCO)
+        bloco_b = b // TAMANHO_BLOCO
+        if bloco_a >= bloco_b:
+            partes = [self._maximos[a:b]]
+        else:
+            partes = [
+                self._maximos[a:bloco_a * TAMANHO_BLOCO],
+                self._maximos_bloco[bloco_a:bloco_b],
+                self._maximos[bloco_b * TAMANHO_BLOCO:b],
+            ]
+        resultado = np.fmax.reduce(np.vstack(partes), axis=0)
+        return np.nan_to_num(resultado, nan=0.0)
+
+    def agregar(self, minimo=None, maximo=None):
+        """
+        Resultados por posto considerando só as linhas com a coluna de filtro em
+        [minimo, maximo]. Mesmo formato de agregacao.agregar_por_posto.
+        """
+        matriz = np.zeros((len(POSTOS_HORARIOS), len(self.colunas)))
+        for posto, (a, b) in enumerate(self._faixas(minimo, maximo)):
+            if b == a:
+                continue
+            somas = self._soma_intervalo(a, b)
+            matriz[posto, self._cols_soma] = somas[:-1]
+            if len(self._cols_maximo):
+                matriz[posto, self._cols_maximo] = self._maximo_intervalo(a, b)
+            matriz[posto, self._pos_filtro] = self.chave[b - 1] if self._filtro_e_maximo else somas[-1]
+        return pd.DataFrame(matriz, index=list(POSTOS_HORARIOS), columns=self.colunas)
+
+    def mascara(self, minimo=None, maximo=None):
+        """Máscara booleana sobre as linhas do DataFrame original para a faixa pedida."""
+        mascara = np.zeros(self.num_linhas, dtype=bool)
+        for a, b in self._faixas(minimo, maximo):
+            mascara[self.ordem[a:b]] = True
+        return mascara
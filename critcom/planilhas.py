@@ -0,0 +1,226 @@
+import datetime
+import io
+import re
+import weakref
+import zipfile
+from xml.sax.saxutils import escape
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+# --- EXPORTAÇÃO EM XLSX ---
+# As planilhas são geradas no modo write-only do openpyxl: as linhas vão direto
+# para o arquivo temporário de cada aba. Os valores saem numéricos, com o formato de exibição na célula
+# (o Excel mostra os separadores conforme o idioma do usuário).
+#
+# As abas de DataFrames (intervalos brutos, tabela do lote) têm centenas de
+# milhares de células, e o custo por célula do openpyxl domina o tempo. Nelas o
+# openpyxl escreve só o cabeçalho; as linhas são montadas como XML, coluna a
+# coluna, e entram no arquivo ao salvar (salvar_planilha), no lugar do fim do
+# <sheetData> da aba.
+
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_LIMITE_NOME_ABA = 31
+_CARACTERES_INVALIDOS_ABA = re.compile(r"[\[\]:*?/\\]")
+_FONTE_NEGRITO = Font(bold=True)
+_FUNDO_SEPARADOR = PatternFill('solid', fgColor='E8E8E8')
+_LARGURA_DATA = 17
+# 30/12/1899, o dia 0 das datas do Excel (as datas batem com as do openpyxl de março de 1900 em diante)
+_EPOCA_EXCEL_NS = -2209161600 * 10**9
+_NS_POR_DIA = 86400 * 10**9
+_LINHAS_POR_BLOCO = 10000
+_DATA_MODELO = datetime.datetime(2000, 1, 1)
+# Abas com linhas a escrever ao salvar: pasta de trabalho -> [(aba, DataFrame)]
+_ABAS_PENDENTES = weakref.WeakKeyDictionary()
+
+
+def formato_numero(casas):
+    """Formato de exibição com separador de milhar e `casas` decimais."""
+    return '#,##0' + ('.' + '0' * casas if casas else '')
+
+
+def nome_aba(titulo, usados=()):
+    """Nome válido e único de aba (até 31 caracteres, sem []:*?/\\)."""
+    base = _CARACTERES_INVALIDOS_ABA.sub('-', str(titulo))[:_LIMITE_NOME_ABA] or 'Planilha'
+    nome, numero = base, 2
+    while nome in usados:
+        sufixo = f" ({numero})"
+        nome = base[:_LIMITE_NOME_ABA - len(sufixo)] + sufixo
+        numero += 1
+    return nome
+
+
+def _celula(ws, valor, fonte=None, preenchimento=None, formato=None):
+    celula = WriteOnlyCell(ws, value=valor)
+    if fonte is not None:
+        celula.font = fonte
+    if preenchimento is not None:
+        celula.fill = preenchimento
+    if formato is not None:
+        celula.number_format = formato
+    return celula
+
+
+def _cabecalho(ws, colunas):
+    ws.append([_celula(ws, coluna, fonte=_FONTE_NEGRITO) for coluna in colunas])
+
+
+def adicionar_resultados(wb, table_data, casas_por_coluna, titulo='Resultados'):
+    """
+    Aba com a tabela de resultados (as linhas de linhas_um_medidor ou
+    linhas_medidores, ainda numéricas). As linhas '--- grandeza ---' viram
+    linhas de destaque com o nome da grandeza.
+    """
+    ws = wb.create_sheet(nome_aba(titulo, wb.sheetnames))
+    colunas = list(dict.fromkeys(coluna for linha in table_data for coluna in linha))
+    formatos = {coluna: formato_numero(casas) for coluna, casas in casas_por_coluna.items()}
+    _cabecalho(ws, colunas)
+    for linha in table_data:
+        rotulo = str(linha.get(colunas[0], ''))
+        if rotulo.startswith('---'):
+            ws.append([_celula(ws, rotulo.strip('- '), fonte=_FONTE_NEGRITO, preenchimento=_FUNDO_SEPARADOR)])
+            continue
+        celulas = []
+        for coluna in colunas:
+            valor = linha.get(coluna)
+            if isinstance(valor, (int, float)) and coluna in formatos:
+                celulas.append(_celula(ws, None if valor != valor else valor, formato=formatos[coluna]))
+            else:
+                celulas.append(None if valor == '' else valor)
+        ws.append(celulas)
+    return ws
+
+
+def _texto_xml(texto):
+    texto = escape(ILLEGAL_CHARACTERS_RE.sub('', texto))
+    if texto != texto.strip():
+        return f'<is><t xml:space="preserve">{texto}</t></is></c>'
+    return f'<is><t>{texto}</t></is></c>'
+
+
+def _celulas_coluna(serie, estilo_data):
+    """
+    XML de cada célula de uma coluna, sem o começo '<c r="A2"' (que depende da
+    linha): um array de objetos com '' nas células vazias (NaN, NaT, None).
+    """
+    import numpy as np
+    import pandas as pd
+
+    tipo = serie.dtype
+    vazias = serie.isna().to_numpy()
+    if tipo.kind == 'M':
+        nanossegundos = serie.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        dias = (nanossegundos - _EPOCA_EXCEL_NS) / _NS_POR_DIA
+        valores = [f' s="{estilo_data}"><v>{dia!r}</v></c>' for dia in dias.tolist()]
+    elif tipo.kind == 'f':
+        numeros = serie.to_numpy()
+        vazias = vazias | ~np.isfinite(numeros)
+        valores = [f'><v>{numero!r}</v></c>' for numero in numeros.tolist()]
+    elif tipo.kind in 'iu':
+        valores = [f'><v>{numero}</v></c>' for numero in serie.to_numpy().tolist()]
+    elif tipo.kind == 'b':
+        valores = [f' t="b"><v>{int(valor)}</v></c>' for valor in serie.to_numpy().tolist()]
+    elif isinstance(tipo, pd.CategoricalDtype):
+        # Poucas categorias: cada uma é escapada uma vez
+        categorias = np.array([' t="inlineStr">' + _texto_xml(str(valor)) for valor in tipo.categories] + [''], dtype=object)
+        return categorias[serie.cat.codes.to_numpy()]
+    else:
+        valores = ['' if vazia else ' t="inlineStr">' + _texto_xml(str(valor)) for valor, vazia in zip(serie.tolist(), vazias)]
+    valores = np.array(valores, dtype=object)
+    valores[vazias] = ''
+    return valores
+
+
+def _linhas_xml(df, estilo_data):
+    """
+    Blocos de texto com os <row> do DataFrame, a partir da linha 2 (a 1 é o
+    cabeçalho). Cada bloco de _LINHAS_POR_BLOCO linhas é montado à parte, e a
+    memória não cresce com o número de intervalos.
+    """
+    import numpy as np
+
+    letras = [get_column_letter(posicao + 1) for posicao in range(len(df.columns))]
+    for inicio in range(0, len(df), _LINHAS_POR_BLOCO):
+        bloco = df.iloc[inicio:inicio + _LINHAS_POR_BLOCO]
+        numeros = np.array([str(numero) for numero in range(inicio + 2, inicio + len(bloco) + 2)], dtype=object)
+        linhas = '<row r="' + numeros + '">'
+        for posicao, letra in enumerate(letras):
+            celulas = _celulas_coluna(bloco.iloc[:, posicao], estilo_data)
+            preenchidas = celulas != ''
+            linhas[preenchidas] += '<c r="' + letra + numeros[preenchidas] + '"' + celulas[preenchidas]
+        yield ''.join((linhas + '</row>').tolist())
+
+
+def adicionar_dataframe(wb, titulo, df):
+    """
+    Aba com um DataFrame inteiro (intervalos brutos ou a tabela do lote). O
+    openpyxl escreve o cabeçalho; as linhas, montadas como XML coluna a coluna,
+    entram no arquivo em salvar_planilha.
+    """
+    ws = wb.create_sheet(nome_aba(titulo, wb.sheetnames))
+    for posicao, coluna in enumerate(df.columns):
+        if df[coluna].dtype.kind == 'M':
+            ws.column_dimensions[get_column_letter(posicao + 1)].width = _LARGURA_DATA
+    _cabecalho(ws, [str(coluna) for coluna in df.columns])
+    if len(df):
+        _ABAS_PENDENTES.setdefault(wb, []).append((ws, df))
+    return ws
+
+
+def _completar_abas(conteudo, pendentes, estilo_data):
+    """Bytes do .xlsx salvo pelo openpyxl com as linhas das abas pendentes."""
+    por_caminho = {ws.path.lstrip('/'): df for ws, df in pendentes}
+    saida = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(conteudo)) as origem, \
+            zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as destino:
+        for item in origem.infolist():
+            dados = origem.read(item.filename)
+            if item.filename not in por_caminho:
+                destino.writestr(item, dados)
+                continue
+            df = por_caminho[item.filename]
+            antes, fim, depois = dados.decode('utf-8').rpartition('</sheetData>')
+            with destino.open(item.filename, 'w', force_zip64=True) as xml:
+                xml.write(antes.encode('utf-8'))
+                for bloco in _linhas_xml(df, estilo_data):
+                    xml.write(bloco.encode('utf-8'))
+                xml.write((fim + depois).encode('utf-8'))
+    return saida.getvalue()
+
+
+def salvar_planilha(wb, destino=None):
+    """Grava no caminho ou arquivo `destino`; sem destino, retorna os bytes do .xlsx."""
+    pendentes = _ABAS_PENDENTES.pop(wb, None)
+    if pendentes:
+        # O estilo de data do openpyxl, registrado antes de salvar para entrar no styles.xml
+        estilo_data = WriteOnlyCell(pendentes[0][0], value=_DATA_MODELO).style_id
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    conteudo = buffer.getvalue()
+    if pendentes:
+        conteudo = _completar_abas(conteudo, pendentes, estilo_data)
+    if destino is None:
+        return conteudo
+    if hasattr(destino, 'write'):
+        destino.write(conteudo)
+    else:
+        with open(destino, 'wb') as arquivo:
+            arquivo.write(conteudo)
+    return None
+
+
+def planilha_confirmacao(table_data, casas_por_coluna, intervalos=()):
+    """
+    Bytes do .xlsx da confirmação: a aba de resultados e uma aba por relatório
+    de intervalos em `intervalos`, uma sequência de (título, DataFrame ou None).
+    """
+    wb = Workbook(write_only=True)
+    adicionar_resultados(wb, table_data, casas_por_coluna)
+    for titulo, df in intervalos:
+        if df is not None:
+            adicionar_dataframe(wb, titulo, df)
+    return salvar_planilha(wb)
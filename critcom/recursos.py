@@ -0,0 +1,39 @@
+# --- BIBLIOTECAS JAVASCRIPT DO DIÁLOGO DE RESULTADOS ---
+# Versões fixas, carregadas da CDN. Como a versão faz parte da URL, o navegador
+# mantém os arquivos em cache entre aberturas do diálogo e recebe sempre o
+# mesmo código. Sem acesso às CDNs, os gráficos em Plotly (WebGL) continuam
+# funcionando: o plotly.js vem do pacote Python, servido pelo próprio app.
+
+BIBLIOTECAS = {
+    'html2canvas': {
+        'versao': '1.4.1',
+        'cdn': 'https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js',
+    },
+    'chart.js': {
+        'versao': '4.4.1',
+        'cdn': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js',
+    },
+    'chartjs-adapter-date-fns': {
+        'versao': '3.0.0',
+        'cdn': 'https://cdn.jsdelivr.net/npm/chartjs-adapter-date-fns@3.0.0/dist/chartjs-adapter-date-fns.bundle.min.js',
+    },
+    'chartjs-plugin-zoom': {
+        'versao': '2.0.1',
+        'cdn': 'https://cdn.jsdelivr.net/npm/chartjs-plugin-zoom@2.0.1/dist/chartjs-plugin-zoom.min.js',
+    },
+}
+
+# Ordem de carregamento: o adaptador e o plugin dependem do Chart.js
+SCRIPTS_GRAFICOS = ('html2canvas', 'chart.js', 'chartjs-adapter-date-fns', 'chartjs-plugin-zoom')
+
+# Gráficos do diálogo, escolhidos em cada página: Chart.js com os scripts acima,
+# ou Plotly com WebGL (critcom.graficos_plotly), que vem do pacote Python e fica
+# fluido com séries longas ou muitos medidores.
+GRAFICOS_CHARTJS = 'Chart.js'
+GRAFICOS_PLOTLY = 'Plotly (WebGL)'
+OPCOES_GRAFICOS = (GRAFICOS_CHARTJS, GRAFICOS_PLOTLY)
+
+
+def tags_scripts(*nomes):
+    """Tags <script> das bibliotecas pedidas, na ordem informada."""
+    return '\n'.join(f'<script src="{BIBLIOTECAS[nome]["cdn"]}"></script>' for nome in nomes)
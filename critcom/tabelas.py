@@ -0,0 +1,45 @@
+# --- TABELAS HTML DOS DIÁLOGOS DE RESULTADOS ---
+
+COLUNAS_MEDIDOR = ['Valor', 'K', 'Perdas (%)', 'Valor Final']
+
+
+def _corpo_html(df_resultados, colunas_borda=()):
+    """
+    Linhas da tabela; as que começam com '---' viram separadores de grandeza.
+    Os modelos de linha são montados uma vez e o corpo sai de um único join.
+    """
+    num_colunas = len(df_resultados.columns)
+    modelo_linha = "<tr>" + "".join(
+        '<td class="thick-border-right">{}</td>' if i in colunas_borda else '<td>{}</td>' for i in range(num_colunas)
+    ) + "</tr>"
+    modelo_separador = f'<tr class="separator-row"><td colspan="{num_colunas}">{{}}</td></tr>'
+    linhas = [
+        modelo_separador.format(row[0]) if str(row[0]).startswith('---') else modelo_linha.format(*row)
+        for row in df_resultados.itertuples(index=False, name=None)
+    ]
+    return "<tbody>" + "".join(linhas) + "</tbody>"
+
+
+def tabela_html_um_medidor(df_resultados):
+    """Tabela de resultados de um medidor, com o cabeçalho das próprias colunas."""
+    header_html = "<thead><tr>" + "".join(f'<th>{col_name}</th>' for col_name in df_resultados.columns) + "</tr></thead>"
+    return f"<table>{header_html}{_corpo_html(df_resultados)}</table>"
+
+
+def tabela_html_medidores(df_resultados, titulos):
+    """Tabela de resultados com um grupo de colunas por medidor (`titulos`) e a sumarização."""
+    header_html = "<thead>"
+    header_html += '<tr><th rowspan="2">Posto Horário</th>'
+    header_html += "".join(f'<th colspan="{len(COLUNAS_MEDIDOR)}" style="text-align: center;">{titulo}</th>' for titulo in titulos)
+    header_html += '<th rowspan="2">Sumarização</th></tr>'
+    header_html += "<tr>"
+    header_html += "".join(f'<th>{name}</th>' for _ in titulos for name in COLUNAS_MEDIDOR)
+    header_html += "</tr></thead>"
+    # Bordas grossas depois do "Valor final" de cada medidor
+    colunas_borda = tuple(len(COLUNAS_MEDIDOR) * numero for numero in range(1, len(titulos) + 1))
+    return f"<table>{header_html}{_corpo_html(df_resultados, colunas_borda=colunas_borda)}</table>"
+
+
+def tabela_html_dois_medidores(df_resultados, serial_antigo, serial_novo):
+    """Tabela de resultados com medidor anterior, medidor novo e sumarização."""
+    return tabela_html_medidores(df_resultados, [f"Medidor Anterior ({serial_antigo})", f"Medidor Novo ({serial_novo})"])
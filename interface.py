@@ -0,0 +1,366 @@
+"""
+Trechos da interface repetidos nas páginas do CRITCOM.
+
+Fica fora do pacote critcom, que não importa o Streamlit, e fora da pasta
+pages, onde cada arquivo vira uma página. O Streamlit põe a pasta do Inicio.py
+no sys.path, então as páginas usam `import interface`.
+"""
+import datetime
+from collections import namedtuple
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+import critcom
+
+# --- Postos horários pelo calendário tarifário (critcom.calendario) ---
+def escolher_calendario(expandido=False):
+    """Classificador do calendário escolhido para recalcular os postos e comparar os resultados, ou None."""
+    with st.expander("🗓️ Comparar com os postos do calendário tarifário", expanded=expandido):
+        try:
+            calendarios = critcom.carregar_calendarios()
+        except critcom.ErroCalendario as erro:
+            st.error(str(erro))
+            return None
+        if not calendarios:
+            st.info("Nenhum calendário configurado.")
+            return None
+        comparar = st.checkbox("Recalcular os postos pelo calendário e mostrar os dois resultados", key="comparar_postos")
+        nome = st.selectbox("Calendário:", list(calendarios), key="calendario_postos")
+        st.caption(critcom.descrever_calendario(calendarios[nome]))
+    return critcom.ClassificadorPostos(calendarios[nome]) if comparar else None
+
+
+def reclassificar(classificador, df):
+    """DataFrame com os postos do calendário e o número de intervalos que mudaram de posto."""
+    return (None, 0) if df is None else classificador.reclassificar(df)
+
+
+def mostrar_comparacao(comparacao):
+    """Resultados com os postos do relatório e com os do calendário, lado a lado."""
+    if comparacao is None:
+        return
+    resumo, df_comparacao = comparacao
+    st.markdown("**Postos recalculados pelo calendário tarifário**")
+    st.caption(resumo)
+    st.dataframe(df_comparacao, hide_index=True)
+
+# --- Completude dos intervalos (índice montado na leitura, em critcom.completude) ---
+def mostrar_completude(relatorios):
+    """Intervalos esperados e presentes de cada relatório (título, DataFrame), com lacunas e repetições."""
+    indices = [(titulo, critcom.indice_completude(df)) for titulo, df in relatorios if df is not None]
+    if not indices:
+        return
+    incompletos = [titulo for titulo, indice in indices if not critcom.serie_completa(indice)]
+    if incompletos:
+        st.warning(
+            f"Intervalos faltando ou repetidos em: {', '.join(incompletos)}. "
+            "As somas usam só os intervalos presentes, e os repetidos entram mais de uma vez."
+        )
+    formato_data = {
+        coluna: st.column_config.DatetimeColumn(coluna, format="DD/MM/YYYY HH:mm")
+        for coluna in ('Início', 'Fim', 'DataHora')
+    }
+    formato_data['Dia'] = st.column_config.DatetimeColumn('Dia', format="DD/MM/YYYY")
+    with st.expander("Completude dos intervalos", expanded=bool(incompletos)):
+        for titulo, indice in indices:
+            st.markdown(f"**{titulo}:** {critcom.resumo_completude(indice)}")
+            if critcom.serie_completa(indice):
+                continue
+            for legenda, tabela in critcom.tabelas_completude(indice).items():
+                st.caption(legenda)
+                st.dataframe(tabela, hide_index=legenda != "Por posto", column_config=formato_data)
+
+# --- Entrada dos relatórios: texto colado ou arquivo exportado ---
+def campo_relatorio(rotulo, placeholder, key, height, relatorio=None, medicoes_salvas=()):
+    """
+    Área de texto para colar o relatório, envio do arquivo (.txt/.csv) e, com
+    `medicoes_salvas`, escolha de uma medição do acervo. O arquivo, quando
+    enviado, tem preferência: é lido em blocos e não passa pelo estado do
+    widget; depois vem a medição salva.
+    """
+    versao = st.session_state.get('versao_arquivos', 0)
+    texto = st.text_area(rotulo, height=height, placeholder=placeholder, key=key)
+    arquivo = st.file_uploader("ou envie o arquivo:", type=["txt", "csv"], key=f"arquivo_{key}_{versao}")
+    salva = medicao_salva(relatorio, [m for m in medicoes_salvas if m['relatorio'] == relatorio], f"salva_{key}_{versao}")
+    if arquivo is not None:
+        return arquivo
+    return salva if salva is not None else texto
+
+
+def limpar_arquivos():
+    # O file_uploader não pode ser limpo pelo session_state; uma nova chave recria o widget
+    st.session_state.versao_arquivos = st.session_state.get('versao_arquivos', 0) + 1
+
+# --- Medições guardadas no acervo (critcom.acervo) ---
+def medicao_salva(relatorio, medicoes, key):
+    """Medidor e período de um relatório guardado no acervo (critcom.acervo), ou None."""
+    if not medicoes:
+        return None
+    por_medidor = {(m['contrato'], m['serial']): m for m in medicoes}
+    with st.expander("ou use uma medição salva"):
+        escolhido = st.selectbox(
+            "Contrato / serial:", [None, *por_medidor], key=key,
+            format_func=lambda chave: "Nenhuma" if chave is None else f"{chave[0]} / {chave[1]}",
+        )
+        if escolhido is None:
+            return None
+        medicao = por_medidor[escolhido]
+        primeiro, ultimo = dias_intervalos(medicao['inicio'], medicao['fim'])
+        periodo = st.date_input(
+            "Período:", value=(primeiro, ultimo), min_value=primeiro, max_value=ultimo, format="DD/MM/YYYY", key=f"periodo_{key}",
+        )
+    if len(periodo) != 2:
+        periodo = (primeiro, ultimo)
+    return critcom.MedicaoSalva(medicao['contrato'], medicao['serial'], relatorio, *instantes_periodo(periodo))
+
+
+def dias_intervalos(inicio, fim):
+    """Primeiro e último dia cobertos pelos intervalos que terminam entre `inicio` e `fim`."""
+    # Os intervalos são marcados pelo fim: o de 00:00 pertence ao dia anterior
+    return (inicio - datetime.timedelta(minutes=1)).date(), (fim - datetime.timedelta(minutes=1)).date()
+
+
+def instantes_periodo(periodo):
+    """Primeiro e último instante (inclusivos) dos intervalos dos dias do `periodo` (primeiro dia, último dia)."""
+    inicio = datetime.datetime.combine(periodo[0], datetime.time()) + datetime.timedelta(minutes=1)
+    fim = datetime.datetime.combine(periodo[1], datetime.time()) + datetime.timedelta(days=1)
+    return inicio, fim
+
+
+def opcao_acervo():
+    """Caixa que liga a gravação dos relatórios lidos no acervo (desmarcada, salvo CRITCOM_GUARDAR_ACERVO=1)."""
+    st.checkbox(
+        "Guardar os relatórios lidos no acervo", value=critcom.GUARDAR_ACERVO_PADRAO, key="guardar_acervo",
+        help="Ao calcular, os relatórios com contrato e serial ficam guardados neste servidor para serem reabertos depois.",
+    )
+    avisos_acervo()
+
+
+def guardar_no_acervo(fonte, relatorio, df):
+    """
+    Agenda a gravação do relatório lido no acervo, se a caixa estiver marcada.
+    A gravação roda fora desta execução; uma falha aparece na próxima (avisos_acervo).
+    """
+    if not st.session_state.get('guardar_acervo', critcom.GUARDAR_ACERVO_PADRAO):
+        return
+    futuro = critcom.agendar_relatorio(fonte, relatorio, df)
+    if futuro is not None:
+        st.session_state.setdefault('gravacoes_acervo', []).append(futuro)
+
+
+def avisos_acervo():
+    """Mostra os erros das gravações no acervo já terminadas; as pendentes continuam na sessão."""
+    pendentes = []
+    for futuro in st.session_state.get('gravacoes_acervo', []):
+        if not futuro.done():
+            pendentes.append(futuro)
+        elif futuro.exception() is not None:
+            st.warning(str(futuro.exception()))
+    st.session_state.gravacoes_acervo = pendentes
+
+
+# --- Gráficos do diálogo: (rótulo, que é também a coluna do relatório, e cor) ---
+SERIES_CONSUMO = [
+    ('kWh fornecido', 'rgb(75, 192, 192)'),
+    ('kWh recebido', 'rgb(255, 99, 132)'),
+]
+SERIES_DEMANDA = [
+    ('kW fornecido', 'rgb(54, 162, 235)'),
+    ('kW recebido', 'rgb(255, 159, 64)'),
+    ('DMCR', 'rgb(153, 102, 255)'),
+    ('UFER', 'rgb(75, 192, 75)'),
+]
+# Gráficos montados guardados na sessão; acima disso, sai o mais antigo
+MAX_GRAFICOS_MONTADOS = 8
+
+
+def grafico_montado(chave, montar):
+    """Gráfico já montado nesta sessão (HTML do Chart.js ou figura do Plotly), ou montado agora por `montar()`."""
+    montados = st.session_state.setdefault('graficos_montados', {})
+    if chave not in montados:
+        montados[chave] = montar()
+        while len(montados) > MAX_GRAFICOS_MONTADOS:
+            del montados[next(iter(montados))]
+    return montados[chave]
+
+
+def escolher_janela(dfs, key):
+    """
+    Período cujos pontos originais vão ao gráfico, quando algum relatório é
+    longo demais para ir inteiro (critcom.serie_reduzida); None para o período todo.
+    """
+    if not any(critcom.serie_reduzida(df) for df in dfs):
+        return None
+    primeiro, ultimo = dias_intervalos(min(df['DataHora'].min() for df in dfs), max(df['DataHora'].max() for df in dfs))
+    periodo = st.date_input(
+        "Período com todos os pontos:", value=(primeiro, ultimo), min_value=primeiro, max_value=ultimo,
+        format="DD/MM/YYYY", key=key,
+        help="No período todo, o gráfico mostra o menor e o maior valor de cada trecho. "
+             "Escolha um período mais curto para receber todos os pontos dele.",
+    )
+    if len(periodo) != 2 or tuple(periodo) == (primeiro, ultimo):
+        return None
+    return instantes_periodo(periodo)
+
+
+@st.fragment
+def mostrar_graficos(perfil, paineis, usar_plotly, altura=520, altura_copia=750):
+    """
+    Gráficos do diálogo sob demanda, no formato de critcom.figura_intervalos:
+    cada expander só monta e envia o seu gráfico quando é aberto, e abrir ou
+    fechar reexecuta só este trecho. Com o Plotly, os painéis ficam numa única
+    figura, com o eixo x compartilhado.
+    """
+    if usar_plotly:
+        series = {
+            f"{titulo} - {rotulo}": (df, coluna, *mascara)
+            for titulo, series_painel in paineis for rotulo, _, df, coluna, *mascara in series_painel
+        }
+        with st.expander("📈 Gráficos", key="grafico_plotly", on_change="rerun") as expander:
+            if expander.open:
+                def montar_figura():
+                    with perfil.trecho("Figura Plotly", linhas=sum(len(df) for df, *_ in series.values() if df is not None)):
+                        return critcom.figura_intervalos(paineis)
+
+                figura = grafico_montado(('plotly', critcom.assinatura_series(series)), montar_figura)
+                if figura is None:
+                    st.caption("Sem dados para os gráficos.")
+                else:
+                    with perfil.trecho("st.plotly_chart", dados=figura):
+                        st.plotly_chart(figura, config=critcom.CONFIG_PLOTLY)
+        perfil.gravar()
+        return
+
+    for numero, (titulo, series_painel) in enumerate(paineis):
+        series = {rotulo: (df, coluna, *mascara) for rotulo, _, df, coluna, *mascara in series_painel}
+        with st.expander(f"📈 {titulo}", key=f"grafico_{numero}", on_change="rerun") as expander:
+            if not expander.open:
+                continue
+            janela = escolher_janela([df for df, *_ in series.values() if df is not None], f"janela_grafico_{numero}")
+
+            def montar():
+                with perfil.trecho(f"Pacote do gráfico ({titulo})") as medicao:
+                    pacote = critcom.pacote_graficos(series, janela=janela)
+                    legendas = [(rotulo, rotulo, cor) for rotulo, cor, *_ in series_painel]
+                    # Com a medição desligada, o trecho descarta o que recebe: o HTML sai por variável própria
+                    html_grafico = medicao.dados = critcom.html_grafico(titulo, pacote, legendas, altura_copia) if pacote['series'] else None
+                    medicao.linhas = sum(len(df) for df, *_ in series.values() if df is not None)
+                return html_grafico
+
+            conteudo = grafico_montado(('chartjs', titulo, altura_copia, janela, critcom.assinatura_series(series)), montar)
+            if conteudo is None:
+                st.caption("Sem dados para este gráfico.")
+            else:
+                with perfil.trecho(f"components.html ({titulo})", dados=conteudo):
+                    components.html(conteudo, height=altura)
+    # Nas reexecuções só deste trecho, os gráficos montados vão para o log aqui
+    perfil.gravar()
+
+# --- Diálogo de resultados ---
+# Medidas do diálogo de cada página: largura do diálogo ('small' ou 'large'),
+# largura da tabela (CSS), escala da cópia como imagem, tamanho do
+# components.html da tabela e altura dos gráficos e da cópia deles
+FormatoResultados = namedtuple(
+    'FormatoResultados', 'largura_dialogo largura_tabela escala largura altura altura_graficos altura_copia',
+)
+FORMATO_UM_MEDIDOR = FormatoResultados('large', '100%', 4, 1000, 450, 620, 750)
+FORMATO_MEDIDORES = FormatoResultados('small', '600px', 1.5, 800, 450, 520, 1250)
+FORMATO_FATURAMENTO = FormatoResultados('small', '100%', 1.5, 800, 700, 520, 750)
+
+
+def mostrar_tabela(perfil, table_html, formato, contrato=None):
+    """Tabela de resultados num components.html, com o título do contrato e o botão que a copia como imagem."""
+    title_html = f"<h3>Resultados para o Contrato: {contrato}</h3>" if contrato else ""
+    conteudo = f"""
+        {critcom.tags_scripts('html2canvas')}
+
+        <style>
+            .capture-area {{ padding: 10px; background-color: #ffffff; }}
+            table {{ width: {formato.largura_tabela}; border-collapse: collapse; font-family: sans-serif; font-size: 14px; margin-bottom: 20px; }}
+            th, td {{ border: 1px solid #e0e0e0; padding: 8px; text-align: center; }}
+            th {{ background-color: #f0f2f6; }}
+            .button-container {{ text-align: right; margin-top: 10px; margin-bottom: 20px; }}
+            .copy-button {{ background-color: #0068c9; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; }}
+            .copy-button:hover {{ background-color: #0055a3; }}
+            h3 {{ font-family: sans-serif; text-align: center;}}
+            th.thick-border-right, td.thick-border-right {{
+                border-right: 2px solid #888;
+            }}
+            tr.separator-row td {{
+                text-align: center;
+                font-weight: bold;
+                background-color: #e8e8e8;
+                border-left: 1px solid #e0e0e0;
+                border-right: 1px solid #e0e0e0;
+            }}
+        </style>
+
+        <div id="captureTable" class="capture-area">
+            {title_html}
+            {table_html}
+        </div>
+        <div class="button-container">
+            <button class="copy-button" onclick="copyElementAsImage('captureTable', this)">Copiar Tabela como Imagem</button>
+        </div>
+
+        <script>
+            function copyElementAsImage(elementId, button) {{
+                const captureElement = document.getElementById(elementId);
+                const originalText = button.innerText;
+                button.innerText = 'Copiando...';
+
+                html2canvas(captureElement, {{ scale: {formato.escala} }}).then(canvas => {{
+                    canvas.toBlob(function(blob) {{
+                        navigator.clipboard.write([
+                            new ClipboardItem({{ 'image/png': blob }})
+                        ]).then(() => {{
+                            button.innerText = 'Copiado!';
+                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
+                        }}).catch(err => {{
+                            console.error('Erro ao copiar: ', err);
+                            button.innerText = 'Falha ao copiar';
+                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
+                        }});
+                    }});
+                }});
+            }}
+        </script>
+    """
+    with perfil.trecho("components.html (tabela)", dados=conteudo):
+        components.html(conteudo, width=formato.largura, height=formato.altura, scrolling=True)
+
+
+def _resultados(perfil, table_html, planilha, formato, contrato=None, paineis=(), graficos=None, comparacao=None, intervalos=()):
+    """
+    Conteúdo do diálogo: a tabela primeiro, depois os gráficos (montados só
+    quando abertos), a comparação pelo calendário e a completude.
+    `graficos` é uma das opções de critcom.OPCOES_GRAFICOS (Chart.js por padrão);
+    `planilha()` monta o .xlsx, só quando o botão de download é clicado.
+    """
+    mostrar_tabela(perfil, table_html, formato, contrato)
+
+    # --- Gráficos sob demanda (Chart.js em critcom.graficos ou Plotly em critcom.graficos_plotly) ---
+    if paineis:
+        mostrar_graficos(perfil, paineis, graficos == critcom.GRAFICOS_PLOTLY, formato.altura_graficos, formato.altura_copia)
+
+    mostrar_comparacao(comparacao)
+    mostrar_completude(intervalos)
+
+    st.download_button(
+        "Baixar planilha (.xlsx)", data=planilha,
+        file_name=f"confirmacao_{contrato}.xlsx" if contrato and contrato != "Não encontrado" else "confirmacao.xlsx",
+        mime=critcom.MIME_XLSX, on_click="ignore",
+    )
+
+    if st.button("Fechar", key="close_dialog"):
+        st.rerun()
+
+
+# A largura do st.dialog é fixada na decoração: um diálogo por largura
+_DIALOGOS = {largura: st.dialog("Resultados do Cálculo", width=largura)(_resultados) for largura in ('small', 'large')}
+
+
+def show_results_dialog(perfil, table_html, planilha, formato, **opcoes):
+    """Abre o diálogo de resultados com a largura de `formato`; `opcoes` vão para o conteúdo (_resultados)."""
+    _DIALOGOS[formato.largura_dialogo](perfil, table_html, planilha, formato, **opcoes)
@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-import re
-from io import StringIO
-import streamlit.components.v1 as components
-import json
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import critcom
+import interface
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -19,389 +18,18 @@ st.logo(
     icon_image="CRITCOM.svg",
 )
 
-# --- FUNÇÕES DE PROCESSAMENTO (NÃO MODIFICAR) ---
-
-def processar_dados_consumo(texto_bruto):
-    """
-    Processa o texto bruto colado pelo usuário para extrair, limpar e somar os dados de consumo.
-    Esta versão lê o cabeçalho e retorna tanto os resultados agregados quanto o DataFrame bruto.
-    """
-    header_match = re.search(r"^Data\s+Dia\s+Postos horários\s+(.*)$", texto_bruto, re.MULTILINE)
-    if not header_match:
-        return None
-    header_string = header_match.group(1).strip()
-    colunas_dados = [col.strip() for col in header_string.split('\t')]
-    num_colunas_dados = len(colunas_dados)
-    valor_pattern = r"([\d.,-]+)"
-    regex_parts = [
-        r"^(\d{2}/\d{2}/\d{4}\s\d{2}:\d{2})",
-        r"([A-Za-zçáéíóúãõâêôü]+)",
-        r"(Fora Ponta|Ponta|Reservado)"
-    ]
-    regex_parts.extend([valor_pattern] * num_colunas_dados)
-    padrao_dados_str = r"\s+".join(regex_parts) + r"$"
-    padrao_dados = re.compile(padrao_dados_str, re.MULTILINE)
-    dados_encontrados = padrao_dados.findall(texto_bruto)
-    if not dados_encontrados:
-        return None
-    colunas_df = ['DataHora', 'Dia', 'Posto Horario'] + colunas_dados
-    df = pd.DataFrame(dados_encontrados, columns=colunas_df)
-    df['DataHora'] = pd.to_datetime(df['DataHora'], format='%d/%m/%Y %H:%M')
-    
-    for nome_coluna in colunas_dados:
-        df[nome_coluna] = pd.to_numeric(
-            df[nome_coluna].str.replace('.', '', regex=False).str.replace(',', '.', regex=False),
-            errors='coerce'
-        )
-    
-    # A agregação será feita depois, se necessário
-    return df
-
-def processar_dados_demanda(texto_bruto):
-    """
-    Processa dados de demanda, identificando cabeçalhos e retornando o DataFrame bruto.
-    A lógica de cálculo (soma ou máximo) foi movida para uma função separada.
-    """
-    header_match = re.search(r"^Data\s+Dia\s+Postos horários\s+(.*)$", texto_bruto, re.MULTILINE)
-    if not header_match:
-        return None
-    header_string = header_match.group(1).strip()
-    colunas_dados = [col.strip() for col in header_string.split('\t')]
-    num_colunas_dados = len(colunas_dados)
-    valor_pattern = r"([\d.,-]+)"
-    regex_parts = [
-        r"^(\d{2}/\d{2}/\d{4}\s\d{2}:\d{2})",
-        r"([A-Za-zçáéíóúãõâêôü]+)",
-        r"(Fora Ponta|Ponta|Reservado)"
-    ]
-    regex_parts.extend([valor_pattern] * num_colunas_dados)
-    padrao_dados_str = r"\s+".join(regex_parts) + r"$"
-    padrao_dados = re.compile(padrao_dados_str, re.MULTILINE)
-    dados_encontrados = padrao_dados.findall(texto_bruto)
-    if not dados_encontrados:
-        return None
-    colunas_df = ['DataHora', 'Dia', 'Posto Horario'] + colunas_dados
-    df = pd.DataFrame(dados_encontrados, columns=colunas_df)
-    df['DataHora'] = pd.to_datetime(df['DataHora'], format='%d/%m/%Y %H:%M')
-    
-    for nome_coluna in colunas_dados:
-        df[nome_coluna] = pd.to_numeric(
-            df[nome_coluna].str.replace('.', '', regex=False).str.replace(',', '.', regex=False),
-            errors='coerce'
-        )
-    return df
-
-def recalcular_resultados(df, tipo_calculo='consumo'):
-    """
-    Calcula os resultados agregados (soma ou máximo) a partir de um DataFrame.
-    """
-    if df is None:
-        return None
-
-    resultados = {}
-    colunas_dados = [col for col in df.columns if col not in ['DataHora', 'Dia', 'Posto Horario']]
-
-    for nome_coluna in colunas_dados:
-        if tipo_calculo == 'demanda':
-            if nome_coluna.strip().upper() == "UFER":
-                operacao = 'soma'
-                calculo = df.groupby('Posto Horario')[nome_coluna].sum()
-            else:
-                operacao = 'máximo'
-                calculo = df.groupby('Posto Horario')[nome_coluna].max()
-        else: # Consumo
-            operacao = 'soma'
-            calculo = df.groupby('Posto Horario')[nome_coluna].sum()
-
-        resultados[nome_coluna] = {
-            'operacao': operacao,
-            'valores': {
-                'Fora Ponta': calculo.get('Fora Ponta', 0.0),
-                'Ponta': calculo.get('Ponta', 0.0),
-                'Reservado': calculo.get('Reservado', 0.0)
-            }
-        }
-        resultados[nome_coluna]['valores'] = {k: (v if pd.notna(v) else 0.0) for k, v in resultados[nome_coluna]['valores'].items()}
-    return resultados
-
-
-# --- FUNÇÃO PARA EXTRAIR INFORMAÇÕES DO CLIENTE ---
-def extrair_info_cliente(texto_bruto):
-    info = {"contrato": "Não encontrado", "serial": "Não encontrado"}
-    if not texto_bruto:
-        return info
-
-    contrato_match = re.search(r"Cliente \(contrato\)\s+(\d+)", texto_bruto)
-    if contrato_match:
-        info["contrato"] = contrato_match.group(1)
-
-    serial_match = re.search(r"Medidor \(serial\)\s+(\d+)", texto_bruto)
-    if not serial_match: # Tenta um padrão alternativo
-        serial_match = re.search(r"Medidor\s+(\d+)", texto_bruto)
-
-    if serial_match:
-        info["serial"] = serial_match.group(1)
-        
-    return info
-
-# --- Função que define o conteúdo do diálogo ---
-@st.dialog("Resultados do Cálculo", width='large')
-def show_results_dialog(df_resultados, df_consumo_raw, df_demanda_raw):
-    """Exibe o DataFrame de resultados e gráficos dentro de um diálogo."""
-    
-    # --- Geração Manual da Tabela HTML ---
-    header_html = "<thead><tr>"
-    for col_name in df_resultados.columns:
-        header_html += f'<th>{col_name}</th>'
-    header_html += "</tr></thead>"
-
-    body_html = "<tbody>"
-    for _, row in df_resultados.iterrows():
-        if str(row.iloc[0]).startswith('---'):
-            body_html += f'<tr class="separator-row"><td colspan="{len(df_resultados.columns)}">{row.iloc[0]}</td></tr>'
-        else:
-            body_html += "<tr>"
-            for cell_value in row:
-                body_html += f'<td>{cell_value}</td>'
-            body_html += "</tr>"
-    body_html += "</tbody>"
-
-    table_html = f"<table>{header_html}{body_html}</table>"
-    
-    # Prepara dados para os gráficos
-    chart_data_consumo_fornecido = None
-    if df_consumo_raw is not None and 'kWh fornecido' in df_consumo_raw.columns:
-        df_fornecido = df_consumo_raw[['DataHora', 'kWh fornecido']].dropna()
-        df_fornecido['DataHora'] = df_fornecido['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_consumo_fornecido = df_fornecido.to_dict(orient='records')
-
-    chart_data_consumo_recebido = None
-    if df_consumo_raw is not None and 'kWh recebido' in df_consumo_raw.columns:
-        df_recebido = df_consumo_raw[['DataHora', 'kWh recebido']].dropna()
-        df_recebido['DataHora'] = df_recebido['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_consumo_recebido = df_recebido.to_dict(orient='records')
-
-    chart_data_demanda_fornecido = None
-    if df_demanda_raw is not None and 'kW fornecido' in df_demanda_raw.columns:
-        df_dem_fornecido = df_demanda_raw[['DataHora', 'kW fornecido']].dropna()
-        df_dem_fornecido['DataHora'] = df_dem_fornecido['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_demanda_fornecido = df_dem_fornecido.to_dict(orient='records')
-
-    chart_data_demanda_recebido = None
-    if df_demanda_raw is not None and 'kW recebido' in df_demanda_raw.columns:
-        df_dem_recebido = df_demanda_raw[['DataHora', 'kW recebido']].dropna()
-        df_dem_recebido['DataHora'] = df_dem_recebido['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_demanda_recebido = df_dem_recebido.to_dict(orient='records')
-        
-    chart_data_dmcr = None
-    if df_demanda_raw is not None and 'DMCR' in df_demanda_raw.columns:
-        df_dmcr = df_demanda_raw[['DataHora', 'DMCR']].dropna()
-        df_dmcr['DataHora'] = df_dmcr['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_dmcr = df_dmcr.to_dict(orient='records')
-
-    chart_data_ufer = None
-    if df_demanda_raw is not None and 'UFER' in df_demanda_raw.columns:
-        df_ufer = df_demanda_raw[['DataHora', 'UFER']].dropna()
-        df_ufer['DataHora'] = df_ufer['DataHora'].apply(lambda x: x.isoformat())
-        chart_data_ufer = df_ufer.to_dict(orient='records')
-
-    # Cria o componente HTML com a tabela, os gráficos e a função de cópia
-    components.html(f"""
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/chartjs-adapter-date-fns/dist/chartjs-adapter-date-fns.bundle.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/chartjs-plugin-zoom/dist/chartjs-plugin-zoom.min.js"></script>
-
-        <style>
-            .capture-area {{ padding: 10px; background-color: #ffffff; }}
-            table {{ width: 100%; border-collapse: collapse; font-family: sans-serif; font-size: 14px; margin-bottom: 20px; }}
-            th, td {{ border: 1px solid #e0e0e0; padding: 8px; text-align: center; }}
-            th {{ background-color: #f0f2f6; }}
-            .button-container {{ text-align: right; margin-top: 10px; margin-bottom: 20px; }}
-            .copy-button {{ background-color: #0068c9; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; }}
-            .copy-button:hover {{ background-color: #0055a3; }}
-            h3 {{ font-family: sans-serif; }}
-            tr.separator-row td {{
-                text-align: center;
-                font-weight: bold;
-                background-color: #e8e8e8;
-                border-left: 1px solid #e0e0e0;
-                border-right: 1px solid #e0e0e0;
-            }}
-        </style>
-        
-        <div id="captureTable" class="capture-area">
-            {table_html}
-        </div>
-        <div class="button-container">
-            <button class="copy-button" onclick="copyElementAsImage('captureTable', this)">Copiar Tabela como Imagem</button>
-        </div>
-
-        <div id="consumoChartContainer"></div>
-        <div id="demandaChartContainer"></div>
-
-        <script>
-            let consumoChart = null;
-            let demandaChart = null;
-            const chartDataConsumoFornecido = {json.dumps(chart_data_consumo_fornecido)};
-            const chartDataConsumoRecebido = {json.dumps(chart_data_consumo_recebido)};
-            const chartDataDemandaFornecido = {json.dumps(chart_data_demanda_fornecido)};
-            const chartDataDemandaRecebido = {json.dumps(chart_data_demanda_recebido)};
-            const chartDataDmcr = {json.dumps(chart_data_dmcr)};
-            const chartDataUfer = {json.dumps(chart_data_ufer)};
-
-            function createChart(containerId, chartInstanceVar, chartTitle, datasets) {{
-                if (datasets.length === 0) return;
-
-                const container = document.getElementById(containerId);
-                container.innerHTML = `
-                    <div id="capture-${{containerId}}" class="capture-area">
-                        <h3>${{chartTitle}}</h3>
-                        <canvas id="canvas-${{containerId}}"></canvas>
-                    </div>
-                    <div class="button-container">
-                        <button class="copy-button" onclick="copyChartAsImage('${{chartInstanceVar}}', this)">Copiar Gráfico como Imagem</button>
-                    </div>
-                `;
-
-                const ctx = document.getElementById(`canvas-${{containerId}}`).getContext('2d');
-                window[chartInstanceVar] = new Chart(ctx, {{
-                    type: 'line',
-                    data: {{ datasets: datasets }},
-                    options: {{
-                        responsive: true,
-                        maintainAspectRatio: true,
-                        plugins: {{ zoom: {{ zoom: {{ wheel: {{ enabled: true }}, pinch: {{ enabled: true }}, mode: 'x' }} }} }},
-                        scales: {{ x: {{ type: 'time', time: {{ unit: 'day' }} }} }}
-                    }}
-                }});
-            }}
-
-            // Cria gráfico de consumo
-            const consumoDatasets = [];
-            if (chartDataConsumoFornecido) consumoDatasets.push({{ label: 'kWh fornecido', data: chartDataConsumoFornecido.map(item => ({{x: new Date(item.DataHora), y: item['kWh fornecido']}})), borderColor: 'rgb(75, 192, 192)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            if (chartDataConsumoRecebido) consumoDatasets.push({{ label: 'kWh recebido', data: chartDataConsumoRecebido.map(item => ({{x: new Date(item.DataHora), y: item['kWh recebido']}})), borderColor: 'rgb(255, 99, 132)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            createChart('consumoChartContainer', 'consumoChart', 'Gráfico - Consumo', consumoDatasets);
-
-            // Cria gráfico de demanda
-            const demandaDatasets = [];
-            if (chartDataDemandaFornecido) demandaDatasets.push({{ label: 'kW fornecido', data: chartDataDemandaFornecido.map(item => ({{x: new Date(item.DataHora), y: item['kW fornecido']}})), borderColor: 'rgb(54, 162, 235)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            if (chartDataDemandaRecebido) demandaDatasets.push({{ label: 'kW recebido', data: chartDataDemandaRecebido.map(item => ({{x: new Date(item.DataHora), y: item['kW recebido']}})), borderColor: 'rgb(255, 159, 64)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            if (chartDataDmcr) demandaDatasets.push({{ label: 'DMCR', data: chartDataDmcr.map(item => ({{x: new Date(item.DataHora), y: item['DMCR']}})), borderColor: 'rgb(153, 102, 255)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            if (chartDataUfer) demandaDatasets.push({{ label: 'UFER', data: chartDataUfer.map(item => ({{x: new Date(item.DataHora), y: item['UFER']}})), borderColor: 'rgb(75, 192, 75)', tension: 0.1, pointRadius: 0, borderWidth: 2 }});
-            createChart('demandaChartContainer', 'demandaChart', 'Gráfico - Demanda', demandaDatasets);
-
-            function copyChartAsImage(chartInstanceVar, button) {{
-                const chartInstance = window[chartInstanceVar];
-                if (!chartInstance) return;
-                const originalText = button.innerText;
-                button.innerText = 'Copiando...';
-
-                const tempCanvas = document.createElement('canvas');
-                tempCanvas.width = 2000;
-                tempCanvas.height = 750;
-                const tempCtx = tempCanvas.getContext('2d');
-                
-                const whiteBackgroundPlugin = {{
-                    id: 'whiteBackground',
-                    beforeDraw: (chart) => {{
-                        const ctx = chart.canvas.getContext('2d');
-                        ctx.save();
-                        ctx.globalCompositeOperation = 'destination-over';
-                        ctx.fillStyle = 'white';
-                        ctx.fillRect(0, 0, chart.width, chart.height);
-                        ctx.restore();
-                    }}
-                }};
-                
-                const visibleDatasets = chartInstance.config.data.datasets.filter((_, index) => chartInstance.isDatasetVisible(index));
-
-                const tempConfig = {{
-                    type: 'line',
-                    data: {{ ...chartInstance.config.data, datasets: visibleDatasets }},
-                    options: {{
-                        ...chartInstance.config.options,
-                        responsive: false,
-                        maintainAspectRatio: false,
-                        animation: false,
-                        plugins: {{
-                            ...chartInstance.config.options.plugins,
-                            legend: {{
-                                labels: {{
-                                    font: {{
-                                        size: 24 // Aumenta a fonte da legenda
-                                    }}
-                                }}
-                            }}
-                        }},
-                        scales: {{
-                            ...chartInstance.config.options.scales,
-                            x: {{ 
-                                ...chartInstance.config.options.scales.x, 
-                                min: chartInstance.scales.x.min, 
-                                max: chartInstance.scales.x.max,
-                                ticks: {{
-                                    font: {{
-                                        size: 20 // Aumenta a fonte do eixo X
-                                    }}
-                                }}
-                            }},
-                            y: {{
-                                ...chartInstance.config.options.scales.y,
-                                ticks: {{
-                                    font: {{
-                                        size: 20 // Aumenta a fonte do eixo Y
-                                    }}
-                                }}
-                            }}
-                        }}
-                    }},
-                    plugins: [whiteBackgroundPlugin]
-                }};
-
-                new Chart(tempCtx, tempConfig);
-
-                setTimeout(() => {{
-                    tempCanvas.toBlob(function(blob) {{
-                        navigator.clipboard.write([
-                            new ClipboardItem({{ 'image/png': blob }})
-                        ]).then(() => {{
-                            button.innerText = 'Copiado!';
-                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
-                        }}).catch(err => {{
-                            console.error('Erro ao copiar: ', err);
-                            button.innerText = 'Falha ao copiar';
-                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
-                        }});
-                    }});
-                }}, 250);
-            }}
-
-            function copyElementAsImage(elementId, button) {{
-                const captureElement = document.getElementById(elementId);
-                const originalText = button.innerText;
-                button.innerText = 'Copiando...';
-
-                html2canvas(captureElement, {{ scale: 4 }}).then(canvas => {{
-                    canvas.toBlob(function(blob) {{
-                        navigator.clipboard.write([
-                            new ClipboardItem({{ 'image/png': blob }})
-                        ]).then(() => {{
-                            button.innerText = 'Copiado!';
-                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
-                        }}).catch(err => {{
-                            console.error('Erro ao copiar: ', err);
-                            button.innerText = 'Falha ao copiar';
-                            setTimeout(() => {{ button.innerText = originalText; }}, 2000);
-                        }});
-                    }});
-                }});
-            }}
-        </script>
-    """, width=1000, height=700, scrolling=True)
-
-    if st.button("Fechar", key="close_dialog"):
-        st.rerun()
+# --- Governador de memória (critcom.governador) ---
+# Os DataFrames e o índice de uma sessão ociosa podem ter ido para o disco; voltam aqui, antes de qualquer uso
+CHAVES_DESPEJAVEIS = ['df_consumo', 'df_demanda_original', 'indice_demanda', 'graficos_montados']
+contexto = get_script_run_ctx()
+if not critcom.retomar_sessao(contexto.session_id, contexto.session_state):
+    st.session_state.dados_processados = False
+    st.warning("Os relatórios processados desta sessão não puderam ser recarregados. Clique em CALCULAR de novo.")
+
+# --- Medição de desempenho (critcom.desempenho), ligada no painel de depuração da barra lateral ---
+perfil = critcom.Perfil(
+    "Um medidor", ativo=st.session_state.get('depurar_desempenho', False), memoria=st.session_state.get('depurar_memoria', True),
+)
 
 # --- Interface do Aplicativo ---
 st.title("Confirmação para 1 MD")
@@ -416,12 +44,16 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# Relatórios guardados nas confirmações anteriores (critcom.acervo)
+medicoes_salvas = critcom.listar_medicoes()
+
 with st.sidebar:
     dados1, dados2 = st.columns(2)
     with dados1:
-        consumo_injecao = st.text_area("kWh/kWh Inj:", height=200, placeholder="Dê um Ctrl+A no relatório de consumo, Ctrl+C e cole aqui.", key="consumo_injecao")
+        consumo_injecao = interface.campo_relatorio("kWh/kWh Inj:", "Dê um Ctrl+A no relatório de consumo, Ctrl+C e cole aqui.", "consumo_injecao", 200, 'consumo', medicoes_salvas)
     with dados2:
-        kW_kwinj_dre_ere = st.text_area("kW/DRE/ERE:", height=200, placeholder="Dê um Ctrl+A no relatório de demanda, Ctrl+C e cole aqui.", key="kW_kwinj_dre_ere")
+        kW_kwinj_dre_ere = interface.campo_relatorio("kW/DRE/ERE:", "Dê um Ctrl+A no relatório de demanda, Ctrl+C e cole aqui.", "kW_kwinj_dre_ere", 200, 'demanda', medicoes_salvas)
+    interface.opcao_acervo()
 
 # --- Seção de Parâmetros de Cálculo ---
 constante = st.number_input("Constante:",min_value=0.0,value=1.0,step=0.01,format="%.4f")
@@ -430,6 +62,7 @@ with col_tipo:
     tipo_opcao = st.radio("Tipo:",("Grandeza", "Grandeza EAC", "Pulso"),horizontal=False,key="tipo",captions=["","Comum em medidores SL7000 da EAC.", "Maioria dos pontos da ERO."])
 with col_perdas:
     perdas_opcao = st.radio("Perdas? :warning: **Não adicionar quando digitar no SILCO** :warning:",("Não", "Sim"),horizontal=False,key="perdas", captions=["Se o cliente possuir TP e TC.","Para medições diretas ou em baixa tensão (apenas TC)."])
+graficos_opcao = st.radio("Gráficos:", critcom.OPCOES_GRAFICOS, horizontal=True, key="graficos", help="O Plotly (WebGL) continua fluido com séries longas e não depende das CDNs.")
 
 # --- Botões de Ação ---
 st.markdown("")
@@ -439,8 +72,9 @@ col_btn1, col_btn2 = st.columns([1, 2])
 def clear_all_text():
     st.session_state.consumo_injecao = ""
     st.session_state.kW_kwinj_dre_ere = ""
+    interface.limpar_arquivos()
     # Limpa os dados processados e os DataFrames do estado da sessão
-    keys_to_clear = ['dados_processados', 'df_consumo', 'df_demanda_original', 'df_demanda_filtrado', 'demanda_range_slider']
+    keys_to_clear = ['dados_processados', 'df_consumo', 'df_demanda_original', 'indice_demanda', 'demanda_range_slider']
     for key in keys_to_clear:
         if key in st.session_state:
             del st.session_state[key]
@@ -469,22 +103,34 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# --- Contrato e serial dos relatórios, para o log de desempenho ---
+if perfil.ativo:
+    with perfil.trecho("Cabeçalho"):
+        info = critcom.ler_cabecalho(critcom.texto_inicial(consumo_injecao or kW_kwinj_dre_ere))
+    perfil.anotar(contrato=info['contrato'], serial=info['serial'])
+
 # --- Lógica de Processamento Inicial ---
 if calculate_button:
     if consumo_injecao:
         with st.spinner("Processando dados de Consumo/Injeção..."):
-            st.session_state.df_consumo = processar_dados_consumo(consumo_injecao)
+            st.session_state.df_consumo = perfil.medir("Leitura (consumo)", critcom.ler_intervalos, consumo_injecao)
+            interface.guardar_no_acervo(consumo_injecao, 'consumo', st.session_state.df_consumo)
     else:
         st.session_state.df_consumo = None
 
     if kW_kwinj_dre_ere:
         with st.spinner("Processando dados de Demanda/DRE/ERE..."):
-            df_demanda_temp = processar_dados_demanda(kW_kwinj_dre_ere)
+            df_demanda_temp = perfil.medir("Leitura (demanda)", critcom.ler_intervalos, kW_kwinj_dre_ere)
+            interface.guardar_no_acervo(kW_kwinj_dre_ere, 'demanda', df_demanda_temp)
             st.session_state.df_demanda_original = df_demanda_temp
-            st.session_state.df_demanda_filtrado = df_demanda_temp # Inicializa o filtrado como o original
+            # Índice ordenado por kW fornecido, usado pela ferramenta de supressão de picos
+            if df_demanda_temp is not None and 'kW fornecido' in df_demanda_temp.columns:
+                st.session_state.indice_demanda = perfil.medir("Índice da demanda", critcom.IndiceDemanda, df_demanda_temp)
+            else:
+                st.session_state.indice_demanda = None
     else:
         st.session_state.df_demanda_original = None
-        st.session_state.df_demanda_filtrado = None
+        st.session_state.indice_demanda = None
     
     if st.session_state.get('df_consumo') is not None or st.session_state.get('df_demanda_original') is not None:
         st.session_state.dados_processados = True
@@ -495,133 +141,108 @@ if calculate_button:
         if kW_kwinj_dre_ere:
             st.error("Não foi possível encontrar dados de demanda/DRE/ERE válidos.")
         if not consumo_injecao and not kW_kwinj_dre_ere:
-            st.warning("Por favor, cole o conteúdo em um ou ambos os campos de texto.")
+            st.warning("Por favor, cole o conteúdo ou envie o arquivo em um ou ambos os campos.")
 
 # --- Interface de Filtragem e Exibição de Resultados ---
 if st.session_state.get('dados_processados', False):
     
     # --- NOVA SEÇÃO: Ferramenta para suprimir picos ---
-    if st.session_state.get('df_demanda_original') is not None and 'kW fornecido' in st.session_state.df_demanda_original.columns:
+    indice_demanda = st.session_state.get('indice_demanda')
+    faixa_demanda = (None, None)
+    if indice_demanda is not None:
         with st.expander("✔️ Ferramenta para Suprimir Picos de Demanda", expanded=False):
-            df_original = st.session_state.df_demanda_original.dropna(subset=['kW fornecido'])
-            
-            # Evita erro se a coluna estiver vazia após dropar NaNs
-            if not df_original.empty:
-                min_val = float(df_original['kW fornecido'].min())
-                max_val = float(df_original['kW fornecido'].max())
+            # Evita erro se a coluna estiver vazia após descartar os NaNs
+            if not indice_demanda.vazio:
+                min_val, max_val = indice_demanda.limites
 
                 st.info("Use o slider abaixo para selecionar o intervalo de 'kW fornecido' que deseja **MANTER**.")
 
                 # Verifica se min e max são diferentes para evitar erro no slider
                 if min_val < max_val:
-                    selected_range = st.slider(
+                    faixa_demanda = st.slider(
                         "Selecione o intervalo de demanda (kW fornecido):",
                         min_value=min_val,
                         max_value=max_val,
                         value=(min_val, max_val), # Default é o intervalo completo
                         key="demanda_range_slider"
                     )
-                    
-                    # Filtra o DataFrame original com base no intervalo selecionado
-                    st.session_state.df_demanda_filtrado = df_original[
-                        (df_original['kW fornecido'] >= selected_range[0]) & 
-                        (df_original['kW fornecido'] <= selected_range[1])
-                    ]
                 else:
                     # Se todos os valores forem iguais, apenas exibe a informação e não filtra
                     st.write(f"Todos os valores de demanda são iguais a {min_val:.4f}. Nenhum filtro aplicado.")
-                    st.session_state.df_demanda_filtrado = df_original
             else:
-                # Caso o dataframe fique vazio
+                # Caso não haja nenhum valor de kW fornecido
                 st.warning("Não há dados de 'kW fornecido' para filtrar.")
-                st.session_state.df_demanda_filtrado = df_original
-
-    # Recalcula os resultados com base nos DataFrames (potencialmente filtrados)
-    resultados_consumo = recalcular_resultados(st.session_state.get('df_consumo'), tipo_calculo='consumo')
-    resultados_demanda = recalcular_resultados(st.session_state.get('df_demanda_filtrado'), tipo_calculo='demanda')
-
-    # --- Lógica para criar a tabela de resultados (adaptada) ---
-    table_data = []
-    postos = ['Ponta', 'Reservado', 'Fora Ponta']
-    
-    perdas_multiplier = 1.025 if perdas_opcao == "Sim" else 1.0
-    perdas_display_value = 2.5 if perdas_opcao == "Sim" else 0.0
 
-    constante_kw = constante
-    if tipo_opcao == "Grandeza EAC":
-        constante_kw = constante / 4
-    elif tipo_opcao == "Pulso":
-        constante_kw = constante * 4
-    constante_outros = constante
+    classificador = interface.escolher_calendario()
 
-    def create_separator(label):
-        return {'Posto Horário': f"--- {label} ---", 'Valor': '', 'K': '', 'Perdas (%)': '', 'Valor Final': ''}
-
-    def add_demanda_section(key, label, k_value_to_use):
-        if resultados_demanda and key in resultados_demanda:
-            table_data.append(create_separator(f"{label}"))
-            dados = resultados_demanda[key]
-            for posto in postos:
-                valor = dados['valores'].get(posto, 0.0)
-                table_data.append({
-                    'Posto Horário': posto,
-                    'Valor': valor,
-                    'K': k_value_to_use,
-                    'Perdas (%)': perdas_display_value,
-                    'Valor Final': valor * k_value_to_use * perdas_multiplier
-                })
-
-    if resultados_consumo:
-        consumo_cols = list(resultados_consumo.keys())
-        if consumo_cols:
-            primeira_col_consumo = consumo_cols[0]
-            dados = resultados_consumo[primeira_col_consumo]
-            table_data.append(create_separator(f"{primeira_col_consumo} acumulado"))
-            for posto in postos:
-                valor = dados['valores'].get(posto, 0.0)
-                table_data.append({
-                    'Posto Horário': posto,
-                    'Valor': valor,
-                    'K': constante_outros,
-                    'Perdas (%)': perdas_display_value,
-                    'Valor Final': valor * constante_outros * perdas_multiplier
-                })
-
-    add_demanda_section('kW fornecido', 'kW fornecido máximo', constante_kw)
-    add_demanda_section('UFER', 'UFER (ERE) acumulado', constante_outros)
-    add_demanda_section('DMCR', 'DMCR (DRE) máximo', constante_outros)
-
-    if resultados_consumo and len(resultados_consumo) > 1:
-        outras_cols_consumo = list(resultados_consumo.keys())[1:]
-        for col_name in outras_cols_consumo:
-            dados = resultados_consumo[col_name]
-            if any(v > 0 for v in dados['valores'].values()):
-                table_data.append(create_separator(f"{col_name} acumulado"))
-                for posto in postos:
-                    valor = dados['valores'].get(posto, 0.0)
-                    table_data.append({
-                        'Posto Horário': posto,
-                        'Valor': valor,
-                        'K': constante_outros,
-                        'Perdas (%)': perdas_display_value,
-                        'Valor Final': valor * constante_outros * perdas_multiplier
-                    })
+    # Recalcula os resultados; a demanda filtrada sai direto do índice, sem copiar o DataFrame
+    with perfil.trecho("Agregação") as medicao:
+        resultados_consumo = critcom.recalcular_resultados(st.session_state.get('df_consumo'), tipo_calculo='consumo')
+        if indice_demanda is not None:
+            resultados_demanda = critcom.resultados_por_grandeza(indice_demanda.agregar(*faixa_demanda), tipo_calculo='demanda')
+        else:
+            resultados_demanda = critcom.recalcular_resultados(st.session_state.get('df_demanda_original'), tipo_calculo='demanda')
+        medicao.linhas = sum(len(df) for df in (st.session_state.get('df_consumo'), st.session_state.get('df_demanda_original')) if df is not None)
 
-    add_demanda_section('kW recebido', 'kW recebido máximo', constante_kw)
+    # --- Tabela de resultados (K e perdas aplicados em critcom.confirmacao) ---
+    table_data = perfil.medir("K e perdas", critcom.linhas_um_medidor, resultados_consumo, resultados_demanda, constante, tipo_opcao, perdas_opcao)
 
     # --- Chama o diálogo se houver resultados ---
     if table_data:
-        df_resultados = pd.DataFrame(table_data)
-        
-        def format_br(value, precision):
-            if isinstance(value, (int, float)):
-                return f"{value:,.{precision}f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-            return value
+        df_resultados = perfil.medir("Formatação da tabela", critcom.formatar_tabela, table_data, critcom.COLUNAS_UM_MEDIDOR)
 
-        df_resultados['Valor'] = df_resultados['Valor'].apply(lambda x: format_br(x, 4) if isinstance(x, (int, float)) else x)
-        df_resultados['K'] = df_resultados['K'].apply(lambda x: format_br(x, 4) if isinstance(x, (int, float)) else x)
-        df_resultados['Perdas (%)'] = df_resultados['Perdas (%)'].apply(lambda x: format_br(x, 1) if isinstance(x, (int, float)) else x)
-        df_resultados['Valor Final'] = df_resultados['Valor Final'].apply(lambda x: format_br(x, 4) if isinstance(x, (int, float)) else x)
-        
         # O diálogo agora usa os dataframes do st.session_state
-        show_results_dialog(df_resultados, st.session_state.get('df_consumo'), st.session_state.get('df_demanda_filtrado'))
+        mascara_demanda = indice_demanda.mascara(*faixa_demanda) if indice_demanda is not None else None
+
+        # Mesmo cálculo com os postos refeitos pelo calendário (e a mesma faixa de picos)
+        comparacao = None
+        if classificador is not None:
+            with perfil.trecho("Comparação pelo calendário"):
+                df_consumo_calendario, alterados_consumo = interface.reclassificar(classificador, st.session_state.get('df_consumo'))
+                df_demanda_calendario, alterados_demanda = interface.reclassificar(classificador, st.session_state.get('df_demanda_original'))
+                if indice_demanda is not None:
+                    resultados_demanda_calendario = critcom.resultados_por_grandeza(
+                        critcom.IndiceDemanda(df_demanda_calendario).agregar(*faixa_demanda), tipo_calculo='demanda')
+                else:
+                    resultados_demanda_calendario = critcom.recalcular_resultados(df_demanda_calendario, tipo_calculo='demanda')
+                table_data_calendario = critcom.linhas_um_medidor(
+                    critcom.recalcular_resultados(df_consumo_calendario, tipo_calculo='consumo'), resultados_demanda_calendario,
+                    constante, tipo_opcao, perdas_opcao)
+                comparacao = (
+                    f"Intervalos que mudaram de posto: {alterados_consumo} no consumo e {alterados_demanda} na demanda.",
+                    critcom.formatar_tabela(critcom.linhas_comparacao(table_data, table_data_calendario, 'Valor Final'), critcom.COLUNAS_COMPARACAO),
+                )
+
+        # --- Tabela HTML (montada em critcom.tabelas) e diálogo de resultados (interface) ---
+        with perfil.trecho("Tabela HTML", linhas=len(df_resultados)) as medicao:
+            table_html = medicao.dados = critcom.tabela_html_um_medidor(df_resultados)
+        df_consumo, df_demanda = st.session_state.get('df_consumo'), st.session_state.get('df_demanda_original')
+        intervalos = [("Consumo", df_consumo), ("Demanda", df_demanda)]
+        interface.show_results_dialog(
+            perfil, table_html,
+            lambda: critcom.planilha_confirmacao(table_data, critcom.COLUNAS_UM_MEDIDOR, intervalos),
+            interface.FORMATO_UM_MEDIDOR,
+            paineis=[
+                ("Gráfico - Consumo", [(rotulo, cor, df_consumo, rotulo) for rotulo, cor in interface.SERIES_CONSUMO]),
+                # A máscara da supressão de picos é aplicada só às colunas de demanda plotadas
+                ("Gráfico - Demanda", [(rotulo, cor, df_demanda, rotulo, mascara_demanda) for rotulo, cor in interface.SERIES_DEMANDA]),
+            ],
+            graficos=graficos_opcao, comparacao=comparacao, intervalos=intervalos,
+        )
+
+# --- Memória desta sessão (critcom.memoria) e do servidor (critcom.governador) ---
+critcom.registrar_sessao(contexto.session_id, contexto.session_state, CHAVES_DESPEJAVEIS)
+st.sidebar.caption(critcom.resumo_memoria_sessao(st.session_state))
+st.sidebar.caption(critcom.resumo_sessoes())
+
+# --- Painel de depuração: trechos medidos nesta execução (critcom.desempenho) ---
+with st.sidebar.expander("🛠️ Depuração"):
+    st.checkbox("Medir o desempenho desta página", key="depurar_desempenho",
+                help="Tempo, pico de memória, linhas e bytes enviados de cada etapa, também gravados no log.")
+    st.checkbox("Incluir o pico de memória (tracemalloc)", value=True, key="depurar_memoria",
+                help="Deixa as etapas medidas mais lentas; compare os tempos entre si.")
+    if perfil.ativo:
+        if not perfil.gravar():
+            st.warning(f"Não foi possível gravar o log em {perfil.arquivo}.")
+        st.dataframe(perfil.tabela(), hide_index=True)
+        st.caption(f"Log: {perfil.arquivo}")
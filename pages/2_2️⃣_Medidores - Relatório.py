@@ -1,9 +1,8 @@
 import streamlit as st
-import pandas as pd
-import re
-from io import StringIO
-import streamlit.components.v1 as components
-import json
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import critcom
+import interface
 
 # --- Configuração da Página ---
 st.set_page_config(
@@ -19,144 +18,17 @@ st.logo(
     icon_image="CRITCOM.svg",
 )
 
-# --- FUNÇÕES DE PROCESSAMENTO ---
-
-def processar_dados_faturamento(texto_bruto):
-    """Processa o relatório de faturamento para extrair os valores de consumo e demanda."""
-    if not texto_bruto:
-        return None, None
-
-    resultados_consumo = {}
-    resultados_demanda = {}
-    
-    # Mapeamento de nomes no relatório para chaves consistentes
-    mapa_grandezas = {
-        'kWh fornecido': 'kWh fornecido',
-        'kWh recebido': 'kWh recebido',
-        'kWh fornecido - Demanda máxima': 'kW fornecido',
-        'kWh recebido - Demanda máxima': 'kW recebido',
-        'UFER': 'UFER',
-        'DMCR': 'DMCR'
-    }
-
-    postos_pattern = r"(Fora Ponta|Ponta|Reservado)\n([\s\S]*?)(?=\n\n|\Z|Dados gerais do faturamento|Fora Ponta|Ponta|Reservado)"
-    
-    for posto_match in re.finditer(postos_pattern, texto_bruto):
-        posto = posto_match.group(1)
-        bloco_dados = posto_match.group(2)
-        
-        for nome_relatorio, chave_interna in mapa_grandezas.items():
-            valor_match = re.search(rf"^{re.escape(nome_relatorio)}\s+([\d.,-]+)", bloco_dados, re.MULTILINE)
-            if valor_match:
-                valor_str = valor_match.group(1).replace('.', '').replace(',', '.')
-                valor_num = pd.to_numeric(valor_str, errors='coerce')
-                
-                # Separa em consumo (soma) e demanda (máximo)
-                if chave_interna in ['kWh fornecido', 'kWh recebido', 'UFER']:
-                    if chave_interna not in resultados_consumo:
-                        resultados_consumo[chave_interna] = {'operacao': 'soma', 'valores': {}}
-                    resultados_consumo[chave_interna]['valores'][posto] = valor_num
-                else: 
-                    if chave_interna not in resultados_demanda:
-                        op = 'soma' if chave_interna == 'UFER' else 'máximo'
-                        resultados_demanda[chave_interna] = {'operacao': op, 'valores': {}}
-                    resultados_demanda[chave_interna]['valores'][posto] = valor_num
-
-    # Garante que todos os postos existam em todos os resultados para consistência
-    postos_horarios = ['Fora Ponta', 'Ponta', 'Reservado']
-    for res_dict in [resultados_consumo, resultados_demanda]:
-        for grandeza in res_dict:
-            for posto in postos_horarios:
-                if posto not in res_dict[grandeza]['valores']:
-                    res_dict[grandeza]['valores'][posto] = 0.0
-    
-    return resultados_consumo, resultados_demanda
-
-def extrair_info_cliente(texto_bruto):
-    """Extrai informações de Contrato e Serial de qualquer um dos textos."""
-    info = {"contrato": "Não encontrado", "serial": "Não encontrado"}
-    if not texto_bruto: return info
-    
-    # Padrões para MM Bruta e Faturamento
-    contrato_match = re.search(r"Cliente \(contrato\)\s+(\d+)|Contrato\s+(\d+)", texto_bruto)
-    serial_match = re.search(r"Medidor \(serial\)\s+(\d+)|Medidor\s+(\d+)|Serial do medidor\s+(\d+)", texto_bruto)
-    
-    if contrato_match:
-        info["contrato"] = next((g for g in contrato_match.groups() if g is not None), "Não encontrado")
-    if serial_match:
-        info["serial"] = next((g for g in serial_match.groups() if g is not None), "Não encontrado")
-        
-    return info
-
-# --- Diálogo de Resultados ---
-@st.dialog("Resultados do Cálculo")
-def show_results_dialog(df_resultados, contrato, serial_antigo, serial_novo):
-    """Exibe o DataFrame de resultados em um diálogo."""
-    
-    # --- Geração Manual da Tabela HTML ---
-    title_html = f"<h3>Resultados para o Contrato: {contrato}</h3>" if contrato else ""
-    header_html = "<thead>"
-    header_html += f'<tr><th rowspan="2">Posto Horário</th><th colspan="4" style="text-align: center;">Medidor Anterior ({serial_antigo})</th><th colspan="4" style="text-align: center;">Medidor Novo ({serial_novo})</th><th rowspan="2">Sumarização</th></tr>'
-    header_html += "<tr>"
-    col_names = ['Valor', 'K', 'Perdas (%)', 'Valor Final']
-    header_html += "".join(f'<th>{name}</th>' for name in col_names)
-    header_html += "".join(f'<th>{name}</th>' for name in col_names)
-    header_html += "</tr></thead>"
-
-    body_html = "<tbody>"
-    for _, row in df_resultados.iterrows():
-        if str(row.iloc[0]).startswith('---'):
-            body_html += f'<tr class="separator-row"><td colspan="{len(df_resultados.columns)}">{row.iloc[0]}</td></tr>'
-        else:
-            body_html += "<tr>"
-            for i, cell_value in enumerate(row):
-                class_attr = ""
-                if i == 4 or i == 8: class_attr = ' class="thick-border-right"'
-                body_html += f'<td{class_attr}>{cell_value}</td>'
-            body_html += "</tr>"
-    body_html += "</tbody>"
+# --- Governador de memória (critcom.governador) ---
+# Esta página não guarda DataFrames na sessão (entra no orçamento só com os textos colados), mas recarrega
+# o que outra página da mesma sessão tenha deixado no disco
+contexto = get_script_run_ctx()
+critcom.retomar_sessao(contexto.session_id, contexto.session_state)
 
-    table_html = f"<table>{header_html}{body_html}</table>"
-
-    components.html(f"""
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
-        <style>
-            .capture-area {{ padding: 10px; background-color: #ffffff; }}
-            table {{ width: 100%; border-collapse: collapse; font-family: sans-serif; font-size: 14px; margin-bottom: 20px; }}
-            th, td {{ border: 1px solid #e0e0e0; padding: 8px; text-align: center; }}
-            th {{ background-color: #f0f2f6; }}
-            .button-container {{ text-align: right; margin-top: 10px; margin-bottom: 20px; }}
-            .copy-button {{ background-color: #0068c9; color: white; border: none; padding: 8px 12px; border-radius: 5px; cursor: pointer; }}
-            .copy-button:hover {{ background-color: #0055a3; }}
-            h3 {{ font-family: sans-serif; text-align: center;}}
-            th.thick-border-right, td.thick-border-right {{ border-right: 2px solid #888; }}
-            tr.separator-row td {{ text-align: center; font-weight: bold; background-color: #e8e8e8; border-left: 1px solid #e0e0e0; border-right: 1px solid #e0e0e0; }}
-        </style>
-        <div id="captureTable" class="capture-area">
-            {title_html}
-            {table_html}
-        </div>
-        <div class="button-container">
-            <button class="copy-button" onclick="copyElementAsImage('captureTable', this)">Copiar Tabela como Imagem</button>
-        </div>
-        <script>
-            function copyElementAsImage(elementId, button) {{
-                const captureElement = document.getElementById(elementId);
-                const originalText = button.innerText;
-                button.innerText = 'Copiando...';
-                html2canvas(captureElement, {{ scale: 1.5 }}).then(canvas => {{
-                    canvas.toBlob(function(blob) {{
-                        navigator.clipboard.write([ new ClipboardItem({{ 'image/png': blob }}) ])
-                        .then(() => {{ button.innerText = 'Copiado!'; setTimeout(() => {{ button.innerText = originalText; }}, 2000); }})
-                        .catch(err => {{ console.error('Erro: ', err); button.innerText = 'Falha'; setTimeout(() => {{ button.innerText = originalText; }}, 2000); }});
-                    }});
-                }});
-            }}
-        </script>
-    """, width=800, height=700, scrolling=True)
-
-    if st.button("Fechar", key="close_dialog"):
-        st.rerun()
+# --- Medição de desempenho (critcom.desempenho), ligada no painel de depuração da barra lateral ---
+perfil = critcom.Perfil(
+    "Dois medidores - Faturamento", ativo=st.session_state.get('depurar_desempenho', False),
+    memoria=st.session_state.get('depurar_memoria', True),
+)
 
 # --- Interface do Aplicativo ---
 st.title("Confirmação para 2 MDs com relatório de faturamento")
@@ -192,6 +64,7 @@ with col_btn2:
     def clear_all_text():
         st.session_state.faturamento_antigo = ""
         st.session_state.faturamento_novo = ""
+        interface.limpar_arquivos()
     st.button("LIMPAR DADOS", key="clear", on_click=clear_all_text, type="primary")
 
 # --- Estilos dos Botões ---
@@ -217,19 +90,31 @@ message_placeholder = st.empty()
 
 with st.sidebar:
     # --- Seção de Inserção de Dados ---
-    faturamento_antigo = st.text_area("Medidor Anterior", height=150, placeholder="Dê um Ctrl+A no relatório de faturamento, Ctrl+C e cole aqui.", key="faturamento_antigo")
-    faturamento_novo = st.text_area("Medidor Novo", height=150, placeholder="Dê um Ctrl+A no relatório de faturamento, Ctrl+C e cole aqui.", key="faturamento_novo")
+    faturamento_antigo = interface.campo_relatorio("Medidor Anterior", "Dê um Ctrl+A no relatório de faturamento, Ctrl+C e cole aqui.", "faturamento_antigo", 150)
+    faturamento_novo = interface.campo_relatorio("Medidor Novo", "Dê um Ctrl+A no relatório de faturamento, Ctrl+C e cole aqui.", "faturamento_novo", 150)
+    # O relatório de faturamento é curto: o arquivo é decodificado inteiro
+    faturamento_antigo = critcom.texto_completo(faturamento_antigo)
+    faturamento_novo = critcom.texto_completo(faturamento_novo)
 
 # --- Seção de Informações do Cliente ---
-info_antigo = extrair_info_cliente(faturamento_antigo)
-info_novo = extrair_info_cliente(faturamento_novo)
+# Contrato, serial e origem dos postos saem de uma única leitura do cabeçalho (critcom.cabecalho)
+with perfil.trecho("Cabeçalhos", linhas=2):
+    info_antigo = critcom.ler_cabecalho(faturamento_antigo, faturamento=True)
+    info_novo = critcom.ler_cabecalho(faturamento_novo, faturamento=True)
+perfil.anotar(contrato=info_antigo['contrato'], seriais=[info_antigo['serial'], info_novo['serial']])
 
 warnings_list = []
 if faturamento_antigo or faturamento_novo:
     if faturamento_antigo:
-        if re.search(r"Postos horários e segmentos reativos\s+Cadastro de opção tarifária", faturamento_antigo):
+        if info_antigo['postos_cadastro']:
             warnings_list.append(":warning: Atenção: Medidor anterior está com postos horários via 'Cadastro de opção tarifária'. Verifique se os postos estão corretos.")
 
+    # Vários períodos colados no mesmo campo são combinados em critcom.faturamento
+    for nome_medidor, faturamento in (("anterior", faturamento_antigo), ("novo", faturamento_novo)):
+        num_periodos = len(critcom.periodos_faturamento(faturamento)) if faturamento else 0
+        if num_periodos > 1:
+            warnings_list.append(f":information_source: Medidor {nome_medidor}: {num_periodos} períodos de faturamento. Consumo e UFER foram somados, e as demandas e o DMCR ficam com o maior valor entre eles.")
+
     contrato_antigo_final = info_antigo['contrato']
     contrato_novo_final = info_novo['contrato']
 
@@ -238,65 +123,22 @@ if faturamento_antigo or faturamento_novo:
 
 # --- Lógica de Cálculo ---
 if calculate_button:
-    res_con_antigo, res_dem_antigo = processar_dados_faturamento(faturamento_antigo)
-    res_con_novo, res_dem_novo = processar_dados_faturamento(faturamento_novo)
+    # Leitura e combinação dos períodos saem juntas de critcom.faturamento; as linhas são as do texto
+    with perfil.trecho("Leitura (anterior)", linhas=faturamento_antigo.count('\n') + 1 if faturamento_antigo else 0):
+        res_con_antigo, res_dem_antigo = critcom.processar_dados_faturamento(faturamento_antigo)
+    with perfil.trecho("Leitura (novo)", linhas=faturamento_novo.count('\n') + 1 if faturamento_novo else 0):
+        res_con_novo, res_dem_novo = critcom.processar_dados_faturamento(faturamento_novo)
     
-    table_data = []
-    postos = ['Ponta', 'Reservado', 'Fora Ponta']
-    grandezas_a_processar = [
-        {'key': 'kWh fornecido', 'type': 'consumo', 'label': 'kWh fornecido acumulado'},
-        {'key': 'kW fornecido', 'type': 'demanda', 'label': 'kW fornecido máximo'},
-        {'key': 'UFER', 'type': 'consumo', 'label': 'UFER (ERE) acumulado'},
-        {'key': 'DMCR', 'type': 'demanda', 'label': 'DMCR (DRE) máximo'},
-        {'key': 'kWh recebido', 'type': 'consumo', 'label': 'kWh recebido acumulado'},
-        {'key': 'kW recebido', 'type': 'demanda', 'label': 'kW recebido máximo'}
-    ]
-
-    def get_params(medidor_type, grandeza):
-        if medidor_type == 'antigo':
-            constante, tipo_opcao, perdas_opcao = constante_antigo, tipo_opcao_antigo, perdas_opcao_antigo
-        else:
-            constante, tipo_opcao, perdas_opcao = constante_novo, tipo_opcao_novo, perdas_opcao_novo
-        perdas_multiplier = 1.025 if perdas_opcao == "Sim" else 1.0
-        perdas_display = 2.5 if perdas_opcao == "Sim" else 0.0
-        k_value = constante
-        if grandeza.startswith("kW "):
-            if tipo_opcao == "Grandeza EAC": k_value = constante / 4
-            elif tipo_opcao == "Pulso": k_value = constante * 4
-        return k_value, perdas_display, perdas_multiplier
-
-    def get_sumarizacao(grandeza, val_antigo, val_novo):
-        return max(val_antigo, val_novo) if grandeza.startswith("kW ") or grandeza == "DMCR" else val_antigo + val_novo
-
-    for item in grandezas_a_processar:
-        grandeza, tipo_dado, label = item['key'], item['type'], item['label']
-        res_antigo = res_con_antigo if tipo_dado == 'consumo' else res_dem_antigo
-        res_novo = res_con_novo if tipo_dado == 'consumo' else res_dem_novo
-        existe_antigo = res_antigo and grandeza in res_antigo
-        existe_novo = res_novo and grandeza in res_novo
-        if existe_antigo or existe_novo:
-            table_data.append({'Posto Horário': f"--- {label} ---"})
-            for posto in postos:
-                val_antigo = res_antigo[grandeza]['valores'].get(posto, 0.0) if existe_antigo else 0.0
-                k_antigo, perdas_antigo_display, perdas_antigo_mult = get_params('antigo', grandeza)
-                final_antigo = val_antigo * k_antigo * perdas_antigo_mult
-                val_novo = res_novo[grandeza]['valores'].get(posto, 0.0) if existe_novo else 0.0
-                k_novo, perdas_novo_display, perdas_novo_mult = get_params('novo', grandeza)
-                final_novo = val_novo * k_novo * perdas_novo_mult
-                sumarizacao = get_sumarizacao(grandeza, final_antigo, final_novo)
-                table_data.append({'Posto Horário': posto, 'Valor calculado (antigo)': val_antigo, 'K (antigo)': k_antigo, 'Perdas (%) (antigo)': perdas_antigo_display, 'Valor final (antigo)': final_antigo, 'Valor calculado (novo)': val_novo, 'K (novo)': k_novo, 'Perdas (%) (novo)': perdas_novo_display, 'Valor final (novo)': final_novo, 'Sumarização': sumarizacao})
+    table_data = perfil.medir(
+        "K e perdas", critcom.linhas_dois_medidores,
+        (res_con_antigo, res_dem_antigo), (res_con_novo, res_dem_novo),
+        (constante_antigo, tipo_opcao_antigo, perdas_opcao_antigo), (constante_novo, tipo_opcao_novo, perdas_opcao_novo),
+        grandezas=critcom.GRANDEZAS_FATURAMENTO,
+    )
 
     if table_data:
-        df_resultados = pd.DataFrame(table_data)
-        def format_br(value, precision):
-            if pd.isna(value) or value == '': return ''
-            if isinstance(value, (int, float)): return f"{{:,.{precision}f}}".format(value).replace(',', 'X').replace('.', ',').replace('X', '.')
-            return value
-        col_format = {'Valor calculado (antigo)': 4, 'K (antigo)': 4, 'Perdas (%) (antigo)': 1, 'Valor final (antigo)': 4, 'Valor calculado (novo)': 4, 'K (novo)': 4, 'Perdas (%) (novo)': 1, 'Valor final (novo)': 4, 'Sumarização': 4}
-        for col, p in col_format.items():
-            if col in df_resultados.columns:
-                df_resultados[col] = df_resultados[col].apply(lambda x: format_br(x, p))
-        
+        df_resultados = perfil.medir("Formatação da tabela", critcom.formatar_tabela, table_data, critcom.COLUNAS_DOIS_MEDIDORES)
+
         contrato_antigo_final = info_antigo['contrato']
         contrato_novo_final = info_novo['contrato']
         dialog_title = ""
@@ -310,12 +152,35 @@ if calculate_button:
         serial_antigo_final = info_antigo['serial']
         serial_novo_final = info_novo['serial']
         
-        show_results_dialog(df_resultados, dialog_title, serial_antigo_final, serial_novo_final)
+        # --- Tabela HTML (montada em critcom.tabelas) e diálogo de resultados (interface) ---
+        with perfil.trecho("Tabela HTML", linhas=len(df_resultados)) as medicao:
+            table_html = medicao.dados = critcom.tabela_html_dois_medidores(df_resultados, serial_antigo_final, serial_novo_final)
+        interface.show_results_dialog(
+            perfil, table_html,
+            lambda: critcom.planilha_confirmacao(table_data, critcom.COLUNAS_DOIS_MEDIDORES),
+            interface.FORMATO_FATURAMENTO, contrato=dialog_title,
+        )
         
     elif faturamento_antigo or faturamento_novo:
         message_placeholder.error("Não foi possível encontrar dados válidos nos textos informados. Verifique o conteúdo colado.")
     else:
-        message_placeholder.warning("Por favor, cole o conteúdo em um ou ambos os campos de texto antes de calcular.")
+        message_placeholder.warning("Por favor, cole o conteúdo ou envie os arquivos antes de calcular.")
 else:
     if warnings_list:
-        message_placeholder.warning("\n\n".join(warnings_list))
\ No newline at end of file
+        message_placeholder.warning("\n\n".join(warnings_list))
+
+# --- Memória do servidor (critcom.governador) ---
+critcom.registrar_sessao(contexto.session_id, contexto.session_state)
+st.sidebar.caption(critcom.resumo_sessoes())
+
+# --- Painel de depuração: trechos medidos nesta execução (critcom.desempenho) ---
+with st.sidebar.expander("🛠️ Depuração"):
+    st.checkbox("Medir o desempenho desta página", key="depurar_desempenho",
+                help="Tempo, pico de memória, linhas e bytes enviados de cada etapa, também gravados no log.")
+    st.checkbox("Incluir o pico de memória (tracemalloc)", value=True, key="depurar_memoria",
+                help="Deixa as etapas medidas mais lentas; compare os tempos entre si.")
+    if perfil.ativo:
+        if not perfil.gravar():
+            st.warning(f"Não foi possível gravar o log em {perfil.arquivo}.")
+        st.dataframe(perfil.tabela(), hide_index=True)
+        st.caption(f"Log: {perfil.arquivo}")
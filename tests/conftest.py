@@ -0,0 +1,12 @@
+"""
+Testes do critcom (python -m pytest, a partir da raiz do repositório). Os
+geradores de relatórios e a versão anterior do parser de faturamento vêm de
+benchmarks/, que entra no caminho de importação junto com a raiz.
+"""
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for caminho in (RAIZ, os.path.join(RAIZ, 'benchmarks')):
+    if caminho not in sys.path:
+        sys.path.insert(0, caminho)
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from critcom.agregacao import agregar_por_grupo, recalcular_resultados
+from critcom.leitura import POSTOS_HORARIOS
+from critcom.medidores import agregar_medidores
+
+
+def _groupby_original(df, tipo_calculo):
+    """Resultado esperado: o groupby coluna a coluna do cálculo original das páginas."""
+    resultados = {}
+    for nome_coluna in [col for col in df.columns if col not in ['DataHora', 'Dia', 'Posto Horario']]:
+        if tipo_calculo == 'demanda' and nome_coluna.strip().upper() != "UFER":
+            operacao, calculo = 'máximo', df.groupby('Posto Horario')[nome_coluna].max()
+        else:
+            operacao, calculo = 'soma', df.groupby('Posto Horario')[nome_coluna].sum()
+        valores = {posto: calculo.get(posto, 0.0) for posto in POSTOS_HORARIOS}
+        resultados[nome_coluna] = {'operacao': operacao, 'valores': {k: (v if pd.notna(v) else 0.0) for k, v in valores.items()}}
+    return resultados
+
+
+def _mal_condicionado(linhas=35040, semente=7):
+    """Um ano de intervalos de 15 min com valores de 3 casas, grandes e pequenos misturados, e alguns NaN."""
+    gerador = np.random.default_rng(semente)
+    grandes = np.round(gerador.uniform(0, 2e4, linhas), 3)
+    pequenos = np.round(gerador.uniform(0, 1, linhas), 3)
+    pequenos[gerador.random(linhas) < 0.01] = np.nan
+    return pd.DataFrame({
+        'DataHora': pd.date_range('2024-01-01 00:15', periods=linhas, freq='15min'),
+        'Dia': 'Seg',
+        # Sem 'Reservado', que fica zerado
+        'Posto Horario': gerador.choice(['Fora Ponta', 'Ponta'], linhas, p=[0.9, 0.1]),
+        'kWh fornecido': grandes,
+        'kvarh': pequenos,
+        'UFER': np.where(gerador.random(linhas) < 0.5, pequenos, grandes),
+    })
+
+
+@pytest.mark.parametrize('tipo_calculo', ['consumo', 'demanda'])
+def test_recalcular_igual_ao_groupby(tipo_calculo):
+    df = _mal_condicionado()
+    assert recalcular_resultados(df, tipo_calculo) == _groupby_original(df, tipo_calculo)
+
+
+def test_grupos_vazios_nan_e_ignorados():
+    codigos = np.array([-1, 0, 0, 2, 5], dtype=np.int64)
+    valores = np.array([[9.0, 9.0], [1.0, np.nan], [2.0, np.nan], [np.nan, np.nan], [9.0, 9.0]])
+    resultado = agregar_por_grupo(codigos, valores, [False, True], 3)
+    assert resultado.tolist() == [[3.0, 0.0], [0.0, 0.0], [0.0, 0.0]]
+
+
+def test_medidores_iguais_ao_groupby():
+    dfs = [_mal_condicionado(semente=1), None, _mal_condicionado(linhas=1000, semente=2).drop(columns='UFER')]
+    valores, colunas, presentes = agregar_medidores(dfs, 'consumo')
+    assert presentes.tolist() == [[True, True, True], [False, False, False], [True, True, False]]
+    for numero, df in enumerate(dfs):
+        if df is None:
+            assert not valores[numero].any()
+            continue
+        esperado = _groupby_original(df, 'consumo')
+        for j, coluna in enumerate(colunas):
+            obtidos = valores[numero, :, j].tolist()
+            assert obtidos == ([esperado[coluna]['valores'][posto] for posto in POSTOS_HORARIOS] if coluna in esperado else [0.0] * 3)
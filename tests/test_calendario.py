@@ -0,0 +1,108 @@
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from critcom.calendario import Calendario, ClassificadorPostos, carregar_calendarios, feriados, pascoa
+from critcom.leitura import POSTOS_HORARIOS
+
+CALENDARIOS = {
+    "feriados_nacionais": ["01-01", "04-21", {"dia": "11-20", "desde": 2024}, "12-25"],
+    "feriados_pascoa": {"Carnaval": -47, "Sexta-feira Santa": -2, "Corpus Christi": 60},
+    "calendarios": {
+        "Teste": {"ponta": ["18:00", "21:00"], "reservado": ["00:00", "06:00"], "feriados": ["2024-03-19"]},
+    },
+}
+
+
+@pytest.fixture
+def calendario(tmp_path):
+    caminho = tmp_path / 'calendarios.json'
+    caminho.write_text(json.dumps(CALENDARIOS), encoding='utf-8')
+    return carregar_calendarios(str(caminho))['Teste']
+
+
+def _postos(classificador, instantes):
+    codigos = classificador.classificar(np.array(instantes, dtype='datetime64[m]'))
+    return [POSTOS_HORARIOS[codigo] for codigo in codigos]
+
+
+@pytest.mark.parametrize('ano, domingo', [
+    (1818, '03-22'), (1943, '04-25'), (2000, '04-23'), (2011, '04-24'), (2019, '04-21'),
+    (2024, '03-31'), (2025, '04-20'), (2026, '04-05'), (2038, '04-25'), (2285, '03-22'),
+])
+def test_pascoa(ano, domingo):
+    assert pascoa(ano) == datetime.date.fromisoformat(f'{ano}-{domingo}')
+
+
+def test_feriados_moveis_e_desde(calendario):
+    datas_2023 = feriados(calendario, 2023, 2023)
+    datas_2024 = feriados(calendario, 2024, 2024)
+    assert datetime.date(2024, 2, 13) in datas_2024  # Carnaval
+    assert datetime.date(2024, 3, 29) in datas_2024  # Sexta-feira Santa
+    assert datetime.date(2024, 5, 30) in datas_2024  # Corpus Christi
+    assert datetime.date(2024, 3, 19) in datas_2024  # regional, só em 2024
+    assert datetime.date(2024, 11, 20) in datas_2024
+    assert datetime.date(2023, 11, 20) not in datas_2023
+    assert datetime.date(2023, 3, 19) not in datas_2023
+    assert datas_2024 == sorted(datas_2024)
+
+
+def test_ponta_nos_dias_uteis(calendario):
+    classificador = ClassificadorPostos(calendario)
+    # Terça-feira comum: o intervalo que termina às 18:00 ainda é fora ponta, o de 21:00 já é ponta
+    assert _postos(classificador, [
+        '2024-01-02T03:00', '2024-01-02T06:00', '2024-01-02T06:15', '2024-01-02T18:00',
+        '2024-01-02T18:15', '2024-01-02T21:00', '2024-01-02T21:15',
+    ]) == ['Reservado', 'Reservado', 'Fora Ponta', 'Fora Ponta', 'Ponta', 'Ponta', 'Fora Ponta']
+
+
+@pytest.mark.parametrize('instante', [
+    '2024-01-01T19:00',  # Confraternização (segunda-feira)
+    '2024-01-06T19:00',  # sábado
+    '2024-01-07T19:00',  # domingo
+    '2024-02-13T19:00',  # Carnaval
+    '2024-03-19T19:00',  # feriado regional
+    '2024-05-30T19:00',  # Corpus Christi
+    '2024-11-20T19:00',  # Consciência Negra (desde 2024)
+])
+def test_sem_ponta_em_feriados_e_fins_de_semana(calendario, instante):
+    assert _postos(ClassificadorPostos(calendario), [instante]) == ['Fora Ponta']
+
+
+def test_reservado_vale_em_feriados_e_fins_de_semana(calendario):
+    assert _postos(ClassificadorPostos(calendario), ['2024-01-01T03:00', '2024-01-06T03:00']) == ['Reservado'] * 2
+
+
+def test_feriado_antes_de_valer(calendario):
+    # 20/11/2023 (segunda-feira) ainda não era feriado
+    assert _postos(ClassificadorPostos(calendario), ['2023-11-20T19:00']) == ['Ponta']
+
+
+def test_janela_que_cruza_a_meia_noite():
+    classificador = ClassificadorPostos(Calendario('Noturno', (22 * 60, 2 * 60), None, (), ()))
+    assert _postos(classificador, [
+        '2024-01-08T22:00',  # segunda: termina às 22:00, ainda fora
+        '2024-01-08T22:15',
+        '2024-01-09T00:00',  # meia-noite de segunda para terça
+        '2024-01-09T02:00',
+        '2024-01-09T02:15',
+        '2024-01-13T01:00',  # sábado de madrugada: janela que começou na sexta
+        '2024-01-13T23:00',  # sábado à noite: sem ponta
+        '2024-01-15T01:00',  # segunda de madrugada: a janela de domingo não existe
+    ]) == ['Fora Ponta', 'Ponta', 'Ponta', 'Ponta', 'Fora Ponta', 'Ponta', 'Fora Ponta', 'Fora Ponta']
+
+
+def test_reservado_que_cruza_a_meia_noite():
+    classificador = ClassificadorPostos(Calendario('Noturno', (18 * 60, 21 * 60), (21 * 60 + 30, 6 * 60), (), ()))
+    assert _postos(classificador, [
+        '2024-01-07T23:00', '2024-01-08T05:00', '2024-01-08T06:15', '2024-01-08T21:15', '2024-01-08T21:45',
+    ]) == ['Reservado', 'Reservado', 'Fora Ponta', 'Fora Ponta', 'Reservado']
+
+
+def test_anos_na_mesma_serie(calendario):
+    # Série que atravessa o ano: os feriados dos dois anos entram no mapa
+    assert _postos(ClassificadorPostos(calendario), ['2023-12-25T19:00', '2023-12-26T19:00', '2024-01-01T19:00']) == [
+        'Fora Ponta', 'Ponta', 'Fora Ponta',
+    ]
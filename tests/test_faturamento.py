@@ -0,0 +1,95 @@
+import math
+
+import pytest
+
+from critcom.faturamento import (
+    GRANDEZAS_RELATORIO, OPERACOES, POSTOS_FATURAMENTO, _ler_periodos, periodos_faturamento,
+    processar_dados_faturamento,
+)
+from faturamento import _iguais, processar_regex
+from gerador import gerar_medidor
+
+
+def _faturamento(mes, dias=30, intervalo=15):
+    return gerar_medidor(dias, intervalo, f'2024-{mes:02d}-01', semente=mes)['faturamento']
+
+
+def _combinar_regex(textos):
+    """Resultado esperado para os períodos colados: cada um lido pela versão por regex, depois somados ou com o máximo."""
+    lidos = [processar_regex(texto) for texto in textos]
+    esperado = []
+    for indice in range(2):
+        por_tipo = {}
+        for chave in lidos[0][indice]:
+            operacao = lidos[0][indice][chave]['operacao']
+            reducao = sum if operacao == 'soma' else max
+            por_tipo[chave] = {
+                'operacao': operacao,
+                'valores': {
+                    posto: reducao(lido[indice][chave]['valores'][posto] for lido in lidos)
+                    for posto in POSTOS_FATURAMENTO
+                },
+            }
+        esperado.append(por_tipo)
+    return tuple(esperado)
+
+
+def _aproximados(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_aproximados(a[chave], b[chave]) for chave in a)
+    if isinstance(a, float):
+        return math.isclose(a, b, rel_tol=1e-12) or (math.isnan(a) and math.isnan(b))
+    return a == b
+
+
+@pytest.mark.parametrize('mes, dias, intervalo', [(1, 30, 15), (2, 7, 5), (6, 31, 15), (12, 1, 15)])
+def test_um_periodo_igual_a_versao_por_regex(mes, dias, intervalo):
+    texto = _faturamento(mes, dias, intervalo)
+    assert _iguais(processar_dados_faturamento(texto), processar_regex(texto))
+
+
+def test_um_periodo_com_espacos_no_lugar_das_tabulacoes():
+    texto = _faturamento(3).replace('\t', '   ')
+    assert _iguais(processar_dados_faturamento(texto), processar_regex(texto))
+
+
+def test_varios_periodos_combinados():
+    textos = [_faturamento(mes) for mes in (1, 2, 3)]
+    texto = ''.join(textos)
+    assert len(periodos_faturamento(texto)) == 3
+    assert _aproximados(processar_dados_faturamento(texto), _combinar_regex(textos))
+
+
+def test_periodos_sem_dados_gerais_separados_pelo_posto_repetido():
+    textos = [_faturamento(mes).replace("Dados gerais do faturamento\n", "") for mes in (4, 5)]
+    texto = ''.join(textos)
+    assert len(periodos_faturamento(texto)) == 2
+    assert _aproximados(processar_dados_faturamento(texto), _combinar_regex(textos))
+
+
+def test_operacoes_por_tipo():
+    consumo, demanda = processar_dados_faturamento(_faturamento(1))
+    for tipo, chave in GRANDEZAS_RELATORIO.values():
+        resultado = consumo if tipo == 'consumo' else demanda
+        assert resultado[chave]['operacao'] == OPERACOES[tipo]
+
+
+def test_posto_ausente_vira_zero():
+    texto = "Ponta\nkWh fornecido\t1.234,5\nDMCR\t10,0\n\nDados gerais do faturamento\n"
+    consumo, demanda = processar_dados_faturamento(texto)
+    assert consumo['kWh fornecido']['valores'] == {'Fora Ponta': 0.0, 'Ponta': 1234.5, 'Reservado': 0.0}
+    assert demanda['DMCR']['valores']['Ponta'] == 10.0
+    assert 'kWh recebido' not in consumo
+
+
+def test_texto_vazio():
+    assert processar_dados_faturamento('') == (None, None)
+    assert periodos_faturamento('') == []
+
+
+def test_leitura_dos_periodos_compartilhada():
+    texto = _faturamento(7)
+    periodos = periodos_faturamento(texto)
+    processar_dados_faturamento(texto)
+    # As duas funções usam o mesmo resultado memoizado
+    assert _ler_periodos(texto) is periodos
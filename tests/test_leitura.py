@@ -0,0 +1,103 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from critcom.completude import indice_completude
+from critcom.leitura import POSTOS_HORARIOS, ler_linhas_intervalos, ler_relatorio_intervalos
+from gerador import gerar_medidor
+
+CABECALHO = "Cliente (contrato)\t123\nMedidor (serial)\t456\n\nData\tDia\tPostos horários\tkWh fornecido\tkvarh\n"
+
+
+def _ler_regex(texto_bruto):
+    """Resultado esperado: a leitura por expressão regular das páginas antes do parser compartilhado."""
+    header_match = re.search(r"^Data\s+Dia\s+Postos horários\s+(.*)$", texto_bruto, re.MULTILINE)
+    colunas_dados = [col.strip() for col in header_match.group(1).strip().split('\t')]
+    regex_parts = [r"^(\d{2}/\d{2}/\d{4}\s\d{2}:\d{2})", r"([A-Za-zçáéíóúãõâêôü]+)", r"(Fora Ponta|Ponta|Reservado)"]
+    regex_parts.extend([r"([\d.,-]+)"] * len(colunas_dados))
+    dados = re.compile(r"\s+".join(regex_parts) + r"$", re.MULTILINE).findall(texto_bruto)
+    df = pd.DataFrame(dados, columns=['DataHora', 'Dia', 'Posto Horario'] + colunas_dados)
+    df['DataHora'] = pd.to_datetime(df['DataHora'], format='%d/%m/%Y %H:%M')
+    for nome_coluna in colunas_dados:
+        df[nome_coluna] = pd.to_numeric(df[nome_coluna].str.replace('.', '', regex=False).str.replace(',', '.', regex=False), errors='coerce')
+    return df
+
+
+def _iguais_regex(df, esperado):
+    assert list(df.columns) == list(esperado.columns)
+    assert df['DataHora'].tolist() == esperado['DataHora'].tolist()
+    assert df['Dia'].astype(str).tolist() == esperado['Dia'].tolist()
+    assert df['Posto Horario'].astype(str).tolist() == esperado['Posto Horario'].tolist()
+    for coluna in esperado.columns[3:]:
+        assert np.array_equal(df[coluna].to_numpy(np.float64), esperado[coluna].to_numpy(np.float64), equal_nan=True)
+
+
+def test_igual_a_versao_anterior():
+    texto = gerar_medidor(30, 15, '2024-01-01', semente=5, taxa_ausentes=0.01)['demanda']
+    linhas = texto.split('\n')
+    # Valores com letras ou vazios descartam a linha; "-" vira NaN
+    linhas[10] += 'x'
+    for posicao in (20, 21):
+        campos = linhas[posicao].split('\t')
+        campos[4] = {20: '', 21: '-'}[posicao]
+        linhas[posicao] = '\t'.join(campos)
+    texto = '\n'.join(linhas)
+    df = ler_relatorio_intervalos(texto)
+    _iguais_regex(df, _ler_regex(texto))
+    assert len(df) == len(_ler_regex(texto))
+
+
+@pytest.mark.parametrize('fim_de_linha', ['\n', '\r\n', '\t\n', ' \t\r\n'])
+def test_fins_de_linha(fim_de_linha):
+    dados = ["01/01/2024 00:15\tSeg\tReservado\t1.234,5\t-", "01/01/2024 00:30\tSeg\tPonta\t2,25\t0,5"]
+    df = ler_linhas_intervalos((CABECALHO + fim_de_linha.join(dados) + fim_de_linha).splitlines())
+    assert df['DataHora'].tolist() == [pd.Timestamp('2024-01-01 00:15'), pd.Timestamp('2024-01-01 00:30')]
+    assert df['Posto Horario'].tolist() == ['Reservado', 'Ponta']
+    assert df['kWh fornecido'].tolist() == [1234.5, 2.25]
+    assert np.isnan(df['kvarh'][0]) and df['kvarh'][1] == 0.5
+
+
+def test_separado_por_espacos():
+    df = ler_linhas_intervalos((CABECALHO + "01/01/2024 00:15   Seg   Fora Ponta   1,5   2\n").splitlines())
+    assert df['Posto Horario'].tolist() == ['Fora Ponta']
+    assert df[['kWh fornecido', 'kvarh']].to_numpy().tolist() == [[1.5, 2.0]]
+
+
+@pytest.mark.parametrize('data', ['31/02/2024 00:15', '01/13/2024 00:15', '00/01/2024 00:15', '01/01/2024 24:00', '01/01/2024 00:60', '01-01-2024 00:15'])
+def test_datas_invalidas_descartadas(data):
+    dados = [f"{data}\tSeg\tPonta\t1\t1", "01/01/2024 00:30\tSeg\tPonta\t2\t2"]
+    df = ler_linhas_intervalos((CABECALHO + '\n'.join(dados)).splitlines())
+    assert df['kWh fornecido'].tolist() == [2.0]
+
+
+@pytest.mark.parametrize('valor, mantida', [('1,5', True), ('-', True), ('-1,5', True), ('', False), ('1,5a', False), ('n/d', False), ('1e5', False)])
+def test_valores_malformados(valor, mantida):
+    dados = [f"01/01/2024 00:15\tSeg\tPonta\t{valor}\t1", "01/01/2024 00:30\tSeg\tPonta\t2\t2"]
+    df = ler_linhas_intervalos((CABECALHO + '\n'.join(dados)).splitlines())
+    assert len(df) == (2 if mantida else 1)
+
+
+def test_posto_desconhecido_e_sem_dados():
+    dados = ["01/01/2024 00:15\tSeg\tIntermediário\t1\t1", "01/01/2024 00:30\tSeg\tPonta\t2\t2"]
+    assert ler_linhas_intervalos((CABECALHO + '\n'.join(dados)).splitlines())['kWh fornecido'].tolist() == [2.0]
+    assert ler_linhas_intervalos(CABECALHO.splitlines()) is None
+    assert ler_linhas_intervalos(dados) is None
+
+
+def test_completude_conta_linhas_descartadas():
+    dados = [
+        "01/01/2024 00:15\tSeg\tReservado\t1\t1",
+        "01/01/2024 00:30\tSeg\tReservado\tabc\t1",  # descartada: conta como ausente
+        "01/01/2024 00:45\tSeg\tReservado\t1\t1",
+        "01/01/2024 00:45\tSeg\tReservado\t1\t1",
+        "01/01/2024 01:00\tSeg\tReservado\t1\t1",
+    ]
+    indice = indice_completude(ler_linhas_intervalos((CABECALHO + '\n'.join(dados)).splitlines()))
+    assert indice.passo == 15
+    assert (indice.esperados, indice.presentes, indice.duplicados) == (4, 3, 1)
+    assert indice.lacunas.tolist() == [[np.datetime64('2024-01-01T00:30'), np.datetime64('2024-01-01T00:30')]]
+    # Presentes, faltando e duplicados somados em todos os postos
+    assert indice.por_posto[:, 1:].sum(axis=0).tolist() == [3, 1, 1]
+    assert indice.por_posto[POSTOS_HORARIOS.index('Reservado'), 1] == 3
@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from critcom.agregacao import agregar_por_posto
+from critcom.leitura import POSTOS_HORARIOS
+from critcom.picos import IndiceDemanda
+
+
+def _demanda(linhas=35040, semente=3):
+    """Um ano de demanda a cada 15 min, com valores de 3 casas de ordens de grandeza diferentes e alguns NaN."""
+    gerador = np.random.default_rng(semente)
+    kw = np.round(gerador.uniform(0, 2e4, linhas), 3)
+    kw[gerador.random(linhas) < 0.01] = np.nan
+    ufer = np.round(gerador.uniform(0, 1, linhas), 3)
+    ufer[gerador.random(linhas) < 0.5] *= 1e5
+    return pd.DataFrame({
+        'DataHora': pd.date_range('2024-01-01 00:15', periods=linhas, freq='15min'),
+        'Dia': 'Seg',
+        'Posto Horario': gerador.choice(POSTOS_HORARIOS, linhas, p=[0.8, 0.1, 0.1]),
+        'kW fornecido': kw,
+        'kvar': np.round(gerador.uniform(-500, 500, linhas), 3),
+        'UFER': ufer,
+    })
+
+
+@pytest.mark.parametrize('faixa', [(None, None), (5000.0, 15000.0), (0.0, 300.0), (19990.0, None), (3e4, 4e4)])
+def test_agregar_igual_ao_filtro(faixa):
+    df = _demanda()
+    indice = IndiceDemanda(df)
+    mascara = indice.mascara(*faixa)
+    filtrado = df[mascara & df['kW fornecido'].notna()]
+    esperado = agregar_por_posto(filtrado, 'demanda')
+    obtido = indice.agregar(*faixa)
+    assert obtido[['kW fornecido', 'kvar']].equals(esperado[['kW fornecido', 'kvar']])
+    # A soma da UFER sai correta até o último dígito
+    for posto in POSTOS_HORARIOS:
+        linhas = filtrado.loc[filtrado['Posto Horario'] == posto, 'UFER']
+        assert obtido.loc[posto, 'UFER'] == math.fsum(linhas)
+    assert obtido['UFER'].equals(esperado['UFER'])
+
+
+def test_filtro_somado():
+    df = _demanda(linhas=2000)
+    indice = IndiceDemanda(df, tipo_calculo='consumo')
+    obtido = indice.agregar(100.0, 10000.0)
+    filtrado = df[indice.mascara(100.0, 10000.0)]
+    for posto in POSTOS_HORARIOS:
+        linhas = filtrado[filtrado['Posto Horario'] == posto]
+        assert obtido.loc[posto, 'kW fornecido'] == math.fsum(linhas['kW fornecido'])
+        assert obtido.loc[posto, 'kvar'] == math.fsum(linhas['kvar'])
+
+
+def test_vazio():
+    indice = IndiceDemanda(_demanda().iloc[:0])
+    assert indice.vazio
+    assert not indice.agregar().to_numpy().any()
@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from critcom.leitura import ler_relatorio_intervalos
+from critcom.planilhas import planilha_confirmacao
+from gerador import gerar_medidor
+
+
+def _ler(dados, aba):
+    return pd.read_excel(io.BytesIO(dados), sheet_name=aba)
+
+
+def test_abas_de_intervalos_iguais_aos_dataframes():
+    textos = gerar_medidor(20, 15, taxa_ausentes=0.05)
+    intervalos = [(nome, ler_relatorio_intervalos(textos[nome])) for nome in ('consumo', 'demanda')]
+    dados = planilha_confirmacao([{'Grandeza': 'kWh', 'Valor': 1.5}], {'Valor': 2}, intervalos)
+    for nome, df in intervalos:
+        esperado = df.astype({coluna: object for coluna in df.columns if isinstance(df[coluna].dtype, pd.CategoricalDtype)})
+        pd.testing.assert_frame_equal(_ler(dados, nome), esperado.reset_index(drop=True), check_dtype=False)
+    wb = load_workbook(io.BytesIO(dados))
+    assert wb.sheetnames == ['Resultados', 'consumo', 'demanda']
+    assert wb['consumo']['A1'].font.b
+    assert wb['consumo']['A2'].is_date
+
+
+def test_tipos_e_celulas_vazias():
+    df = pd.DataFrame({
+        'DataHora': pd.to_datetime(['2024-01-01 00:15:00', None, '2024-02-29 23:59:59']),
+        'Texto': ['a & <b>', None, ' com espaços '],
+        'Inteiro': [1, 2, 3],
+        'Lógico': [True, False, True],
+        'Real': [1.25, np.nan, np.inf],
+        'Categoria': pd.Categorical(['Ponta', None, 'Reservado']),
+    })
+    dados = planilha_confirmacao([], {}, [('Tipos', df), ('Vazia', df.iloc[:0]), ('Nenhum', None)])
+    ws = load_workbook(io.BytesIO(dados))['Tipos']
+    assert list(ws.values) == [
+        tuple(df.columns),
+        (pd.Timestamp('2024-01-01 00:15').to_pydatetime(), 'a & <b>', 1, True, 1.25, 'Ponta'),
+        (None, None, 2, False, None, None),
+        (pd.Timestamp('2024-02-29 23:59:59').to_pydatetime(), ' com espaços ', 3, True, None, 'Reservado'),
+    ]
+    assert load_workbook(io.BytesIO(dados)).sheetnames == ['Resultados', 'Tipos', 'Vazia']